@@ -0,0 +1,187 @@
+import numpy as np
+import os
+import struct
+import threading
+import zlib
+from typing import NamedTuple, Tuple
+
+# header of checkpoints: magic, version, flags, width, height, generation, start age, max age, cell type, mode, rule
+# string, and the column and row of the top left cell
+checkpoint_header_format = '<4sHHQQQqq16s32s64sqq'
+checkpoint_header_size = 256
+checkpoint_magic = b'GOLC'
+# flag set when the cells are compressed, otherwise they are stored raw and can be memory-mapped
+compressed = 1
+# flag set when the cells are bits packed into 64-bit words per row, as in a ``PackedWorld``
+packed = 2
+# flag set when the location of the top left cell is stored, as for an ``InfiniteWorld``
+located = 4
+# bytes of cells compressed or decompressed at a time, which bounds the extra memory of a checkpoint
+chunk_bytes = 1 << 24
+
+
+class Checkpoint(NamedTuple):
+    """
+    Snapshot of a simulation: the cells and everything needed to resume stepping them. Written by
+    ``Simulator.save_checkpoint`` and resumed by ``Simulator.load_checkpoint``.
+
+    The file holds a fixed-size header followed by the cells, either compressed with zlib or raw. Raw cells start at a
+    fixed offset, so a checkpoint of any size is opened without reading it by memory-mapping it.
+
+    The cells of a ``PackedWorld`` are stored as its packed bits, with the number of columns they hold in ``width``. The
+    cells of an ``InfiniteWorld`` are stored with the location of their top left cell in ``origin``.
+    """
+    generation: int
+    rules: str
+    mode: str
+    start_age: int
+    max_age: int
+    cells: np.ndarray
+    # number of columns of packed cells, None when ``cells`` holds a value per cell
+    width: int = None
+    # location of the top left cell on an unbounded plane, None for a bounded world
+    origin: Tuple[int, int] = None
+
+    def write(self, path: str, compress: bool = True, level: int = 1) -> None:
+        """
+        Writes the checkpoint. It is first written to a temporary file next to ``path`` that replaces ``path`` once it
+        is complete, so a crash while writing leaves the previous checkpoint intact.
+
+        :param path: file to write.
+        :param compress: (optional) whether to compress the cells, otherwise they are stored raw for memory-mapping.
+        :param level: (optional) zlib compression level, the fastest by default.
+        """
+        cells = self.cells
+        height, width = cells.shape
+        flags = (compressed if compress else 0) | (packed if self.width is not None else 0) | \
+                (located if self.origin is not None else 0)
+        header = struct.pack(checkpoint_header_format, checkpoint_magic, 1, flags,
+                             width if self.width is None else self.width, height, self.generation, self.start_age,
+                             self.max_age, cells.dtype.str.encode(), self.mode.encode(), self.rules.encode(),
+                             *(self.origin or (0, 0)))
+        band = max(1, chunk_bytes // max(1, width * cells.itemsize))
+        temporary = path + '.tmp'
+        with open(temporary, 'wb') as file:
+            file.write(header.ljust(checkpoint_header_size, b'\0'))
+            compressor = zlib.compressobj(level) if compress else None
+            for top in range(0, height, band):
+                data = np.ascontiguousarray(cells[top:top+band]).data
+                file.write(compressor.compress(data) if compress else data)
+            if compress:
+                file.write(compressor.flush())
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, path)
+
+    @classmethod
+    def read(cls, path: str, mmap: bool = True) -> 'Checkpoint':
+        """
+        Reads a checkpoint. Compressed cells are decompressed into a new array; raw cells are memory-mapped
+        copy-on-write, so they are only read when used and changes to them never reach the file.
+
+        :param path: file written by ``write``.
+        :param mmap: (optional) whether to memory-map raw cells rather than reading them into memory.
+        :return: ``Checkpoint`` with the stored cells and state.
+        """
+        with open(path, 'rb') as file:
+            fields = struct.unpack(checkpoint_header_format, file.read(struct.calcsize(checkpoint_header_format)))
+            if fields[0] != checkpoint_magic:
+                raise ValueError("'{}' is not a checkpoint".format(path))
+            flags, width, height, generation, start_age, max_age = fields[2:8]
+            dtype, mode, rules = (field.rstrip(b'\0').decode() for field in fields[8:11])
+            # packed rows hold 64 columns per word
+            shape = (height, -(-width // 64)) if flags & packed else (height, width)
+            width = width if flags & packed else None
+            origin = tuple(fields[11:13]) if flags & located else None
+            if not flags & compressed:
+                if mmap:
+                    cells = np.memmap(path, dtype=dtype, mode='c', offset=checkpoint_header_size, shape=shape)
+                else:
+                    file.seek(checkpoint_header_size)
+                    cells = np.fromfile(file, dtype=dtype, count=shape[0] * shape[1]).reshape(shape)
+                if cells.size != shape[0] * shape[1]:
+                    raise ValueError("'{}' is truncated".format(path))
+                return cls(generation, rules, mode, start_age, max_age, cells, width, origin)
+
+            cells = np.empty(shape, dtype=dtype)
+            target = memoryview(cells.reshape(-1).view(np.uint8))
+            decompressor = zlib.decompressobj()
+            file.seek(checkpoint_header_size)
+            filled = 0
+            while not decompressor.eof:
+                data = decompressor.unconsumed_tail or file.read(chunk_bytes)
+                if not data:
+                    raise ValueError("'{}' is truncated".format(path))
+                chunk = decompressor.decompress(data, max(1, len(target) - filled))
+                if filled + len(chunk) > len(target):
+                    raise ValueError("'{}' holds more cells than its header states".format(path))
+                target[filled:filled+len(chunk)] = chunk
+                filled += len(chunk)
+            if filled != len(target):
+                raise ValueError("'{}' is truncated".format(path))
+            return cls(generation, rules, mode, start_age, max_age, cells, width, origin)
+
+
+class Checkpointer:
+    """
+    Writes checkpoints on a background thread, so the simulation keeps stepping while a checkpoint is compressed and
+    written. The cells are copied before they are handed to the thread. A checkpoint that falls due while the previous
+    one is still being written is skipped rather than waited for.
+    """
+
+    def __init__(self, path: str, every: int, compress: bool = True):
+        """
+        Constructor of the checkpointer.
+
+        :param path: file that every checkpoint overwrites.
+        :param every: number of generations between checkpoints.
+        :param compress: (optional) whether to compress the cells.
+        """
+        if every < 1:
+            raise ValueError("every must be at least 1")
+        self.path = path
+        self.every = every
+        self.compress = compress
+        self.thread = None
+        self.error = None
+        # generation of the last completed checkpoint, and the number of checkpoints skipped
+        self.written = None
+        self.skipped = 0
+
+    def submit(self, checkpoint: Checkpoint) -> bool:
+        """
+        Starts writing a checkpoint in the background, unless the previous one is still being written.
+
+        :param checkpoint: checkpoint whose cells may be changed after this call returns.
+        :return: True when the checkpoint is being written, False when it was skipped.
+        """
+        self.__raise__()
+        if self.thread is not None and self.thread.is_alive():
+            self.skipped += 1
+            return False
+        checkpoint = checkpoint._replace(cells=np.array(checkpoint.cells))
+        self.thread = threading.Thread(target=self.__write__, args=(checkpoint,))
+        self.thread.start()
+        return True
+
+    def __write__(self, checkpoint: Checkpoint) -> None:
+        """Writes a checkpoint on the background thread, keeping any error for the simulation thread"""
+        try:
+            checkpoint.write(self.path, self.compress)
+            self.written = checkpoint.generation
+        except Exception as error:
+            self.error = error
+
+    def __raise__(self) -> None:
+        """Raises the error of a failed background write in the simulation thread"""
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    def wait(self) -> None:
+        """
+        Waits until the checkpoint being written, if any, is complete.
+        """
+        if self.thread is not None:
+            self.thread.join()
+        self.__raise__()
@@ -0,0 +1,259 @@
+import numpy as np
+import struct
+import zlib
+from bisect import bisect_right
+from typing import Iterator, List, Tuple
+
+# header of delta logs: magic, version, width, height, keyframe interval, cell type, rule string
+log_header_format = '<4sHQQI16s64s'
+log_magic = b'GOLD'
+# every record: kind, generation, size of the compressed payload
+record_format = '<BQI'
+keyframe, delta = 0, 1
+# index of the keyframes appended on close: offset and number of (generation, offset) entries
+index_entry_format = '<QQ'
+index_trailer_format = '<QQ4s'
+index_magic = b'GIDX'
+
+
+class DeltaLog:
+    """
+    Writer of a compact binary log of a run. Most generations are stored as deltas against the previously logged
+    generation: the runs of cells that changed and their new values. Every ``keyframe_every``-th record is a keyframe
+    holding all cells, so ``DeltaLogReader`` can seek to any logged generation by replaying only the deltas after the
+    nearest keyframe. Every record is compressed with zlib.
+    """
+
+    def __init__(self, path: str, width: int, height: int, dtype=np.int64, rules: str = '', keyframe_every: int = 64,
+                 level: int = 1):
+        """
+        Constructor of a log, which creates or overwrites the file.
+
+        :param path: file to write.
+        :param width: width of the logged world.
+        :param height: height of the logged world.
+        :param dtype: (optional) type of the cells.
+        :param rules: (optional) rule string stored in the header.
+        :param keyframe_every: (optional) number of records between keyframes, 1 to store only keyframes.
+        :param level: (optional) zlib compression level, the fastest by default.
+        """
+        if keyframe_every < 1:
+            raise ValueError("keyframe_every must be at least 1")
+        if width * height >= 1 << 32:
+            raise ValueError("a delta log holds worlds of less than 2**32 cells")
+        self.path = path
+        self.shape = (height, width)
+        self.dtype = np.dtype(dtype)
+        self.keyframe_every = keyframe_every
+        self.level = level
+        self.records = 0
+        self.keyframes = []
+        self.previous = np.zeros(self.shape, dtype=self.dtype)
+        self.changed = np.empty(self.shape, dtype=bool)
+        self.file = open(path, 'wb')
+        self.file.write(struct.pack(log_header_format, log_magic, 1, width, height, keyframe_every,
+                                    self.dtype.str.encode(), rules.encode()))
+
+    @classmethod
+    def for_world(cls, path: str, world, rules: str = '', keyframe_every: int = 64) -> 'DeltaLog':
+        """
+        Creates a log matching the size and cell type of a world.
+
+        :param path: file to write.
+        :param world: ``World`` to be logged.
+        :param rules: (optional) rule string stored in the header.
+        :param keyframe_every: (optional) number of records between keyframes.
+        :return: new ``DeltaLog``.
+        """
+        return cls(path, world.width, world.height, world.world.dtype, rules, keyframe_every)
+
+    def write(self, generation: int, cells: np.ndarray) -> None:
+        """
+        Appends a generation to the log, as a keyframe or as the cells that changed since the previous record.
+
+        :param generation: number of the generation, larger than that of the previous record.
+        :param cells: cells of the generation.
+        """
+        if cells.shape != self.shape:
+            raise ValueError("expected cells of shape {}, got {}".format(self.shape, cells.shape))
+        if self.records % self.keyframe_every == 0:
+            self.keyframes.append((generation, self.file.tell()))
+            self.__record__(keyframe, generation, np.ascontiguousarray(cells, dtype=self.dtype).tobytes())
+        else:
+            np.not_equal(cells, self.previous, out=self.changed)
+            self.__record__(delta, generation, DeltaLog.encode(self.changed, cells, self.dtype))
+        np.copyto(self.previous, cells, casting='unsafe')
+        self.records += 1
+
+    def __record__(self, kind: int, generation: int, payload: bytes) -> None:
+        """Writes one compressed record"""
+        payload = zlib.compress(payload, self.level)
+        self.file.write(struct.pack(record_format, kind, generation, len(payload)))
+        self.file.write(payload)
+
+    @staticmethod
+    def encode(changed: np.ndarray, cells: np.ndarray, dtype: np.dtype) -> bytes:
+        """
+        Run-length encodes the changed cells: the number of runs, the gap between the flat indices where consecutive runs
+        start, the length of every run and the new values of the changed cells. Gaps and lengths are small numbers, which
+        compress far better than the indices themselves.
+
+        :param changed: mask of the cells that changed.
+        :param cells: new cells.
+        :param dtype: type of the stored values.
+        :return: encoded delta.
+        """
+        indices = np.flatnonzero(changed)
+        starts = np.flatnonzero(np.diff(indices, prepend=-2) != 1)
+        lengths = np.diff(starts, append=len(indices))
+        values = cells.ravel()[indices].astype(dtype, copy=False)
+        gaps = np.diff(indices[starts], prepend=0)
+        return b''.join((struct.pack('<Q', len(starts)), gaps.astype('<u4').tobytes(), lengths.astype('<u4').tobytes(),
+                         values.tobytes()))
+
+    @staticmethod
+    def decode(payload: bytes, cells: np.ndarray) -> None:
+        """
+        Applies an encoded delta to cells.
+
+        :param payload: delta created by ``encode``.
+        :param cells: cells of the previous record, updated in place.
+        """
+        runs, = struct.unpack_from('<Q', payload)
+        starts = np.cumsum(np.frombuffer(payload, dtype='<u4', count=runs, offset=8), dtype=np.intp)
+        lengths = np.frombuffer(payload, dtype='<u4', count=runs, offset=8 + 4 * runs).astype(np.intp)
+        values = np.frombuffer(payload, dtype=cells.dtype, offset=8 + 8 * runs)
+        # flat index of every changed cell: the start of its run plus its position within the run
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        cells.reshape(-1)[offsets + np.arange(len(values))] = values
+
+    def close(self) -> None:
+        """
+        Appends the index of keyframes and closes the file.
+        """
+        if self.file.closed:
+            return
+        offset = self.file.tell()
+        for entry in self.keyframes:
+            self.file.write(struct.pack(index_entry_format, *entry))
+        self.file.write(struct.pack(index_trailer_format, offset, len(self.keyframes), index_magic))
+        self.file.close()
+
+    def __enter__(self) -> 'DeltaLog':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class DeltaLogReader:
+    """
+    Reader of logs written by ``DeltaLog``. Seeking starts at the nearest keyframe at or before the requested
+    generation, found through the index at the end of the file, or by skipping over the record headers of a log that
+    was not closed.
+    """
+
+    def __init__(self, path: str):
+        """
+        Constructor of the reader, which reads the header and the keyframe index.
+
+        :param path: file written by ``DeltaLog``.
+        """
+        self.path = path
+        self.file = open(path, 'rb')
+        fields = struct.unpack(log_header_format, self.file.read(struct.calcsize(log_header_format)))
+        if fields[0] != log_magic:
+            raise ValueError("'{}' is not a delta log".format(path))
+        self.width, self.height, self.keyframe_every = fields[2:5]
+        self.dtype = np.dtype(fields[5].rstrip(b'\0').decode())
+        self.rules = fields[6].rstrip(b'\0').decode()
+        self.start = self.file.tell()
+        self.end, self.keyframes = self.__read_index__()
+        self.keyframe_generations = [generation for generation, _ in self.keyframes]
+
+    def __read_index__(self) -> Tuple[int, List[Tuple[int, int]]]:
+        """Returns the end of the records and the keyframes, from the index or else by scanning the records"""
+        size = self.file.seek(0, 2)
+        trailer_size = struct.calcsize(index_trailer_format)
+        if size - self.start >= trailer_size:
+            self.file.seek(size - trailer_size)
+            offset, count, marker = struct.unpack(index_trailer_format, self.file.read(trailer_size))
+            entry_size = struct.calcsize(index_entry_format)
+            if marker == index_magic and offset + count * entry_size + trailer_size == size:
+                self.file.seek(offset)
+                data = self.file.read(count * entry_size)
+                return offset, [struct.unpack_from(index_entry_format, data, i * entry_size) for i in range(count)]
+        keyframes = []
+        for kind, generation, offset, _ in self.__headers__(self.start, size):
+            if kind == keyframe:
+                keyframes.append((generation, offset))
+        return size, keyframes
+
+    def __headers__(self, offset: int, end: int) -> Iterator[Tuple[int, int, int, int]]:
+        """Yields kind, generation, offset and payload size of the records from ``offset`` on, without their payloads"""
+        header_size = struct.calcsize(record_format)
+        while offset + header_size <= end:
+            self.file.seek(offset)
+            kind, generation, size = struct.unpack(record_format, self.file.read(header_size))
+            if offset + header_size + size > end:
+                return
+            yield kind, generation, offset, size
+            offset += header_size + size
+
+    def records(self, offset: int = None) -> Iterator[Tuple[int, np.ndarray]]:
+        """
+        Yields the logged generations from a keyframe on. The cells are updated in place, copy them to keep them.
+
+        :param offset: (optional) offset of the keyframe to start at, the first record by default.
+        :return: iterator of ``(generation, cells)`` tuples.
+        """
+        cells = np.zeros((self.height, self.width), dtype=self.dtype)
+        header_size = struct.calcsize(record_format)
+        for kind, generation, offset, size in self.__headers__(self.start if offset is None else offset, self.end):
+            self.file.seek(offset + header_size)
+            payload = zlib.decompress(self.file.read(size))
+            if kind == keyframe:
+                cells[...] = np.frombuffer(payload, dtype=self.dtype).reshape(cells.shape)
+            else:
+                DeltaLog.decode(payload, cells)
+            yield generation, cells
+
+    def __iter__(self) -> Iterator[Tuple[int, np.ndarray]]:
+        return self.records()
+
+    def seek(self, generation: int) -> np.ndarray:
+        """
+        Returns the cells of a logged generation, replaying only the deltas after the nearest keyframe.
+
+        :param generation: number of the generation.
+        :return: array with the cells of that generation.
+        """
+        index = bisect_right(self.keyframe_generations, generation) - 1
+        if index < 0:
+            raise KeyError("generation {} precedes the log".format(generation))
+        for logged, cells in self.records(self.keyframes[index][1]):
+            if logged == generation:
+                return cells.copy()
+            if logged > generation:
+                break
+        raise KeyError("generation {} is not in the log".format(generation))
+
+    def get_generations(self) -> List[int]:
+        """
+        Returns the numbers of all logged generations, reading only the record headers.
+
+        :return: ``List`` of generations.
+        """
+        return [generation for _, generation, _, _ in self.__headers__(self.start, self.end)]
+
+    def close(self) -> None:
+        """
+        Closes the file.
+        """
+        self.file.close()
+
+    def __enter__(self) -> 'DeltaLogReader':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
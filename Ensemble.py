@@ -0,0 +1,121 @@
+import numpy as np
+from typing import List, Sequence, Union
+from Rule import Rule
+
+
+class Ensemble:
+    """
+    Batch of independent toroidal Game of Life worlds of equal size, stacked into one 3D array ``cells`` indexed
+    ``[member, row, column]`` and advanced together in a single vectorized step. Every member can have its own fill
+    density and rule string, mixing any of the notations compiled by ``Rule``.
+    """
+
+    def __init__(self, count: int, width: int, height: int = -1, fill_cells: Union[float, Sequence[float]] = 0.5,
+                 rules: Union[str, Sequence[str]] = 'B3/S23', start_age: int = 0, dtype=np.uint8):
+        """
+        Constructor of an ensemble of randomly filled worlds.
+
+        :param count: number of worlds.
+        :param width: integer representing the width of every world.
+        :param height: (optional) integer representing the height of every world, ``width`` when left implicit.
+        :param fill_cells: (optional) fraction of alive cells, either one value or one per world.
+        :param rules: (optional) rule string, either one for all worlds or one per world.
+        :param start_age: (optional) age given to living cells of worlds with decay of age rules.
+        :param dtype: (optional) integer type of the cells.
+        """
+        height = width if height == -1 else height
+        fill_cells = np.broadcast_to(np.asarray(fill_cells, dtype=float), (count,))
+        rules = [rules] * count if isinstance(rules, str) else list(rules)
+        if len(rules) != count:
+            raise ValueError("expected {} rule strings, got {}".format(count, len(rules)))
+
+        self.generation = 0
+        self.rules = rules
+        self.cells = (np.random.random_sample((count, height, width)) < fill_cells[:, None, None]).astype(dtype)
+        self.back = np.empty_like(self.cells)
+
+        compiled = [Rule.compile(r) for r in rules]
+        self.decay = np.array([rule.mode == 'decay of age' for rule in compiled])
+        self.max_age = np.array([rule.max_age for rule in compiled])
+        self.cells[self.decay] *= np.asarray(start_age, dtype=dtype)
+
+        # rule tables of all members stacked and flattened as in Rule.flat_table, with the offset of every member
+        rows = max(len(rule.table) for rule in compiled)
+        self.rows = rows
+        tables = np.zeros((count, 9, rows), dtype=dtype)
+        alive_tables = np.zeros((count, rows), dtype=np.uint8)
+        for member, rule in enumerate(compiled):
+            tables[member, :, :len(rule.table)] = rule.table.T
+            alive_tables[member, :len(rule.table)] = rule.alive_table
+        self.table = tables.ravel()
+        self.alive_table = alive_tables.ravel()
+        self.table_offsets = (np.arange(count) * 9 * rows)[:, None, None]
+        self.alive_offsets = (np.arange(count) * rows)[:, None, None]
+
+        self.padded = np.zeros((count, height+2, width+2), dtype=np.uint8)
+        self.counts = np.empty(self.cells.shape, dtype=np.intp)
+        self.alive = np.empty(self.cells.shape, dtype=np.uint8)
+
+    def update(self) -> np.ndarray:
+        """
+        Advances all worlds by one generation.
+
+        :return: population of every world in the new generation.
+        """
+        cells, out = self.cells, self.back
+        padded, counts = self.padded, self.counts
+
+        # living neighbours according to the rules of every member
+        padded[:, 1:-1, 1:-1] = self.__mark_alive__()
+        padded[:, 0, 1:-1] = padded[:, -2, 1:-1]
+        padded[:, -1, 1:-1] = padded[:, 1, 1:-1]
+        padded[:, :, 0] = padded[:, :, -2]
+        padded[:, :, -1] = padded[:, :, 1]
+        height, width = cells.shape[1:]
+        np.add(padded[:, :-2, :-2], padded[:, :-2, 1:-1], out=counts)
+        for dy, dx in ((0, 2), (1, 0), (1, 2), (2, 0), (2, 1), (2, 2)):
+            np.add(counts, padded[:, dy:dy+height, dx:dx+width], out=counts)
+
+        # index of (member, neighbours, state) into the stacked tables, as in Simulator.apply_rules
+        np.multiply(counts, self.rows, out=counts)
+        np.add(counts, cells, out=counts)
+        np.add(counts, self.table_offsets, out=counts)
+        np.take(self.table, counts, out=out, mode='clip')
+
+        self.cells, self.back = out, cells
+        self.generation += 1
+        return self.get_populations()
+
+    def run(self, generations: int) -> np.ndarray:
+        """
+        Advances all worlds by a number of generations, recording their populations.
+
+        :param generations: number of generations to advance.
+        :return: array of shape ``(generations, count)`` with the population of every world after every generation.
+        """
+        populations = np.empty((generations, len(self.cells)), dtype=np.int64)
+        for generation in range(generations):
+            populations[generation] = self.update()
+        return populations
+
+    def get_populations(self) -> np.ndarray:
+        """
+        Returns the number of living cells of every world, according to its rules: dying cells of Generations rules are
+        not counted.
+
+        :return: array with one population per world.
+        """
+        return np.count_nonzero(self.__mark_alive__(), axis=(1, 2))
+
+    def __mark_alive__(self) -> np.ndarray:
+        """Marks the cells that count as living under the rules of their member in ``alive``, and returns it"""
+        np.add(self.cells, self.alive_offsets, out=self.counts)
+        return np.take(self.alive_table, self.counts, out=self.alive, mode='clip')
+
+    def get_rules(self) -> List[str]:
+        """
+        Returns the rule strings of the worlds.
+
+        :return: ``List`` with one rule string per world.
+        """
+        return self.rules
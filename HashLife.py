@@ -0,0 +1,330 @@
+import numpy as np
+from collections import OrderedDict
+from typing import List
+
+
+class Node:
+    """
+    Canonical quadtree node of a ``HashLife`` universe. A node at ``level`` covers a square of ``2**level`` cells; level 0
+    nodes are single cells. Nodes are only created through ``HashLife.join``, so equal squares share one node.
+    """
+    __slots__ = ('level', 'nw', 'ne', 'sw', 'se', 'population', 'cells')
+
+    def __init__(self, level: int, nw=None, ne=None, sw=None, se=None, population: int = 0):
+        self.level = level
+        self.nw, self.ne, self.sw, self.se = nw, ne, sw, se
+        self.population = population
+        # dense copy of small nodes, filled in on demand when converting to an array
+        self.cells = None
+
+
+class HashLife:
+    """
+    HashLife universe for standard (``B/S``) rules, following Gosper's algorithm: the pattern is stored as a canonicalised
+    quadtree and the future of every node is memoized, which allows jumping ahead by powers of two generations.
+    Read https://en.wikipedia.org/wiki/Hashlife for an introduction.
+
+    The universe is an unbounded plane, unlike the toroidal ``World``: patterns leaving the window they were imported from
+    keep evolving, but are cut off when converting back to an array.
+    """
+
+    def __init__(self, birth_neighbours: List[int], survival_neighbours: List[int], max_nodes: int = 1000000,
+                 max_results: int = 1000000):
+        """
+        Constructor of an empty HashLife universe.
+
+        :param birth_neighbours: neighbour counts that bring a dead cell to life.
+        :param survival_neighbours: neighbour counts that keep a living cell alive.
+        :param max_nodes: (optional) node count above which unreachable nodes are collected between jumps.
+        :param max_results: (optional) size of the least recently used cache of memoized results.
+        """
+        if 0 in birth_neighbours:
+            raise ValueError("HashLife can not simulate rules with birth on 0 neighbours")
+        self.max_nodes = max_nodes
+        self.max_results = max_results
+        self.nodes = {}
+        self.results = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.leaves = [Node(0, population=0), Node(0, population=1)]
+        self.empties = [self.leaves[0]]
+        self.successors = self.__base_table__(birth_neighbours, survival_neighbours)
+        self.root = self.empty(3)
+        self.x, self.y = 0, 0
+        self.generation = 0
+
+    def __base_table__(self, birth_neighbours: List[int], survival_neighbours: List[int]) -> List[int]:
+        """Calculates, for every 4x4 block encoded as 16 bits, the next state of its central 2x2 cells as 4 bits"""
+        birth, survival = np.zeros(9, dtype=bool), np.zeros(9, dtype=bool)
+        birth[[n for n in birth_neighbours if n <= 8]] = True
+        survival[[n for n in survival_neighbours if n <= 8]] = True
+
+        blocks = (np.arange(1 << 16)[:, None] >> np.arange(16)) & 1
+        blocks = blocks.reshape(-1, 4, 4)
+        result = np.zeros(1 << 16, dtype=np.intp)
+        for bit, (y, x) in enumerate(((1, 1), (1, 2), (2, 1), (2, 2))):
+            counts = blocks[:, y-1:y+2, x-1:x+2].sum(axis=(1, 2)) - blocks[:, y, x]
+            alive = np.where(blocks[:, y, x] == 1, survival[counts], birth[counts])
+            result |= alive.astype(np.intp) << bit
+        return result.tolist()
+
+    def join(self, nw: Node, ne: Node, sw: Node, se: Node) -> Node:
+        """
+        Returns the canonical node made of four equally sized quadrants.
+
+        :return: node one level above its quadrants.
+        """
+        key = (nw, ne, sw, se)
+        node = self.nodes.get(key)
+        if node is None:
+            node = Node(nw.level+1, nw, ne, sw, se, nw.population + ne.population + sw.population + se.population)
+            self.nodes[key] = node
+        return node
+
+    def empty(self, level: int) -> Node:
+        """
+        Returns the canonical empty node of the given level.
+
+        :param level: level of the node.
+        :return: node without living cells.
+        """
+        while len(self.empties) <= level:
+            e = self.empties[-1]
+            self.empties.append(self.join(e, e, e, e))
+        return self.empties[level]
+
+    def center(self, node: Node) -> Node:
+        """Returns the central square of ``node``, one level lower"""
+        return self.join(node.nw.se, node.ne.sw, node.sw.ne, node.se.nw)
+
+    def expand(self) -> None:
+        """Doubles the size of the root, keeping the pattern in its centre"""
+        root = self.root
+        e = self.empty(root.level-1)
+        self.root = self.join(self.join(e, e, e, root.nw), self.join(e, e, root.ne, e),
+                              self.join(e, root.sw, e, e), self.join(root.se, e, e, e))
+        self.x -= 1 << (root.level-1)
+        self.y -= 1 << (root.level-1)
+
+    def crop(self) -> None:
+        """Halves the size of the root for as long as the whole pattern fits in its centre"""
+        while self.root.level > 3 and self.center(self.root).population == self.root.population:
+            self.x += 1 << (self.root.level-2)
+            self.y += 1 << (self.root.level-2)
+            self.root = self.center(self.root)
+
+    def successor(self, node: Node, j: int) -> Node:
+        """
+        Returns the central square of ``node``, advanced ``2**j`` generations.
+
+        :param node: node of at least level 2.
+        :param j: log2 of the number of generations, at most ``node.level - 2``.
+        :return: node one level below ``node``.
+        """
+        if node.population == 0:
+            return node.nw
+        key = (node, j)
+        result = self.results.get(key)
+        if result is not None:
+            self.hits += 1
+            self.results.move_to_end(key)
+            return result
+        self.misses += 1
+
+        if node.level == 2:
+            result = self.__base_successor__(node)
+        else:
+            a, b, c, d = node.nw, node.ne, node.sw, node.se
+            quadrants = [
+                a, self.join(a.ne, b.nw, a.se, b.sw), b,
+                self.join(a.sw, a.se, c.nw, c.ne), self.join(a.se, b.sw, c.ne, d.nw), self.join(b.sw, b.se, d.nw, d.ne),
+                c, self.join(c.ne, d.nw, c.se, d.sw), d
+            ]
+            if j == node.level-2:
+                # full speed: two half jumps of 2**(level-3) generations
+                r = [self.successor(q, j-1) for q in quadrants]
+                j -= 1
+            else:
+                r = [self.center(q) for q in quadrants]
+            result = self.join(
+                self.successor(self.join(r[0], r[1], r[3], r[4]), j),
+                self.successor(self.join(r[1], r[2], r[4], r[5]), j),
+                self.successor(self.join(r[3], r[4], r[6], r[7]), j),
+                self.successor(self.join(r[4], r[5], r[7], r[8]), j)
+            )
+
+        self.results[key] = result
+        if len(self.results) > self.max_results:
+            self.results.popitem(last=False)
+        return result
+
+    def __base_successor__(self, node: Node) -> Node:
+        """Advances the central 2x2 cells of a 4x4 node by one generation using the precalculated table"""
+        index = 0
+        for quadrant, offset in ((node.nw, 0), (node.ne, 2), (node.sw, 8), (node.se, 10)):
+            index |= (quadrant.nw.population << offset) | (quadrant.ne.population << (offset+1)) \
+                | (quadrant.sw.population << (offset+4)) | (quadrant.se.population << (offset+5))
+        bits = self.successors[index]
+        leaves = self.leaves
+        return self.join(leaves[bits & 1], leaves[(bits >> 1) & 1], leaves[(bits >> 2) & 1], leaves[(bits >> 3) & 1])
+
+    def advance(self, generations: int) -> None:
+        """
+        Advances the universe by ``generations``, jumping by the powers of two making up that number.
+
+        :param generations: number of generations to advance.
+        """
+        j = 0
+        while generations > 0:
+            if generations & 1:
+                self.__jump__(j)
+            generations >>= 1
+            j += 1
+
+    def __jump__(self, j: int) -> None:
+        """Advances the universe by ``2**j`` generations"""
+        if len(self.nodes) > self.max_nodes:
+            self.collect()
+        self.crop()
+        while self.root.level < j+2 or self.center(self.root).population != self.root.population:
+            self.expand()
+        # one extra level leaves room for the pattern to grow at the speed of light
+        self.expand()
+        self.x += 1 << (self.root.level-2)
+        self.y += 1 << (self.root.level-2)
+        self.root = self.successor(self.root, j)
+        self.generation += 1 << j
+
+    def collect(self) -> None:
+        """
+        Forgets all nodes that are not part of the current pattern, together with all memoized results.
+        """
+        self.nodes = {}
+        self.results = OrderedDict()
+        self.empties = [self.leaves[0]]
+        seen = set()
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if node.level == 0 or node in seen:
+                continue
+            seen.add(node)
+            self.nodes[(node.nw, node.ne, node.sw, node.se)] = node
+            stack.extend((node.nw, node.ne, node.sw, node.se))
+
+    def from_array(self, cells: np.ndarray, x: int = 0, y: int = 0) -> None:
+        """
+        Replaces the pattern by the non-zero cells of an array, building the quadtree level by level.
+
+        :param cells: 2D array of cell states, indexed ``[row, column]``.
+        :param x: (optional) column of the universe where the first array column is placed.
+        :param y: (optional) row of the universe where the first array row is placed.
+        """
+        height, width = cells.shape
+        level = max(3, int(np.ceil(np.log2(max(height, width, 1)))))
+        ids = np.zeros((1 << level, 1 << level), dtype=np.intp)
+        ids[:height, :width] = cells != 0
+        nodes = self.leaves
+        while ids.shape[0] > 1:
+            quads = np.stack((ids[0::2, 0::2], ids[0::2, 1::2], ids[1::2, 0::2], ids[1::2, 1::2]), axis=-1)
+            unique, inverse = np.unique(quads.reshape(-1, 4), axis=0, return_inverse=True)
+            nodes = [self.join(nodes[a], nodes[b], nodes[c], nodes[d]) for a, b, c, d in unique.tolist()]
+            ids = inverse.reshape(ids.shape[0] // 2, ids.shape[1] // 2)
+        self.root = nodes[ids[0, 0]]
+        self.x, self.y = x, y
+
+    def to_array(self, x: int, y: int, width: int, height: int, out: np.ndarray = None) -> np.ndarray:
+        """
+        Returns the cells inside a window of the universe as an array, ``1`` for living cells.
+
+        :param x: leftmost column of the window.
+        :param y: top row of the window.
+        :param width: width of the window.
+        :param height: height of the window.
+        :param out: (optional) array of shape ``(height, width)`` to write the cells into.
+        :return: 2D array indexed ``[row, column]``.
+        """
+        if out is None:
+            out = np.zeros((height, width), dtype=np.int64)
+        else:
+            out[...] = 0
+        stack = [(self.root, self.x - x, self.y - y)]
+        while stack:
+            node, left, top = stack.pop()
+            size = 1 << node.level
+            if node.population == 0 or left >= width or top >= height or left + size <= 0 or top + size <= 0:
+                continue
+            if node.level <= 3:
+                cells = self.__dense__(node)
+                x0, y0 = max(left, 0), max(top, 0)
+                x1, y1 = min(left + size, width), min(top + size, height)
+                out[y0:y1, x0:x1] = cells[y0-top:y1-top, x0-left:x1-left]
+                continue
+            half = size >> 1
+            stack.extend(((node.nw, left, top), (node.ne, left + half, top),
+                          (node.sw, left, top + half), (node.se, left + half, top + half)))
+        return out
+
+    def get_population_in(self, x: int, y: int, width: int, height: int) -> int:
+        """
+        Returns the number of living cells inside a window of the universe, only descending into the nodes that the edge
+        of the window cuts through.
+
+        :param x: leftmost column of the window.
+        :param y: top row of the window.
+        :param width: width of the window.
+        :param height: height of the window.
+        :return: population of the window.
+        """
+        population = 0
+        stack = [(self.root, self.x - x, self.y - y)]
+        while stack:
+            node, left, top = stack.pop()
+            size = 1 << node.level
+            if node.population == 0 or left >= width or top >= height or left + size <= 0 or top + size <= 0:
+                continue
+            if left >= 0 and top >= 0 and left + size <= width and top + size <= height:
+                population += node.population
+            elif node.level <= 3:
+                cells = self.__dense__(node)
+                population += int(cells[max(-top, 0):height-top, max(-left, 0):width-left].sum())
+            else:
+                half = size >> 1
+                stack.extend(((node.nw, left, top), (node.ne, left + half, top),
+                              (node.sw, left, top + half), (node.se, left + half, top + half)))
+        return population
+
+    def __dense__(self, node: Node) -> np.ndarray:
+        """Returns the cells of a small node as an array, memoized on the node"""
+        if node.cells is None:
+            if node.level == 0:
+                node.cells = np.full((1, 1), node.population, dtype=np.uint8)
+            else:
+                node.cells = np.block([[self.__dense__(node.nw), self.__dense__(node.ne)],
+                                       [self.__dense__(node.sw), self.__dense__(node.se)]])
+        return node.cells
+
+    def get_population(self) -> int:
+        """
+        Returns the number of living cells in the universe.
+
+        :return: population.
+        """
+        return self.root.population
+
+    def get_node_count(self) -> int:
+        """
+        Returns the number of canonical nodes currently stored.
+
+        :return: node count.
+        """
+        return len(self.nodes)
+
+    def get_hit_rate(self) -> float:
+        """
+        Returns the fraction of ``successor`` lookups answered from the memoized results.
+
+        :return: hit rate between 0 and 1.
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
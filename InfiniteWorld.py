@@ -0,0 +1,252 @@
+import numpy as np
+from typing import Callable, Dict, List, Tuple
+from World import World, neighbour_offsets
+
+
+class InfiniteWorld(World):
+    """
+    ``World`` on an unbounded plane instead of a torus, for patterns that grow without bound. The plane is divided into
+    square tiles of ``tile_size`` cells, of which only those holding or approached by non-empty cells are allocated, in
+    a ``dict`` keyed by tile coordinates ``(x // tile_size, y // tile_size)``. Memory use therefore follows the
+    population rather than the area the pattern spans.
+
+    ``get``, ``set`` and ``get_neighbours`` take any coordinates, negative ones included. ``world`` copies the allocated
+    tiles into a new array covering their bounding box, whose top left cell is at ``origin``; ``width`` and ``height``
+    are the size of that box. The ``'infinite'`` engine of ``Simulator`` steps only the allocated tiles.
+    """
+
+    # generations an empty tile stays allocated before it is freed, so tiles are not freed and allocated again as
+    # oscillators and passing spaceships leave and re-enter them
+    free_after = 8
+
+    def __init__(self, width: int, height: int = -1, fill_cells: float = 0.5, dtype=np.uint8, tile_size: int = 64):
+        """
+        Constructor of InfiniteWorld datatype, with random cells in the rectangle from ``(0, 0)`` to ``(width, height)``.
+
+        :param width: integer representing the width of the randomly filled rectangle.
+        :param height: (optional) integer representing the height of the rectangle. If left implicit, the value of ``width`` is used to create a square.
+        :param fill_cells: (optional) fraction of the cells of the rectangle that are alive.
+        :param dtype: (optional) integer type of the cells.
+        :param tile_size: (optional) width and height of the tiles.
+        """
+        self.tile_size = tile_size
+        self.dtype = np.dtype(dtype)
+        self.tiles = {}
+        self.back = {}
+        # generations every allocated tile has been empty
+        self.idle = {}
+        self.edits = []
+        height = width if height == -1 else height
+        self.world = (np.random.random_sample((height, width)) < fill_cells).astype(self.dtype)
+
+    def bounds(self) -> Tuple[int, int, int, int]:
+        """
+        Returns the rectangle covered by the allocated tiles.
+
+        :return: tuple of left, top, right and bottom, the latter two exclusive; all 0 when no tile is allocated.
+        """
+        if not self.tiles:
+            return 0, 0, 0, 0
+        xs, ys = zip(*self.tiles)
+        size = self.tile_size
+        return min(xs) * size, min(ys) * size, (max(xs) + 1) * size, (max(ys) + 1) * size
+
+    @property
+    def origin(self) -> Tuple[int, int]:
+        """Location of the top left cell of ``world``"""
+        return self.bounds()[:2]
+
+    @property
+    def width(self) -> int:
+        """Width of the bounding box of the allocated tiles"""
+        left, _, right, _ = self.bounds()
+        return right - left
+
+    @property
+    def height(self) -> int:
+        """Height of the bounding box of the allocated tiles"""
+        _, top, _, bottom = self.bounds()
+        return bottom - top
+
+    @property
+    def world(self) -> np.ndarray:
+        """Copy of the cells in the bounding box of the allocated tiles, indexed ``[row, column]`` from ``origin``"""
+        left, top, right, bottom = self.bounds()
+        cells = np.zeros((bottom - top, right - left), dtype=self.dtype)
+        size = self.tile_size
+        for (x, y), tile in self.tiles.items():
+            cells[y*size-top:(y+1)*size-top, x*size-left:(x+1)*size-left] = tile
+        return cells
+
+    @world.setter
+    def world(self, cells: np.ndarray) -> None:
+        # the cells replace all tiles, keeping the current origin so that cells taken from ``world`` go back in place
+        left, top = self.origin
+        self.clear()
+        self.place(cells, left, top)
+
+    def clear(self) -> None:
+        """
+        Frees all tiles, leaving an empty plane.
+        """
+        self.tiles, self.back, self.idle = {}, {}, {}
+
+    def get(self, x: int, y: int) -> int:
+        """
+        Returns the value on location ``(x, y)``, 0 for cells of tiles that are not allocated.
+
+        :param x: column-value of the location.
+        :param y: row-value of the location.
+        :return: value of location ``(x, y)``.
+        """
+        size = self.tile_size
+        tile = self.tiles.get((x // size, y // size))
+        return 0 if tile is None else tile.item(y % size, x % size)
+
+    def set(self, x: int, y: int, value: int = 1) -> None:
+        """
+        Sets the state of ``(x, y)`` to the given value, allocating its tile and the tiles of its neighbours when needed.
+
+        :param x: column-value of the location.
+        :param y: row-value of the location.
+        :param value: (optional) value to set location ``(x, y)``; uses ``1`` otherwise.
+        """
+        size = self.tile_size
+        key = (x // size, y // size)
+        tile = self.tiles.get(key)
+        if tile is None and not value:
+            return
+        if value:
+            for dx, dy in neighbour_offsets:
+                self.__allocate__(((x + dx) // size, (y + dy) // size))
+            tile = self.__allocate__(key)
+        tile[y % size, x % size] = value
+        self.edits.append((x, y, x + 1, y + 1))
+
+    def place(self, pattern, x: int, y: int, wrap: bool = True) -> None:
+        """
+        Copies the cells of a pattern into the plane with its top left corner at ``(x, y)``, one tile at a time. Tiles
+        are only allocated for the parts of the pattern holding non-empty cells.
+
+        :param pattern: ``Pattern`` or 2D array of cell states.
+        :param x: column-value of the top left corner.
+        :param y: row-value of the top left corner.
+        :param wrap: (optional) unused, as the plane has no edges.
+        """
+        source = np.asarray(getattr(pattern, 'cells', pattern))
+        height, width = source.shape
+        size = self.tile_size
+        keys, blocks = [], []
+        for ty in range(y // size, -(-(y + height) // size)):
+            for tx in range(x // size, -(-(x + width) // size)):
+                # the part of the tile covered by the pattern, in tile and in pattern coordinates
+                top, bottom = max(ty * size, y), min((ty + 1) * size, y + height)
+                left, right = max(tx * size, x), min((tx + 1) * size, x + width)
+                block = source[top-y:bottom-y, left-x:right-x]
+                tile = self.tiles.get((tx, ty))
+                if tile is None:
+                    if not block.any():
+                        continue
+                    tile = self.__allocate__((tx, ty))
+                target = tile[top-ty*size:bottom-ty*size, left-tx*size:right-tx*size]
+                self.__record_changes__(target != block, left, top)
+                target[...] = block
+                keys.append((tx, ty))
+                blocks.append(tile)
+        if keys:
+            self.__grow__(keys, np.stack(blocks))
+
+    def get_neighbours(self, x: int, y: int) -> List[int]:
+        """
+        Returns a list of values for the 8 neighbours of location ``(x, y)``.
+
+        :param x: column-vale of the location.
+        :param y: row-value of the location.
+        :return: ``List`` of integers representing the values of the neighbours of ``(x, y)``.
+        """
+        return [self.get(x + dx, y + dy) for dx, dy in neighbour_offsets]
+
+    def __allocate__(self, key: Tuple[int, int]) -> np.ndarray:
+        """Returns the tile at ``key``, allocating an empty one when needed; either way it is no longer idle"""
+        tile = self.tiles.get(key)
+        if tile is None:
+            tile = self.tiles[key] = np.zeros((self.tile_size, self.tile_size), dtype=self.dtype)
+        self.idle[key] = 0
+        return tile
+
+    def __grow__(self, keys: List[Tuple[int, int]], cells: np.ndarray) -> None:
+        """Allocates the neighbouring tiles on every side where the tiles ``keys``, stacked in ``cells``, have
+        non-empty cells on their edge, as those cells may cause births in the neighbouring tiles"""
+        edges = np.stack([cells[:, :, 0].any(axis=1), cells[:, 0, :].any(axis=1),
+                          cells[:, :, -1].any(axis=1), cells[:, -1, :].any(axis=1)], axis=1)
+        for index in np.flatnonzero(edges.any(axis=1)).tolist():
+            (x, y), (left, top, right, bottom) = keys[index], edges[index].tolist()
+            for dx, dy in neighbour_offsets:
+                if (dx < 0 and not left) or (dx > 0 and not right) or (dy < 0 and not top) or (dy > 0 and not bottom):
+                    continue
+                self.__allocate__((x + dx, y + dy))
+
+    def next_generation(self, step: Callable[[np.ndarray], np.ndarray]) -> None:
+        """
+        Calculates the next generation of all allocated tiles into the back buffer, to be made current by ``swap``.
+        Every tile is padded with a one-cell border taken from its neighbours, empty where they are not allocated, and
+        all padded tiles are stepped at once. Afterwards the tiles that non-empty cells approach are allocated and the
+        tiles that stayed empty for ``free_after`` generations are freed.
+
+        :param step: function mapping an array of padded tiles of shape ``(n, tile_size + 2, tile_size + 2)`` to the
+            next generation of their interiors, of shape ``(n, tile_size, tile_size)``.
+        """
+        size = self.tile_size
+        keys = list(self.tiles)
+        padded = np.zeros((len(keys), size + 2, size + 2), dtype=self.dtype)
+        # rows or columns of a neighbour in direction -1, 0 and 1, and where they go in the padded tile
+        source = {-1: slice(size-1, size), 0: slice(0, size), 1: slice(0, 1)}
+        target = {-1: slice(0, 1), 0: slice(1, size+1), 1: slice(size+1, size+2)}
+        for index, (x, y) in enumerate(keys):
+            padded[index, 1:-1, 1:-1] = self.tiles[(x, y)]
+            for dx, dy in neighbour_offsets:
+                neighbour = self.tiles.get((x + dx, y + dy))
+                if neighbour is not None:
+                    padded[index, target[dy], target[dx]] = neighbour[source[dy], source[dx]]
+        cells = step(padded) if keys else np.empty((0, size, size), dtype=self.dtype)
+
+        # the tiles of the next generation are views of one array, which is freed once none of them is in use
+        front, self.tiles = self.tiles, dict(zip(keys, cells))
+        occupied = cells.any(axis=(1, 2)).tolist()
+        for key, filled in zip(keys, occupied):
+            self.idle[key] = 0 if filled else self.idle[key] + 1
+        self.__grow__(keys, cells)
+        for key in keys:
+            if self.idle[key] > InfiniteWorld.free_after:
+                del self.tiles[key], self.idle[key]
+        self.tiles, self.back = front, self.tiles
+
+    def back_buffer(self) -> Dict[Tuple[int, int], np.ndarray]:
+        """
+        Returns the tiles of the back buffer, written by ``next_generation``.
+
+        :return: ``dict`` of tiles by tile coordinates.
+        """
+        self.edits = []
+        return self.back
+
+    def swap(self, generation: int = None) -> None:
+        """
+        Swaps the front and back buffer, making the generation written by ``next_generation`` the current one.
+
+        :param generation: (optional) number of the new generation, unused for worlds in memory.
+        """
+        self.tiles, self.back = self.back_buffer(), self.tiles
+
+    def stacks(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the tiles of the current and the previous generation stacked in the same order, with empty tiles where a
+        tile is only allocated in one of them.
+
+        :return: tuple of two arrays of shape ``(n, tile_size, tile_size)``.
+        """
+        keys = list(self.tiles.keys() | self.back.keys())
+        empty = np.zeros((self.tile_size, self.tile_size), dtype=self.dtype)
+        if not keys:
+            return empty[None][:0], empty[None][:0]
+        return np.stack([self.tiles.get(key, empty) for key in keys]), np.stack([self.back.get(key, empty) for key in keys])
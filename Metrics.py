@@ -0,0 +1,101 @@
+import numpy as np
+from collections import deque
+from typing import Callable, List, NamedTuple, Optional, Union
+
+
+class GenerationRecord(NamedTuple):
+    """
+    Metrics of one generation, passed to the observers of a ``Simulator``.
+    """
+    generation: int
+    # wall time of the update, and the parts of it spent counting neighbours and applying the rules; the parts are 0
+    # for engines that do not step through ``Simulator.next_generation`` or ``Simulator.step_rows``
+    seconds: float
+    counting: float
+    rules: float
+    # the fields below are only counted every few generations, see ``Simulator.add_observer``, and None otherwise
+    # living cells after the update, and how they came about
+    population: Optional[int]
+    births: Optional[int]
+    deaths: Optional[int]
+    survivals: Optional[int]
+    # cells whose state changed, and cells evaluated by the engine
+    changed: Optional[int]
+    active: Optional[int]
+    # number of cells of every age in decay of age mode, None in other modes
+    ages: Optional[np.ndarray]
+
+
+class FrameRecord(NamedTuple):
+    """
+    Metrics of one frame, passed to the observers of a ``Visualisation``.
+    """
+    generation: int
+    seconds: float
+
+
+Record = Union[GenerationRecord, FrameRecord]
+
+
+class Metrics:
+    """
+    Observer for ``Simulator.add_observer`` and ``Visualisation.add_observer`` that keeps the most recent records in
+    ring buffers and passes every record on to callbacks.
+    """
+
+    def __init__(self, capacity: int = 1024, callbacks: List[Callable[[Record], None]] = ()):
+        """
+        Constructor of the metrics.
+
+        :param capacity: (optional) number of generation and frame records kept, older ones are dropped.
+        :param callbacks: (optional) functions called with every record.
+        """
+        self.generations = deque(maxlen=capacity)
+        self.frames = deque(maxlen=capacity)
+        self.callbacks = list(callbacks)
+
+    def __call__(self, record: Record) -> None:
+        """
+        Stores a record and passes it on to the callbacks.
+
+        :param record: ``GenerationRecord`` or ``FrameRecord``.
+        """
+        if isinstance(record, FrameRecord):
+            self.frames.append(record)
+        else:
+            self.generations.append(record)
+        for callback in self.callbacks:
+            callback(record)
+
+    def get_generations(self) -> List[GenerationRecord]:
+        """
+        Returns the stored generation records, oldest first.
+
+        :return: ``List`` of records.
+        """
+        return list(self.generations)
+
+    def get_frames(self) -> List[FrameRecord]:
+        """
+        Returns the stored frame records, oldest first.
+
+        :return: ``List`` of records.
+        """
+        return list(self.frames)
+
+    def column(self, field: str) -> np.ndarray:
+        """
+        Returns one numeric field of all stored generation records, e.g. ``'seconds'`` or ``'population'``.
+
+        :param field: name of a field of ``GenerationRecord`` other than ``ages``.
+        :return: array with the field of every record, oldest first, NaN for records without cell counts.
+        """
+        values = [getattr(record, field) for record in self.generations]
+        return np.array([np.nan if value is None else value for value in values], dtype=float)
+
+    def clear(self) -> None:
+        """
+        Forgets all stored records.
+        """
+        self.generations.clear()
+        self.frames.clear()
@@ -0,0 +1,224 @@
+import numpy as np
+from typing import List
+from World import World
+
+
+class PackedWorld(World):
+    """
+    ``World`` storing one bit per cell, for huge worlds with standard (``B/S``) rules. Every row is packed into 64-bit
+    words, column ``x`` being bit ``x % 64`` of word ``x // 64``; the bits after the last column stay zero.
+
+    ``get``, ``set`` and ``get_neighbours`` work on the packed words. ``world`` unpacks the cells into a new ``uint8`` array,
+    so changes made to that array are lost unless it is assigned back to ``world``; ``region`` unpacks only the words of
+    a rectangle, which is all a viewport of a huge world needs.
+    """
+
+    def __init__(self, width: int, height: int = -1, fill_cells: float = 0.5):
+        """
+        Constructor of PackedWorld datatype.
+
+        :param width: integer representing the width of the world.
+        :param height: (optional) integer representing the height of the world. If left implicit, the value of ``width`` is used to create a square-shaped world.
+        :param fill_cells: (optional) fraction of cells that are alive.
+        """
+        self.width = width
+        self.height = height if height != -1 else width
+        self.words = -(-self.width // 64)
+        self.bits = np.zeros((self.height, self.words), dtype=np.uint64)
+        # filling in bands of rows keeps the memory needed for random numbers bounded
+        band = max(1, (1 << 22) // self.width)
+        for top in range(0, self.height, band):
+            rows = np.random.random_sample((min(band, self.height - top), self.width)) < fill_cells
+            self.bits[top:top+band] = PackedWorld.pack(rows)
+        self.back = np.zeros_like(self.bits)
+        self.edits = []
+
+    @property
+    def world(self) -> np.ndarray:
+        """Unpacked copy of the cells, indexed ``[row, column]``"""
+        return PackedWorld.unpack(self.bits, self.width)
+
+    @world.setter
+    def world(self, cells: np.ndarray) -> None:
+        self.height, self.width = cells.shape
+        self.words = -(-self.width // 64)
+        self.bits = PackedWorld.pack(cells != 0)
+        self.back = np.zeros_like(self.bits)
+
+    @staticmethod
+    def pack(cells: np.ndarray) -> np.ndarray:
+        """
+        Packs a 2D array into 64-bit words per row, non-zero cells becoming set bits.
+
+        :param cells: 2D array of cells.
+        :return: ``uint64`` array of shape ``(rows, ceil(columns / 64))``.
+        """
+        height, width = cells.shape
+        padded = np.zeros((height, -(-width // 64) * 64), dtype=bool)
+        padded[:, :width] = cells
+        return np.packbits(padded, axis=1, bitorder='little').view('<u8').astype(np.uint64, copy=False)
+
+    @staticmethod
+    def unpack(bits: np.ndarray, width: int) -> np.ndarray:
+        """
+        Unpacks 64-bit words per row into a 2D array of zeros and ones.
+
+        :param bits: ``uint64`` array of packed rows.
+        :param width: number of columns.
+        :return: ``uint8`` array of shape ``(rows, width)``.
+        """
+        packed = np.ascontiguousarray(bits, dtype='<u8').view(np.uint8)
+        return np.unpackbits(packed, axis=1, count=width, bitorder='little')
+
+    def region(self, left: int, top: int, right: int, bottom: int) -> np.ndarray:
+        """
+        Unpacks the cells of a rectangle, clipped to the world like a slice. Only the words holding its columns are
+        unpacked.
+
+        :param left: first column of the rectangle.
+        :param top: first row of the rectangle.
+        :param right: column after the last one.
+        :param bottom: row after the last one.
+        :return: ``uint8`` array of the cells, indexed ``[row, column]`` from the clipped top left corner.
+        """
+        left, top = max(0, left), max(0, top)
+        right, bottom = max(left, min(self.width, right)), max(top, min(self.height, bottom))
+        if left == right:
+            return np.zeros((bottom - top, 0), dtype=np.uint8)
+        first = left >> 6
+        cells = PackedWorld.unpack(self.bits[top:bottom, first:((right-1) >> 6) + 1], right - first * 64)
+        return cells[:, left - first * 64:]
+
+    def copy(self) -> 'PackedWorld':
+        """
+        Returns a copy of the world holding a copy of its packed bits, 64 times smaller than a copy of its cells.
+
+        :return: ``PackedWorld`` with the same cells, without pending edits.
+        """
+        world = PackedWorld.__new__(PackedWorld)
+        world.height, world.width, world.words = self.height, self.width, self.words
+        world.bits = self.bits.copy()
+        world.back = np.zeros_like(world.bits)
+        world.edits = []
+        return world
+
+    def get(self, x: int, y: int) -> int:
+        """
+        Returns the value on location ``(x, y)`` in the world.
+
+        :param x: column-value of the location.
+        :param y: row-value of the location.
+        :return: value of location ``(x, y)`` in World, ``1`` for alive and ``0`` for dead.
+        """
+        if x < 0 or y < 0 or x >= self.width or y >= self.height:
+            return -1
+        return int(self.bits[y, x >> 6] >> np.uint64(x & 63)) & 1
+
+    def set(self, x: int, y: int, value: int = 1) -> None:
+        """
+        Sets the state of ``(x, y)`` to the given value; every non-zero value is stored as ``1``.
+
+        :param x: column-value of the location.
+        :param y: row-value of the location.
+        :param value: (optional) value to set location ``(x, y)``; uses ``1`` otherwise.
+        """
+        if x < 0 or y < 0 or x >= self.width or y >= self.height:
+            return
+        bit = np.uint64(1 << (x & 63))
+        if value:
+            self.bits[y, x >> 6] |= bit
+        else:
+            self.bits[y, x >> 6] &= ~bit
+        self.edits.append((x, y, x + 1, y + 1))
+
+    def get_neighbours(self, x: int, y: int) -> List[int]:
+        """
+        Returns a list of values for the 8 neighbours of location ``(x, y)``.
+
+        :param x: column-vale of the location.
+        :param y: row-value of the location.
+        :return: ``List`` of integers representing the values of the neighbours of ``(x, y)``.
+        """
+        return [self.get(nx % self.width, ny % self.height)
+                for nx in range(x-1, x+2) for ny in range(y-1, y+2) if nx != x or ny != y]
+
+    def back_buffer(self) -> np.ndarray:
+        """
+        Returns the packed back buffer, which receives the next generation while ``bits`` is being read.
+
+        :return: ``uint64`` array with the same shape as ``bits``.
+        """
+        if self.back.shape != self.bits.shape or self.back is self.bits:
+            self.back = np.zeros_like(self.bits)
+        return self.back
+
+    def swap(self, generation: int = None) -> None:
+        """
+        Swaps the front and back buffer, making the generation written into ``back_buffer()`` the current one.
+
+        :param generation: (optional) number of the new generation, unused for worlds in memory.
+        """
+        self.bits, self.back = self.back_buffer(), self.bits
+
+    def __last_word_mask__(self) -> np.uint64:
+        """Returns the mask of the bits of the last word in a row that hold cells"""
+        used = self.width - (self.words-1) * 64
+        return np.uint64((1 << used) - 1)
+
+    def __west__(self, bits: np.ndarray) -> np.ndarray:
+        """Returns words whose bit ``x`` holds cell ``x-1``, wrapping the last column around to the first"""
+        shifted = bits << np.uint64(1)
+        shifted[:, 1:] |= bits[:, :-1] >> np.uint64(63)
+        shifted[:, 0] |= (bits[:, -1] >> np.uint64((self.width-1) & 63)) & np.uint64(1)
+        shifted[:, -1] &= self.__last_word_mask__()
+        return shifted
+
+    def __east__(self, bits: np.ndarray) -> np.ndarray:
+        """Returns words whose bit ``x`` holds cell ``x+1``, wrapping the first column around to the last"""
+        shifted = bits >> np.uint64(1)
+        shifted[:, :-1] |= bits[:, 1:] << np.uint64(63)
+        shifted[:, -1] |= (bits[:, 0] & np.uint64(1)) << np.uint64((self.width-1) & 63)
+        return shifted
+
+    def next_generation(self, birth_neighbours: List[int], survival_neighbours: List[int], out: np.ndarray = None) -> np.ndarray:
+        """
+        Calculates the next generation directly on the packed words. The 8 neighbour words of every word are added
+        bit-parallel into a 4-bit counter spread over 4 words, which is then compared against the rules.
+
+        :param birth_neighbours: neighbour counts that bring a dead cell to life.
+        :param survival_neighbours: neighbour counts that keep a living cell alive.
+        :param out: (optional) array receiving the packed next generation.
+        :return: packed next generation.
+        """
+        bits = self.bits
+        west, east = self.__west__(bits), self.__east__(bits)
+        neighbours = (west, east)
+        neighbours += tuple(np.roll(words, shift, axis=0) for words in (bits, west, east) for shift in (1, -1))
+
+        counter = [np.zeros_like(bits) for _ in range(4)]
+        for words in neighbours:
+            carry = words
+            for plane in counter[:3]:
+                next_carry = plane & carry
+                plane ^= carry
+                carry = next_carry
+            counter[3] |= carry
+
+        if out is None:
+            out = np.empty_like(bits)
+        out[...] = 0
+        dead = ~bits
+        for count in range(9):
+            birth, survival = count in birth_neighbours, count in survival_neighbours
+            if not birth and not survival:
+                continue
+            matches = ~np.zeros_like(bits)
+            for bit, plane in enumerate(counter):
+                matches &= plane if count >> bit & 1 else ~plane
+            if not birth:
+                matches &= bits
+            elif not survival:
+                matches &= dead
+            out |= matches
+        out[:, -1] &= self.__last_word_mask__()
+        return out
@@ -0,0 +1,347 @@
+import numpy as np
+import re
+from contextlib import nullcontext
+from typing import IO, List, Tuple, Union
+
+rle_header = re.compile(r'x\s*=\s*(\d+)\s*,\s*y\s*=\s*(\d+)(?:\s*,\s*rule\s*=\s*([^\s,]+))?')
+end_of_row, end_of_pattern, invalid = -1, -2, -3
+
+
+def state_name(state: int) -> str:
+    """Returns the multi-state RLE name of a state: ``.`` for dead, ``A`` to ``X``, then ``pA`` to ``yO``"""
+    if state == 0:
+        return '.'
+    if state <= 24:
+        return chr(ord('A') + state - 1)
+    return chr(ord('p') + (state - 25) // 24) + chr(ord('A') + (state - 25) % 24)
+
+
+def state_table() -> np.ndarray:
+    """Returns the state of every single-byte RLE tag, ``invalid`` for bytes that are not a tag"""
+    table = np.full(256, invalid, dtype=np.int64)
+    table[ord('a'):ord('z')+1] = 1  # in two-state patterns any letter but b is a living cell
+    table[ord('b')] = table[ord('.')] = 0
+    table[ord('A'):ord('X')+1] = np.arange(1, 25)
+    table[ord('$')] = end_of_row
+    table[ord('!')] = end_of_pattern
+    return table
+
+
+def decimal(numbers: np.ndarray, shown: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Formats non-negative numbers as rows of ASCII digits, so that many numbers are written without a Python loop.
+
+    :param numbers: 1D array of numbers.
+    :param shown: mask of the numbers to write, the others get no digits.
+    :return: byte matrix with one row per number, and the mask of the bytes that are used.
+    """
+    numbers = numbers.astype(np.int64)
+    sizes = np.where(shown, 1 + np.searchsorted(10 ** np.arange(1, 19, dtype=np.int64), numbers, side='right'), 0)
+    width = int(sizes.max()) if len(sizes) else 0
+    exponents = sizes[:, None] - 1 - np.arange(width)
+    digits = numbers[:, None] // 10 ** np.maximum(exponents, 0) % 10 + ord('0')
+    return digits.astype(np.uint8), exponents >= 0
+
+
+def constant(text: bytes, shown: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Returns the byte matrix and mask of a text repeated on every row, used where ``shown``"""
+    matrix = np.broadcast_to(np.frombuffer(text, dtype=np.uint8), (len(shown), len(text)))
+    return matrix, np.broadcast_to(shown[:, None], matrix.shape)
+
+
+def join(columns: List[Tuple[np.ndarray, np.ndarray]]) -> bytes:
+    """Concatenates byte matrices column-wise and returns the used bytes in row order"""
+    matrix = np.concatenate([matrix for matrix, _ in columns], axis=1)
+    mask = np.concatenate([mask for _, mask in columns], axis=1)
+    return matrix[mask].tobytes()
+
+
+class Pattern:
+    """
+    Rectangle of cells that can be read from and written to the RLE and Life 1.06 pattern formats, and placed into a
+    ``World`` with ``World.place``.
+
+    Files are read in chunks of bytes and written in bands of rows. Every chunk is tokenized and decoded, and every band
+    encoded, with NumPy operations on all of its bytes at once instead of a Python loop over cells or tokens.
+    """
+
+    # number of bytes parsed at once, and number of cells per band of rows written at once
+    chunk_bytes = 1 << 22
+    band_cells = 1 << 20
+    # RLE lines are kept around this length, as recommended by the format
+    line_length = 70
+    states = state_table()
+
+    def __init__(self, cells: np.ndarray, rules: str = '', comments: List[str] = None, origin: (int, int) = (0, 0)):
+        """
+        Constructor of a pattern.
+
+        :param cells: 2D array of cell states.
+        :param rules: (optional) rule string the pattern was made for.
+        :param comments: (optional) comment lines, without their leading ``#``.
+        :param origin: (optional) coordinates of the top left cell, as used by Life 1.06.
+        """
+        self.cells = cells
+        self.rules = rules
+        self.comments = comments if comments is not None else []
+        self.origin = origin
+        self.height, self.width = cells.shape
+
+    @classmethod
+    def from_world(cls, world, rules: str = '') -> 'Pattern':
+        """
+        Creates a pattern of all cells of a world, without copying them.
+
+        :param world: ``World`` to export.
+        :param rules: (optional) rule string to store with the pattern.
+        :return: new ``Pattern``.
+        """
+        return cls(world.world, rules or world.rules)
+
+    @staticmethod
+    def __open__(target: Union[str, IO], mode: str):
+        """Opens a path, or passes an already opened file through without closing it"""
+        return open(target, mode) if isinstance(target, str) else nullcontext(target)
+
+    @staticmethod
+    def __read__(file: IO, size: int = -1) -> bytes:
+        """Reads from a binary or text file, returning bytes"""
+        data = file.read(size)
+        return data.encode('ascii') if isinstance(data, str) else data
+
+    @staticmethod
+    def __readline__(file: IO) -> str:
+        """Reads a line from a binary or text file, returning text"""
+        line = file.readline()
+        return line.decode('ascii') if isinstance(line, bytes) else line
+
+    @classmethod
+    def read(cls, path: str) -> 'Pattern':
+        """
+        Reads a pattern file, in Life 1.06 format when it starts with its header and in RLE format otherwise.
+
+        :param path: file to read.
+        :return: new ``Pattern``.
+        """
+        with open(path) as file:
+            life106 = file.readline().startswith('#Life 1.06')
+        return cls.read_life106(path) if life106 else cls.read_rle(path)
+
+    @classmethod
+    def read_rle(cls, source: Union[str, IO]) -> 'Pattern':
+        """
+        Reads a pattern in RLE format, either two-state (``b`` and ``o``) or multi-state (``.``, ``A`` to ``X`` and
+        ``pA`` to ``yO``).
+
+        :param source: path or opened file.
+        :return: new ``Pattern``.
+        """
+        with Pattern.__open__(source, 'rb') as file:
+            comments, header = [], None
+            while header is None:
+                line = Pattern.__readline__(file)
+                if not line:
+                    raise ValueError("missing 'x = ..., y = ...' header in RLE pattern")
+                line = line.strip()
+                if line.startswith('#'):
+                    comments.append(line[1:])
+                elif line:
+                    header = rle_header.match(line)
+                    if header is None:
+                        raise ValueError("invalid RLE header '{}'".format(line))
+            width, height = int(header.group(1)), int(header.group(2))
+            pattern = cls(np.zeros((height, width), dtype=np.uint8), header.group(3) or '', comments)
+
+            x, y, rest = 0, 0, b''
+            while True:
+                data = Pattern.__read__(file, Pattern.chunk_bytes)
+                end = data.find(b'!')
+                if end >= 0:
+                    data = data[:end+1]
+                if not data:
+                    break
+                x, y, rest = pattern.__decode_rle__(rest + data, x, y)
+                if end >= 0:
+                    break
+        return pattern
+
+    def __decode_rle__(self, data: bytes, x: int, y: int) -> Tuple[int, int, bytes]:
+        """
+        Writes a chunk of RLE data into the cells, starting at ``(x, y)``. Returns where the next chunk starts, and the
+        bytes of an incomplete token at the end of the chunk.
+        """
+        chars = np.frombuffer(data, dtype=np.uint8)
+        chars = chars[chars > ord(' ')]
+        digit = (chars >= ord('0')) & (chars <= ord('9'))
+        # a multi-state prefix p to y belongs to the capital that follows it
+        capital = (chars >= ord('A')) & (chars <= ord('X'))
+        prefix = np.zeros(len(chars), dtype=bool)
+        prefix[:-1] = (chars[:-1] >= ord('p')) & (chars[:-1] <= ord('y')) & capital[1:]
+        tags = np.flatnonzero(~digit & ~prefix)
+        if len(tags) and ord('p') <= chars[tags[-1]] <= ord('y'):
+            # may be a prefix of which the capital is in the next chunk
+            tags = tags[:-1]
+        if len(tags) == 0:
+            return x, y, chars.tobytes()
+        rest = chars[tags[-1]+1:].tobytes()
+        chars, digit, prefix = chars[:tags[-1]+1], digit[:tags[-1]+1], prefix[:tags[-1]+1]
+
+        states = Pattern.states[chars[tags]]
+        prefixed = np.flatnonzero(prefix) + 1
+        states[np.searchsorted(tags, prefixed)] += (chars[prefixed-1].astype(np.int64) - ord('p') + 1) * 24
+        if (states == invalid).any():
+            raise ValueError("invalid character in RLE pattern")
+
+        # run count of every tag from the digits before it, 1 without digits
+        positions = np.flatnonzero(digit)
+        owners = np.searchsorted(tags, positions)
+        sizes = np.bincount(owners, minlength=len(tags))
+        exponents = np.cumsum(sizes)[owners] - 1 - np.arange(len(positions))
+        counts = np.bincount(owners, weights=(chars[positions] - ord('0')) * 10.0 ** exponents, minlength=len(tags))
+        counts = np.where(sizes > 0, counts, 1).astype(np.int64)
+        return (*self.__place_runs__(counts, states, x, y), rest)
+
+    def __place_runs__(self, counts: np.ndarray, states: np.ndarray, x: int, y: int) -> Tuple[int, int]:
+        """Writes runs of states into the cells, starting at ``(x, y)``, and returns where the next run starts"""
+        stop = np.flatnonzero(states == end_of_pattern)
+        if len(stop):
+            counts, states = counts[:stop[0]], states[:stop[0]]
+        if len(counts) == 0:
+            return x, y
+
+        # row of every run: rows advanced by the row ends before it; column: cells since the last row end
+        is_row = states == end_of_row
+        row_steps = np.where(is_row, counts, 0)
+        rows = y + np.cumsum(row_steps) - row_steps
+        widths = np.where(is_row, 0, counts)
+        total = np.cumsum(widths)
+        base = np.maximum.accumulate(np.where(is_row, total, -x))
+        columns = total - widths - base
+
+        live = states > 0
+        rows, columns, counts, values = rows[live], columns[live], counts[live], states[live]
+        if len(counts):
+            if (columns + counts).max() > self.width or rows.max() >= self.height:
+                raise ValueError("RLE pattern exceeds its {}x{} header".format(self.width, self.height))
+            # flat index of every cell of every run
+            starts = np.repeat(rows * self.width + columns - np.cumsum(counts) + counts, counts)
+            self.cells.reshape(-1)[starts + np.arange(len(starts))] = np.repeat(values, counts)
+        return int(total[-1] - base[-1]), int(y + row_steps.sum())
+
+    def write_rle(self, target: Union[str, IO]) -> None:
+        """
+        Writes the pattern in RLE format, two-state when all states are 0 or 1 and multi-state otherwise.
+
+        :param target: path or opened text file.
+        """
+        cells = self.cells
+        if cells.size > 0 and (cells.min() < 0 or cells.max() > 255):
+            raise ValueError("RLE only holds states from 0 to 255")
+        names = [state_name(state) for state in range(256)] if cells.size > 0 and cells.max() > 1 else ['b', 'o']
+        name_bytes = np.array([list(name.ljust(2).encode()) for name in names], dtype=np.uint8)
+        name_mask = np.array([[True, len(name) == 2] for name in names])
+
+        with Pattern.__open__(target, 'w') as file:
+            for comment in self.comments:
+                file.write('#{}\n'.format(comment))
+            rules = ', rule = {}'.format(self.rules) if self.rules else ''
+            file.write('x = {}, y = {}{}\n'.format(self.width, self.height, rules))
+
+            band = max(1, Pattern.band_cells // max(self.width, 1))
+            row, line = 0, 0
+            for top in range(0, self.height, band):
+                flat = np.ascontiguousarray(cells[top:top+band]).reshape(-1)
+                if flat.size == 0:
+                    continue
+                # runs of equal states, never crossing the end of a row
+                boundaries = np.empty(flat.size, dtype=bool)
+                boundaries[0] = True
+                np.not_equal(flat[1:], flat[:-1], out=boundaries[1:])
+                boundaries[::self.width] = True
+                starts = np.flatnonzero(boundaries)
+                lengths = np.diff(starts, append=flat.size)
+                values = flat[starts]
+                # dead cells at the end of a row are left out
+                keep = (values != 0) | ((starts + lengths) % self.width != 0)
+                starts, lengths, values = starts[keep], lengths[keep], values[keep]
+                if len(starts) == 0:
+                    continue
+
+                # every token: the row ends before it, its run count and its state
+                rows = top + starts // self.width
+                skipped = np.diff(rows, prepend=row)
+                row = int(rows[-1])
+                columns = [decimal(skipped, skipped > 1), constant(b'$', skipped > 0), decimal(lengths, lengths > 1),
+                           (name_bytes[values], name_mask[values])]
+                sizes = sum(mask.sum(axis=1) for _, mask in columns)
+
+                # start a new line before every token that would run past the line length
+                reach = line + np.cumsum(sizes)
+                breaks = reach // Pattern.line_length != (reach - sizes) // Pattern.line_length
+                line = int(reach[-1]) % Pattern.line_length
+                file.write(join([constant(b'\n', breaks)] + columns).decode('ascii'))
+            file.write('!\n')
+
+    @classmethod
+    def read_life106(cls, source: Union[str, IO]) -> 'Pattern':
+        """
+        Reads a pattern in Life 1.06 format, a list of the coordinates of the living cells. The pattern is cropped to
+        the living cells, and its ``origin`` holds the coordinates of the top left cell.
+
+        :param source: path or opened file.
+        :return: new ``Pattern``.
+        """
+        with Pattern.__open__(source, 'rb') as file:
+            comments, chunks, rest = [], [], b''
+            line = Pattern.__readline__(file)
+            while line.startswith('#'):
+                comments.append(line[1:].rstrip('\r\n'))
+                line = Pattern.__readline__(file)
+            rest = line.encode('ascii')
+            while True:
+                data = Pattern.__read__(file, Pattern.chunk_bytes)
+                if not data:
+                    text, rest = rest, b''
+                else:
+                    # a number cut off at the end of the chunk is parsed with the next one, and a chunk without any
+                    # whitespace only continues the number before it
+                    cut = len(data) if data[-1:].isspace() else max(map(data.rfind, (b' ', b'\t', b'\r', b'\n'))) + 1
+                    text, rest = (rest + data[:cut], data[cut:]) if cut else (b'', rest + data)
+                if text.strip():
+                    chunks.append(np.fromstring(text.decode('ascii'), dtype=np.int64, sep=' '))
+                if not data:
+                    break
+        if comments and comments[0].startswith('Life 1.06'):
+            comments = comments[1:]
+        coordinates = np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.int64)
+        if len(coordinates) % 2:
+            raise ValueError("odd number of coordinates in Life 1.06 pattern")
+        coordinates = coordinates.reshape(-1, 2)
+        if len(coordinates) == 0:
+            return cls(np.zeros((0, 0), dtype=np.uint8), comments=comments)
+
+        left, top = coordinates.min(axis=0)
+        right, bottom = coordinates.max(axis=0)
+        cells = np.zeros((bottom - top + 1, right - left + 1), dtype=np.uint8)
+        cells[coordinates[:, 1] - top, coordinates[:, 0] - left] = 1
+        return cls(cells, comments=comments, origin=(int(left), int(top)))
+
+    def write_life106(self, target: Union[str, IO]) -> None:
+        """
+        Writes the coordinates of the living cells in Life 1.06 format, relative to the ``origin`` of the pattern.
+        Any state other than 0 is written as living.
+
+        :param target: path or opened text file.
+        """
+        with Pattern.__open__(target, 'w') as file:
+            file.write('#Life 1.06\n')
+            band = max(1, Pattern.band_cells // max(self.width, 1))
+            for top in range(0, self.height, band):
+                ys, xs = np.nonzero(self.cells[top:top+band])
+                if len(xs) == 0:
+                    continue
+                xs, ys = xs + self.origin[0], ys + top + self.origin[1]
+                shown = np.ones(len(xs), dtype=bool)
+                file.write(join([constant(b'-', xs < 0), decimal(np.abs(xs), shown), constant(b' ', shown),
+                                 constant(b'-', ys < 0), decimal(np.abs(ys), shown),
+                                 constant(b'\n', shown)]).decode('ascii'))
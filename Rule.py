@@ -0,0 +1,136 @@
+import numpy as np
+from functools import lru_cache
+from typing import List
+
+
+class Rule:
+    """
+    Rule string compiled into lookup tables. Supported notations:
+
+    - ``B3/S23``: standard Life-like rules, birth and survival neighbour counts;
+    - ``B3/S23/A5``: decay of age, cells age when giving birth and decay when not surviving, up to age ``A``;
+    - ``B2/S/C3`` (or ``G3``): Generations rules, dying cells pass through states ``2`` up to ``C-1`` before becoming dead;
+    - ``3/23`` and ``3/23/5``: birth/survival[/age] without letters, as read by the first versions of ``Simulator``.
+
+    ``table[state, neighbours]`` holds the next state of a cell, and ``alive_table[state]`` whether a cell of that state
+    counts as a living neighbour. Rules are compiled once per rule string through ``Rule.compile``.
+    """
+
+    # lowest number of states covered by the tables, so cells up to this value never index outside of them
+    min_states = 256
+
+    def __init__(self, rules: str):
+        """
+        Constructor of a compiled rule, use ``Rule.compile`` to share compiled rules.
+
+        :param rules: rule string.
+        """
+        self.rules = rules
+        self.birth, self.survival = [], []
+        self.max_age = 0
+        self.states = 2
+        self.mode = 'standard'
+        self.__parse__(rules)
+
+        rows = max(Rule.min_states, self.states, self.max_age + 1)
+        self.table = np.zeros((rows, 9), dtype=np.int64)
+        self.alive_table = np.zeros(rows, dtype=bool)
+        birth = np.isin(np.arange(9), self.birth)
+        survival = np.isin(np.arange(9), self.survival)
+        state = np.arange(rows)[:, None]
+
+        if self.mode == 'decay of age':
+            # only fertile cells give birth, which makes them older; living cells keep their age when surviving
+            fertile = (state >= 2) & (state < self.max_age - 1)
+            self.table[...] = np.where(fertile & birth, state + 1,
+                                       np.where((state != 0) & survival, state, np.maximum(state - 1, 0)))
+            self.alive_table[1:] = True
+        elif self.mode == 'generations':
+            dying = np.where(state + 1 < self.states, state + 1, 0)
+            self.table[...] = np.where(state >= 2, dying, 0)
+            self.table[0] = birth
+            self.table[1] = np.where(survival, 1, 2 if self.states > 2 else 0)
+            self.alive_table[1] = True
+        else:
+            self.table[...] = np.where(state != 0, survival, birth)
+            self.alive_table[1] = True
+
+        self.flat_tables = {}
+
+    def __parse__(self, rules: str) -> None:
+        """Reads birth, survival and states or ages from a rule string"""
+        parts = rules.strip().upper().split('/')
+        if all(part.isdigit() or not part for part in parts) and 2 <= len(parts) <= 3:
+            # the positional birth/survival[/age] notation read by the first versions of ``Simulator``
+            parts = ['B' + parts[0], 'S' + parts[1]] + parts[2:]
+        if len(parts) == 3 and parts[2].isdigit():
+            parts[2] = 'A' + parts[2]
+
+        found = set()
+        for part in parts:
+            if not part or part[0] not in 'BSACG' or part[0] in found or not (part[1:].isdigit() or part[1:] == ''):
+                raise ValueError("invalid rule string '{}'".format(rules))
+            letter, digits = part[0], part[1:]
+            found.add(letter)
+            if letter in 'BS':
+                counts = sorted(set(int(digit) for digit in digits))
+                if any(count > 8 for count in counts):
+                    raise ValueError("invalid neighbour count in rule string '{}'".format(rules))
+                if letter == 'B':
+                    self.birth = counts
+                else:
+                    self.survival = counts
+            elif letter == 'A':
+                self.mode = 'decay of age'
+                self.max_age = int(digits or 0)
+            else:
+                self.mode = 'generations'
+                self.states = int(digits or 2)
+        if not {'B', 'S'} <= found or len(found & set('ACG')) > 1:
+            raise ValueError("invalid rule string '{}'".format(rules))
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def compile(rules: str) -> 'Rule':
+        """
+        Returns the compiled rule for a rule string, compiling every distinct string only once.
+
+        :param rules: rule string.
+        :return: compiled ``Rule``.
+        """
+        return Rule(rules)
+
+    def flat_table(self, dtype) -> np.ndarray:
+        """
+        Returns the table transposed to ``[neighbours, state]`` and flattened, in the given cell type, so that the next
+        state of a cell is found at index ``neighbours * len(alive_table) + state``.
+
+        :param dtype: type of the cells.
+        :return: 1D lookup table.
+        """
+        dtype = np.dtype(dtype)
+        if dtype not in self.flat_tables:
+            self.flat_tables[dtype] = np.ascontiguousarray(self.table.T).ravel().astype(dtype)
+        return self.flat_tables[dtype]
+
+    def alive(self, cells: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+        """
+        Marks the cells that count as living neighbours: any age above zero in decay of age mode, state ``1`` otherwise.
+
+        :param cells: array of cell states.
+        :param out: (optional) array receiving the marks.
+        :return: array of marks, ``1`` for living cells.
+        """
+        if self.mode == 'decay of age':
+            return np.greater(cells, 0, out=out)
+        return np.equal(cells, 1, out=out)
+
+    def next_state(self, state: int, neighbours: int) -> int:
+        """
+        Returns the next state of a single cell.
+
+        :param state: current state of the cell.
+        :param neighbours: number of living neighbours.
+        :return: next state.
+        """
+        return int(self.table[min(max(state, 0), len(self.table) - 1), neighbours])
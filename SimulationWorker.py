@@ -0,0 +1,143 @@
+import threading
+import time
+import numpy as np
+from collections import deque
+from typing import Optional, Tuple
+from Simulator import Simulator
+from PackedWorld import PackedWorld
+
+
+class SimulationWorker:
+    """
+    Runs a ``Simulator`` in a background thread, independent of the rate at which its results are shown.
+
+    Every generation is copied into a bounded ring buffer of ``(generation, cells)`` snapshots, from which a consumer such
+    as ``Visualisation`` takes the latest one at its own frame rate. The worker is paced to a target number of generations
+    per second, or runs as fast as it can in skip-frames mode; snapshots that are not consumed in time are dropped. In
+    skip-frames mode a generation is only copied once the consumer has taken the previous snapshot, so at most once per
+    frame, and the last generation is copied when the worker is paused.
+
+    An error raised while updating stops the worker and is raised again by ``latest`` or ``stop``.
+    """
+
+    def __init__(self, simulator: Simulator, generations_per_second: float = 2, buffer_size: int = 4):
+        """
+        Constructor of the worker, which starts the thread paused.
+
+        :param simulator: ``Simulator``-object used to evolve the state of the world.
+        :param generations_per_second: (optional) target number of generations per second.
+        :param buffer_size: (optional) number of snapshots kept in the ring buffer.
+        """
+        self.simulator = simulator
+        self.generations_per_second = generations_per_second
+        self.skip_frames = False
+        self.snapshots = deque(maxlen=buffer_size)
+        # held while the simulator updates, take it to edit the world while the worker runs
+        self.lock = threading.Lock()
+        self.running = threading.Event()
+        self.stopped = False
+        self.error = None
+        # whether the consumer took the latest snapshot, and whether a generation was produced without a snapshot
+        self.taken = True
+        self.pending = False
+        self.thread = threading.Thread(target=self.__run__, daemon=True)
+        self.thread.start()
+
+    def __run__(self) -> None:
+        """Steps the simulator while running, pacing generations unless in skip-frames mode"""
+        deadline = time.perf_counter()
+        try:
+            while not self.stopped:
+                if self.pending and not self.running.is_set():
+                    with self.lock:
+                        self.__snapshot__(self.simulator.get_world())
+                if not self.running.wait(0.1):
+                    deadline = time.perf_counter()
+                    continue
+                with self.lock:
+                    world = self.simulator.update()
+                    if self.taken or not self.skip_frames:
+                        self.__snapshot__(world)
+                    else:
+                        self.pending = True
+                if self.skip_frames:
+                    deadline = time.perf_counter()
+                    continue
+                deadline = max(deadline + 1 / self.generations_per_second, time.perf_counter() - 1)
+                time.sleep(max(0.0, deadline - time.perf_counter()))
+        except Exception as error:
+            self.error = error
+            self.running.clear()
+
+    def __snapshot__(self, world) -> None:
+        """Appends a copy of the current generation to the snapshots"""
+        # a packed world is copied packed, and only the part that is shown is unpacked
+        cells = world.copy() if isinstance(world, PackedWorld) else world.world.copy()
+        self.snapshots.append((self.simulator.get_generation(), cells))
+        self.taken, self.pending = False, False
+
+    def __raise__(self) -> None:
+        """Raises the error that stopped the worker in the consumer thread"""
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    def latest(self) -> Optional[Tuple[int, np.ndarray]]:
+        """
+        Returns the most recent snapshot, leaving it in the buffer. Raises the error that stopped the worker, if any.
+
+        :return: tuple of generation and cells, a ``PackedWorld`` for packed worlds, or None when no generation has been
+            produced yet.
+        """
+        self.__raise__()
+        self.taken = True
+        try:
+            return self.snapshots[-1]
+        except IndexError:
+            return None
+
+    def resume(self) -> None:
+        """
+        Starts or continues producing generations.
+        """
+        self.running.set()
+
+    def pause(self) -> None:
+        """
+        Stops producing generations after the current one.
+        """
+        self.running.clear()
+
+    def is_paused(self) -> bool:
+        """
+        Returns whether the worker is paused.
+
+        :return: True when no generations are produced.
+        """
+        return not self.running.is_set()
+
+    def set_rate(self, generations_per_second: float) -> None:
+        """
+        Changes the target number of generations per second, which also leaves skip-frames mode.
+
+        :param generations_per_second: new target, larger than 0.
+        """
+        self.generations_per_second = generations_per_second
+        self.skip_frames = False
+
+    def set_skip_frames(self, skip_frames: bool) -> None:
+        """
+        Switches skip-frames mode, in which generations are produced as fast as possible and the consumer only sees the
+        latest.
+
+        :param skip_frames: whether to run at maximum throughput.
+        """
+        self.skip_frames = skip_frames
+
+    def stop(self) -> None:
+        """
+        Stops the thread and waits for it to finish, then raises the error that stopped the worker, if any.
+        """
+        self.stopped = True
+        self.thread.join()
+        self.__raise__()
@@ -1,5 +1,13 @@
 from World import *
-import random
+from Rule import Rule
+from PackedWorld import PackedWorld
+from InfiniteWorld import InfiniteWorld
+from Metrics import GenerationRecord
+from Checkpoint import Checkpoint, Checkpointer
+import time
+import warnings
+from collections import OrderedDict
+from typing import Callable, Iterator
 
 class Simulator:
     """
@@ -7,30 +15,157 @@ class Simulator:
     Read https://en.wikipedia.org/wiki/Conway%27s_Game_of_Life for an introduction to Conway's Game of Life.
     """
 
-    def __init__(self, world = None, rules='B3/S23', start_age=0):
+    # number of cells per band of rows stepped by the banded engine
+    band_cells = 1 << 20
+
+    engines = ('auto', 'cell', 'vectorized', 'sparse', 'hashlife', 'parallel', 'packed', 'banded', 'infinite')
+
+    def __init__(self, world = None, rules=None, start_age=0, engine='auto', tile_size=32, workers=None,
+                 history=0):
         """
         Constructor for Game of Life simulator.
 
         :param world: (optional) environment used to simulate Game of Life.
+        :param rules: (optional) rule string, ``B/S`` for standard, ``B/S/A`` for decay of age or ``B/S/C`` for
+            Generations rules, see ``Rule``. Defaults to the rules stored in a file-backed world, or ``B3/S23``.
+        :param start_age: (optional) age given to living cells in decay of age mode.
+        :param engine: (optional) ``'cell'`` runs ``life_rules`` per cell, ``'vectorized'`` steps the whole array at once;
+            ``'sparse'`` only re-evaluates tiles that changed in the previous generation and their neighbours;
+            ``'hashlife'`` runs standard rules on an unbounded HashLife universe, see ``advance``; it refuses worlds with
+            living cells on their edges and warns when cells reach them, as the plane and the torus part ways there;
+            ``'parallel'`` steps horizontal strips in worker processes sharing the world's memory, see ``close``;
+            ``'packed'`` steps the bits of a ``PackedWorld`` directly;
+            ``'banded'`` streams through the world in bands of rows, keeping the memory used by a step bounded;
+            ``'infinite'`` steps the allocated tiles of an ``InfiniteWorld``;
+            ``'auto'`` uses the packed engine for a ``PackedWorld``, the infinite engine for an ``InfiniteWorld``, the
+            banded engine for a file-backed world, else the vectorized engine unless ``life_rules`` is overridden.
+        :param tile_size: (optional) width and height of the tiles tracked by the sparse engine.
+        :param workers: (optional) number of worker processes of the parallel engine, the number of CPUs by default.
+        :param history: (optional) number of board hashes remembered to detect still lifes and cycles, 0 to disable.
         """
-        self.generation = 0
-
         if world == None:
             self.world = World(20)
         else:
             self.world = world
 
-        self.birth_neighbours = Simulator.get_rules_on_index(rules, 0)
-        self.survival_neighbours = Simulator.get_rules_on_index(rules, 1)
+        # a file-backed world resumes at the generation and with the rules stored in it
+        self.generation = self.world.generation
+        if rules is None:
+            rules = self.world.rules or 'B3/S23'
         self.start_age = start_age
+        self.engine = None
+        self.scratch = {}
 
-        if len(rules.split('/')) == 3:
-            self.mode = 'decay of age'
-            self.max_age = Simulator.get_rules_on_index(rules, 2)[0]
-            self.world.world[self.world.world == 1] = self.start_age
-        else:
-            self.mode = 'standard'
+        # sparse engine state: tiles changed in the previous generation, None when a full step is needed
+        self.tile_size = tile_size
+        self.changed_tiles = None
+        self.sparse_front = None
+        self.active_tiles = 0
+
+        # hashlife engine state: the universe is imported from the world on the first step
+        self.hashlife = None
+        self.hashlife_front = None
+        self.hashlife_stale = False
+
+        # parallel engine state: the worker pool is started on the first step
+        self.workers = workers
+        self.pool = None
+
+        # cycle detection state: hashes of recent generations, mapped to their generation
+        self.history = history
+        self.hashes = OrderedDict()
+        self.zobrist = None
+        self.board_hash = None
+        self.hashed_front = None
+        self.period = None
+
+        # instrumentation state: observers with their sampling interval, time spent in the phases of a step
+        self.observers = []
+        self.phases = None
+        # front buffer, population and index of the marks of the last measured generation
+        self.measured = None
+
+        # background checkpoints, see ``start_checkpoints``
+        self.checkpointer = None
 
+        self.set_rules(rules)
+        if self.mode == 'decay of age' and self.generation == 0:
+            cells = self.world.world
+            band = max(1, Simulator.band_cells // max(cells.shape[1], 1))
+            for top in range(0, cells.shape[0], band):
+                rows = cells[top:top+band]
+                rows[rows == 1] = self.start_age
+            # reassigned for worlds that convert their cells on access
+            self.world.world = cells
+        self.engine = self.__select_engine__(engine)
+
+    def set_rules(self, rules: str) -> None:
+        """
+        Changes the rules, also in the middle of a run. Every distinct rule string is compiled into lookup tables only
+        once and the worker processes of the parallel engine keep running, so switching between rules costs nothing.
+        Generations hashed under the previous rules are forgotten, as are a detected period.
+
+        :param rules: rule string, see ``Rule`` for the supported notations.
+        """
+        rule = Rule.compile(rules)
+        if self.engine in ('packed', 'hashlife') and rule.mode != 'standard':
+            raise ValueError("the {} engine only supports standard rules".format(self.engine))
+        if self.engine == 'infinite' and rule.table[0, 0] != 0:
+            raise ValueError("the infinite engine needs rules under which empty cells without neighbours stay empty")
+        if self.hashlife is not None:
+            self.get_world()
+            self.hashlife = None
+        if self.pool is not None:
+            self.pool.set_rules(rules)
+        # tiles that did not change and cycles under the previous rules may change under the new ones
+        self.changed_tiles = None
+        self.hashes = OrderedDict()
+        self.hashed_front = None
+        self.period = None
+
+        self.rule = rule
+        self.rules = rules
+        self.mode = rule.mode
+        self.birth_neighbours = rule.birth
+        self.survival_neighbours = rule.survival
+        self.max_age = rule.max_age
+        if self.world.path is not None and rules != self.world.rules:
+            self.world.rules = rules
+            self.world.write_header()
+
+    def __select_engine__(self, engine) -> str:
+        """Validates the requested engine and resolves ``'auto'``"""
+        if engine not in Simulator.engines:
+            raise ValueError("unknown engine '{}', expected one of {}".format(engine, Simulator.engines))
+        packed = isinstance(self.world, PackedWorld)
+        if engine == 'auto' and packed:
+            engine = 'packed'
+        if packed != (engine == 'packed'):
+            raise ValueError("the packed engine steps exactly the worlds of type PackedWorld")
+        infinite = isinstance(self.world, InfiniteWorld)
+        if engine == 'auto' and infinite:
+            engine = 'infinite'
+        if infinite != (engine == 'infinite'):
+            raise ValueError("the infinite engine steps exactly the worlds of type InfiniteWorld")
+        if infinite and self.rule.table[0, 0] != 0:
+            raise ValueError("the infinite engine needs rules under which empty cells without neighbours stay empty")
+        if infinite and self.history:
+            raise ValueError("the infinite engine does not detect cycles, use history=0")
+        if engine == 'packed' and self.mode != 'standard':
+            raise ValueError("a PackedWorld only supports standard rules, use World(dtype=np.uint8) for other rules")
+        if engine == 'auto' and self.world.path is not None:
+            return 'banded'
+        if engine == 'parallel' and self.world.path is not None:
+            # the workers step copies of the cells in shared memory, which never reach the file
+            raise ValueError("the parallel engine steps worlds in memory, use the banded engine for a file-backed world")
+        if engine == 'auto':
+            # a subclass with its own life_rules must keep getting called per cell
+            if type(self).life_rules is not Simulator.life_rules:
+                return 'cell'
+            return 'vectorized'
+        if engine == 'hashlife' and self.mode != 'standard':
+            raise ValueError("the hashlife engine only supports standard rules")
+        return engine
 
     def update(self) -> World:
         """
@@ -38,16 +173,613 @@ class Simulator:
 
         :return: New state of the world.
         """
-
+        start = time.perf_counter() if self.observers else None
+        edits = self.world.pop_edits()
+        if self.history:
+            self.__prepare_hash__(edits)
         self.generation += 1
+        if start is not None:
+            self.phases = [0.0, 0.0]
+
+        if self.engine == 'vectorized':
+            self.next_generation(self.world.world, out=self.world.back_buffer())
+        elif self.engine == 'sparse':
+            self.__update_sparse__(edits)
+        elif self.engine == 'banded':
+            front, back = self.world.world, self.world.back_buffer()
+            band = max(1, Simulator.band_cells // front.shape[1])
+            for top in range(0, front.shape[0], band):
+                self.step_rows(front, back, top, min(top + band, front.shape[0]))
+        elif self.engine == 'packed':
+            self.world.next_generation(self.rule.birth, self.rule.survival, out=self.world.back_buffer())
+        elif self.engine == 'infinite':
+            self.world.next_generation(self.step_tiles)
+        elif self.engine == 'parallel':
+            if self.pool is not None and (self.pool.shape != self.world.world.shape or self.pool.dtype != self.world.world.dtype):
+                self.close()
+            if self.pool is None:
+                # imported when first needed, as multiprocessing adds to the start-up time of every other run
+                from StripPool import StripPool
+                self.pool = StripPool(self.world, self.rules, self.start_age, self.workers)
+            try:
+                self.pool.step()
+            except RuntimeError:
+                # the pool closed itself after a worker failed; the next update starts a new one
+                self.pool = None
+                raise
+        elif self.engine == 'hashlife':
+            self.__sync_hashlife__(edits)
+            self.hashlife.advance(1)
+            self.__check_hashlife__()
+            self.hashlife.to_array(0, 0, self.world.width, self.world.height, out=self.world.back_buffer())
+            self.hashlife_front = self.world.back_buffer()
+            self.hashlife_stale = False
+        else:
+            # iterating over all cells to run rules on every cell, reading the front and writing the back buffer
+            back = self.world.back_buffer()
+            for y in range(self.world.height):
+                for x in range(self.world.width):
+                    back[y][x] = self.life_rules(x, y)
+
+        self.world.swap(self.generation)
+        if self.history:
+            self.__record_hash__()
+        if self.checkpointer is not None and self.generation % self.checkpointer.every == 0:
+            self.checkpointer.submit(self.__checkpoint__())
+        if start is not None:
+            self.__notify__(time.perf_counter() - start, edits)
+        return self.world
+
+    def add_observer(self, observer: Callable[[GenerationRecord], None], count_every: int = 32) -> None:
+        """
+        Registers a function to be called with a ``GenerationRecord`` after every generation, such as a ``Metrics``
+        object. Without observers ``update`` measures nothing. Times are measured every generation, while counting the
+        cells takes a few passes over the board and is only done every ``count_every``-th generation, which keeps the
+        overhead to a few percent of the update time or less.
+
+        :param observer: function called with the record of a generation.
+        :param count_every: (optional) interval in generations between records with cell counts, 1 to count every
+            generation.
+        """
+        if count_every < 1:
+            raise ValueError("count_every must be at least 1")
+        self.observers.append((observer, count_every))
+
+    def remove_observer(self, observer: Callable[[GenerationRecord], None]) -> None:
+        """
+        Unregisters a function registered with ``add_observer``.
+
+        :param observer: function to remove.
+        """
+        self.observers = [(other, every) for other, every in self.observers if other is not observer]
+        if not self.observers:
+            self.phases = None
+
+    def __notify__(self, seconds: float, edits: List[Tuple[int, int, int, int]]) -> None:
+        """Passes the record of the generation to the observers, with cell counts when any observer asks for them"""
+        counting, rules = self.phases
+        if any(self.generation % every == 0 for _, every in self.observers):
+            record = self.__measure__(seconds, counting, rules, edits)
+        else:
+            self.measured = None
+            record = GenerationRecord(self.generation, seconds, counting, rules, None, None, None, None, None, None, None)
+        for observer, _ in self.observers:
+            observer(record)
+
+    def __measure__(self, seconds: float, counting: float, rules: float, edits: List[Tuple[int, int, int, int]]) -> GenerationRecord:
+        """
+        Counts living, born, dying and changed cells by comparing the current with the previous generation. The
+        living cells of a measured generation are kept, so measuring the next one only marks the new generation.
+        """
+        front, back = self.__buffers__()
+        if isinstance(self.world, PackedWorld):
+            population = int(np.bitwise_count(front).sum())
+            previous = int(np.bitwise_count(back).sum())
+            flipped = changed = int(np.bitwise_count(front ^ back).sum())
+            self.measured = None
+        elif isinstance(self.world, InfiniteWorld):
+            front, back = self.world.stacks()
+            current, before = self.alive(front), self.alive(back)
+            population, previous = np.count_nonzero(current), np.count_nonzero(before)
+            flipped, changed = np.count_nonzero(current != before), np.count_nonzero(front != back)
+            self.measured = None
+        else:
+            scratch = self.__scratch__(front.shape)
+            if 'marks' not in scratch:
+                scratch['marks'] = np.empty((3,) + front.shape, dtype=bool)
+            marks = scratch['marks']
+            # the living cells of the previous generation are still marked when it was measured too
+            reuse = self.measured is not None and self.measured[0] is back and not edits
+            index = 1 - self.measured[2] if reuse else 0
+            current, before, flips = marks[index], marks[1 - index], marks[2]
+            if reuse:
+                previous = self.measured[1]
+            else:
+                self.alive(back, out=before)
+                previous = np.count_nonzero(before)
+            self.alive(front, out=current)
+            population = np.count_nonzero(current)
+            flipped = np.count_nonzero(np.not_equal(current, before, out=flips))
+            changed = np.count_nonzero(np.not_equal(front, back, out=flips))
+            self.measured = (front, population, index)
+
+        births = (flipped + population - previous) // 2
+        ages = self.__count_ages__(front, population) if self.mode == 'decay of age' else None
+        if self.engine == 'sparse':
+            active = min(self.active_tiles * self.tile_size ** 2, front.size)
+        elif self.engine == 'infinite':
+            active = len(self.world.tiles) * self.world.tile_size ** 2
+        else:
+            active = self.world.width * self.world.height
+        return GenerationRecord(self.generation, seconds, counting, rules, int(population), int(births),
+                                int(flipped - births), int(population - births), int(changed), int(active), ages)
+
+    def __buffers__(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns the arrays holding the current and the previous generation, packed for a ``PackedWorld``"""
+        if isinstance(self.world, PackedWorld):
+            return self.world.bits, self.world.back
+        return self.world.world, self.world.back
+
+    def __prepare_hash__(self, edits: List[Tuple[int, int, int, int]]) -> None:
+        """
+        Hashes the whole board when it was replaced or edited since the last generation, which also forgets the
+        history and the detected period.
+        """
+        front = self.__buffers__()[0]
+        if front is self.hashed_front and not edits:
+            return
+        if self.zobrist is None or self.zobrist.shape != front.shape:
+            # odd random multipliers per location, so that every changed value changes the hash
+            self.zobrist = np.random.default_rng().integers(0, 1 << 63, size=front.shape, dtype=np.uint64) * 2 + 1
+        self.board_hash = int(np.sum(self.zobrist * front.astype(np.uint64), dtype=np.uint64))
+        self.hashes = OrderedDict({self.board_hash: self.generation})
+        self.period = None
+
+    def __record_hash__(self) -> None:
+        """
+        Updates the board hash for the cells that changed in the last generation, and looks it up in the history.
+        The hash is the sum of the cell values multiplied by a random number per location, modulo ``2**64``.
+        """
+        front, back = self.__buffers__()
+        changed = np.flatnonzero(front != back)
+        difference = front.flat[changed].astype(np.uint64) - back.flat[changed].astype(np.uint64)
+        self.board_hash = (self.board_hash + int(np.sum(self.zobrist.flat[changed] * difference, dtype=np.uint64))) % (1 << 64)
+        self.hashed_front = front
+
+        seen = self.hashes.get(self.board_hash)
+        if seen is not None:
+            self.period = self.generation - seen
+        self.hashes[self.board_hash] = self.generation
+        if len(self.hashes) > self.history:
+            self.hashes.popitem(last=False)
 
-        # iterating over all cells to run rules on every cell
-        for x in range(len(self.world.world)):
-            for y in range(len(self.world.world[x])):
-                self.world.set(x, y, self.life_rules(x, y))
+    def get_period(self):
+        """
+        Returns the period of the cycle the world has entered: ``1`` for a still life, ``k`` when every ``k``
+        generations repeat. Detection requires a ``history`` of at least the period.
+
+        :return: detected period, or None when no cycle has been detected (yet).
+        """
+        return self.__period__()
 
+    def __period__(self):
+        """Returns the detected period, forgetting it and the history once the world was edited or replaced since"""
+        if self.period is not None and (self.world.edits or self.__buffers__()[0] is not self.hashed_front):
+            self.period = None
+            self.hashes = OrderedDict()
+        return self.period
+
+    def run(self, generations: int = None, stop_on_cycle: bool = True) -> World:
+        """
+        Updates the world for a number of generations, or until a cycle is detected.
+
+        :param generations: (optional) maximum number of generations, unlimited when left implicit.
+        :param stop_on_cycle: (optional) whether to stop as soon as ``get_period`` detects a still life or cycle;
+            requires a ``history``.
+        :return: New state of the world.
+        """
+        if generations is None and not (stop_on_cycle and self.history):
+            raise ValueError("an unlimited run needs a history to stop on a cycle")
+        done = 0
+        while generations is None or done < generations:
+            if stop_on_cycle and self.__period__() is not None:
+                break
+            self.update()
+            done += 1
         return self.world
 
+    def iter_generations(self, generations: int = None, every: int = 1,
+                         stop_on_cycle: bool = False) -> Iterator[Tuple[int, np.ndarray]]:
+        """
+        Updates the world generation by generation, yielding every ``every``-th generation without copying it.
+
+        The yielded cells are a read-only view of the front buffer: they stay valid until the next update, which writes
+        into the back buffer, and are overwritten by the update after that. Copy them to keep them longer.
+
+        :param generations: (optional) number of generations to advance, unlimited when left implicit.
+        :param every: (optional) yield only every ``every``-th generation, counted from the current one.
+        :param stop_on_cycle: (optional) whether to stop as soon as ``get_period`` detects a still life or cycle.
+        :return: iterator of ``(generation, cells)`` tuples.
+        """
+        if every < 1:
+            raise ValueError("every must be at least 1")
+        if generations is None and stop_on_cycle and not self.history:
+            # without a history no cycle is ever detected
+            raise ValueError("an unlimited run needs a history to stop on a cycle")
+        done = 0
+        while generations is None or done < generations:
+            if stop_on_cycle and self.__period__() is not None:
+                break
+            self.update()
+            done += 1
+            if done % every == 0:
+                cells = self.world.world.view()
+                cells.flags.writeable = False
+                yield self.generation, cells
+
+    def close(self) -> None:
+        """
+        Stops the worker processes of the parallel engine and releases their shared memory. The simulator can still be
+        updated afterwards, which starts a new pool.
+        """
+        if self.pool is not None:
+            self.pool.close()
+            self.pool = None
+
+    def save_checkpoint(self, path: str, compress: bool = True) -> None:
+        """
+        Writes the cells, generation, rules, mode, start age and maximum age to a file from which ``load_checkpoint``
+        resumes the run.
+
+        :param path: file to write; an existing file is only replaced once the new checkpoint is complete.
+        :param compress: (optional) whether to compress the cells; uncompressed checkpoints are memory-mapped on loading.
+        """
+        self.__checkpoint__().write(path, compress)
+
+    def load_checkpoint(self, path: str, mmap: bool = True) -> None:
+        """
+        Resumes the run stored by ``save_checkpoint``, replacing the cells, generation, rules and start age. The cells of
+        an uncompressed checkpoint are memory-mapped copy-on-write rather than read, unless the world is file-backed, in
+        which case they are copied into it. Packed bits go straight into a ``PackedWorld`` and are unpacked for others.
+        An ``InfiniteWorld`` gets its cells back at the location they were saved at.
+
+        :param path: file written by ``save_checkpoint`` or by the checkpoints of ``start_checkpoints``.
+        :param mmap: (optional) whether to memory-map uncompressed cells.
+        """
+        checkpoint = Checkpoint.read(path, mmap)
+        rule = Rule.compile(checkpoint.rules)
+        if (rule.mode, rule.max_age) != (checkpoint.mode, checkpoint.max_age):
+            raise ValueError("'{}' stores mode '{}' with maximum age {}, which does not match its rules '{}'".format(
+                path, checkpoint.mode, checkpoint.max_age, checkpoint.rules))
+        world = self.world
+        cells = checkpoint.cells
+        if checkpoint.width is not None and isinstance(world, PackedWorld):
+            world.bits, world.back = cells, np.zeros(cells.shape, dtype=np.uint64)
+            world.height, world.width, world.words = cells.shape[0], checkpoint.width, cells.shape[1]
+        else:
+            if checkpoint.width is not None:
+                cells = PackedWorld.unpack(cells, checkpoint.width)
+            if world.path is not None:
+                if world.world.shape != cells.shape:
+                    raise ValueError("a file-backed world of shape {} cannot hold a checkpoint of shape {}".format(
+                        world.world.shape, cells.shape))
+                np.copyto(world.world, cells, casting='unsafe')
+                world.generation = checkpoint.generation
+                world.write_header()
+            elif isinstance(world, InfiniteWorld):
+                # the cells go back where they were saved, cells of a bounded world start at (0, 0)
+                world.clear()
+                world.place(cells, *(checkpoint.origin or (0, 0)))
+            else:
+                world.world = cells
+                world.height, world.width = cells.shape
+        world.edits = []
+        self.set_world(world)
+        self.generation = checkpoint.generation
+        self.start_age = checkpoint.start_age
+        self.set_rules(checkpoint.rules)
+
+    def start_checkpoints(self, path: str, every: int, compress: bool = True) -> None:
+        """
+        Makes ``update`` write a checkpoint to ``path`` every ``every`` generations, on a background thread so stepping
+        continues while it is written. Only the copy of the cells is made in the step itself; a checkpoint that falls due
+        while the previous one is still being written is skipped.
+
+        :param path: file that every checkpoint overwrites.
+        :param every: number of generations between checkpoints.
+        :param compress: (optional) whether to compress the cells.
+        """
+        self.stop_checkpoints()
+        self.checkpointer = Checkpointer(path, every, compress)
+
+    def stop_checkpoints(self) -> None:
+        """
+        Stops writing checkpoints, after waiting for the one being written.
+        """
+        if self.checkpointer is not None:
+            checkpointer, self.checkpointer = self.checkpointer, None
+            checkpointer.wait()
+
+    def __checkpoint__(self) -> Checkpoint:
+        """Returns a checkpoint of the current generation, sharing the cells of the world; the packed bits of a
+        ``PackedWorld``, which are 64 times smaller than its unpacked cells"""
+        world = self.get_world()
+        if isinstance(world, PackedWorld):
+            return Checkpoint(self.generation, self.rules, self.mode, self.start_age, self.max_age, world.bits, world.width)
+        if isinstance(world, InfiniteWorld):
+            return Checkpoint(self.generation, self.rules, self.mode, self.start_age, self.max_age, world.world,
+                              origin=world.origin)
+        return Checkpoint(self.generation, self.rules, self.mode, self.start_age, self.max_age, world.world)
+
+    def advance(self, generations: int) -> World:
+        """
+        Advances the world by a number of generations. The hashlife engine jumps by the powers of two making up
+        ``generations`` and only converts its universe back into the world once; other engines update repeatedly.
+
+        :param generations: number of generations to advance.
+        :return: New state of the world.
+        """
+        if self.engine != 'hashlife':
+            if self.__period__() is not None:
+                # the world repeats every period generations: skip whole cycles
+                skipped = generations - generations % self.period
+                before, self.generation = self.generation, self.generation + skipped
+                generations -= skipped
+                for key in self.hashes:
+                    self.hashes[key] += skipped
+                if skipped and self.world.path is not None:
+                    self.world.generation = self.generation
+                    self.world.write_header()
+                # a checkpoint that fell due during the skipped cycles holds the same cells as the current generation
+                if self.checkpointer is not None and self.generation // self.checkpointer.every > before // self.checkpointer.every:
+                    self.checkpointer.submit(self.__checkpoint__())
+            for _ in range(generations):
+                self.update()
+            return self.world
+
+        self.__sync_hashlife__(self.world.pop_edits())
+        self.hashlife.advance(generations)
+        self.__check_hashlife__()
+        self.generation += generations
+        self.hashlife_stale = True
+        self.hashed_front = None
+        return self.get_world()
+
+    def __sync_hashlife__(self, edits: List[Tuple[int, int, int, int]]) -> None:
+        """
+        Imports the world into the HashLife universe when the world was replaced or edited since the last export.
+        Edits made to a world that has not been updated since ``advance`` are discarded. A world with living cells on
+        its edges is refused, as their neighbours wrap around on the torus but not on the unbounded plane.
+        """
+        if self.hashlife is None:
+            from HashLife import HashLife
+            self.hashlife = HashLife(self.rule.birth, self.rule.survival)
+        elif self.hashlife_stale or (self.world.world is self.hashlife_front and not edits):
+            return
+        cells = self.world.world
+        if cells[0].any() or cells[-1].any() or cells[:, 0].any() or cells[:, -1].any():
+            raise ValueError("the hashlife engine steps an unbounded plane, which cannot hold living cells on the edges "
+                             "of a toroidal world")
+        self.hashlife.from_array(cells)
+        self.hashlife_front = cells
+
+    def __check_hashlife__(self) -> None:
+        """Warns when living cells of the universe reached the edges of the world or left it, from where the plane no
+        longer matches the torus"""
+        inner = self.hashlife.get_population_in(1, 1, self.world.width - 2, self.world.height - 2)
+        if inner != self.hashlife.get_population():
+            warnings.warn("living cells reached the edges of the world, where the unbounded hashlife engine no longer "
+                          "matches the toroidal world", RuntimeWarning, stacklevel=3)
+
+    def __update_sparse__(self, edits: List[Tuple[int, int, int, int]]) -> None:
+        """
+        Writes the next generation into the back buffer, only evaluating tiles that changed in the previous generation
+        (or overlap the rectangles edited through ``World.set`` or ``World.place``) and the tiles around them. All other
+        tiles of the back buffer already hold their current state, since they did not change between the two buffered
+        generations.
+        """
+        front, back = self.world.world, self.world.back_buffer()
+        size = self.tile_size
+        tiles_y, tiles_x = -(-front.shape[0] // size), -(-front.shape[1] // size)
+
+        if self.changed_tiles is None or front is not self.sparse_front:
+            tiles = [(ty, tx) for ty in range(tiles_y) for tx in range(tiles_x)]
+        else:
+            sources = set(self.changed_tiles)
+            for left, top, right, bottom in edits:
+                sources.update((ty, tx) for ty in range(top // size, (bottom - 1) // size + 1)
+                               for tx in range(left // size, (right - 1) // size + 1))
+            tiles = {((ty+dy) % tiles_y, (tx+dx) % tiles_x) for ty, tx in sources for dy in (-1, 0, 1) for dx in (-1, 0, 1)}
+
+        self.changed_tiles = set()
+        for ty, tx in tiles:
+            if self.__update_tile__(front, back, ty*size, tx*size):
+                self.changed_tiles.add((ty, tx))
+        self.active_tiles = len(tiles)
+        self.sparse_front = back
+
+    def __update_tile__(self, front: np.ndarray, back: np.ndarray, top: int, left: int) -> bool:
+        """Writes the next state of the tile at ``(left, top)`` into ``back`` and tells whether the tile changed"""
+        height, width = front.shape
+        bottom, right = min(top + self.tile_size, height), min(left + self.tile_size, width)
+        scratch = self.__scratch__((bottom-top, right-left))
+        padded = scratch['padded']
+
+        if top > 0 and left > 0 and bottom < height and right < width:
+            self.alive(front[top-1:bottom+1, left-1:right+1], out=padded)
+        else:
+            # tiles on the edge of the world read their neighbours from the opposite side
+            rows = np.arange(top-1, bottom+1) % height
+            columns = np.arange(left-1, right+1) % width
+            self.alive(front[np.ix_(rows, columns)], out=padded)
+
+        Simulator.count_neighbours(padded, out=scratch['counts'])
+        self.apply_rules(front[top:bottom, left:right], scratch['counts'], out=back[top:bottom, left:right])
+        return not np.array_equal(front[top:bottom, left:right], back[top:bottom, left:right])
+
+    def get_active_tiles(self) -> int:
+        """
+        Returns the number of tiles the sparse engine evaluated to calculate the current generation.
+
+        :return: number of active tiles.
+        """
+        return self.active_tiles
+
+    def next_generation(self, cells: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+        """
+        Calculates the next state of a whole (toroidal) array of cells at once, equivalent to applying ``life_rules``
+        to every cell of ``cells``. Intermediate results live in preallocated scratch buffers, so repeated calls with
+        the same shape and an ``out`` array do not allocate.
+
+        :param cells: 2D array of cell states.
+        :param out: (optional) array receiving the next generation; must not be ``cells``.
+        :return: array with the states of the next generation.
+        """
+        if out is None:
+            out = np.empty_like(cells)
+        start = time.perf_counter() if self.phases is not None else None
+        scratch = self.__scratch__(cells.shape)
+        padded = scratch['padded']
+        self.alive(cells, out=padded[1:-1, 1:-1])
+        Simulator.wrap_edges(padded)
+        Simulator.count_neighbours(padded, out=scratch['counts'])
+        if start is None:
+            return self.apply_rules(cells, scratch['counts'], out)
+        counted = time.perf_counter()
+        self.apply_rules(cells, scratch['counts'], out)
+        self.__add_phases__(start, counted)
+        return out
+
+    def step_rows(self, front: np.ndarray, back: np.ndarray, top: int, bottom: int) -> None:
+        """
+        Writes the next generation of rows ``top`` up to ``bottom`` of ``front`` into ``back``, reading one halo row
+        above and below. Rows and columns wrap around, as in ``World.get_neighbours``.
+
+        :param front: array holding the current generation.
+        :param back: array receiving the next generation.
+        :param top: first row.
+        :param bottom: row after the last row.
+        """
+        start = time.perf_counter() if self.phases is not None else None
+        height, width = front.shape
+        scratch = self.__scratch__((bottom-top, width))
+        padded = scratch['padded']
+        if top > 0 and bottom < height:
+            self.alive(front[top-1:bottom+1], out=padded[:, 1:-1])
+        else:
+            self.alive(front.take(np.arange(top-1, bottom+1) % height, axis=0), out=padded[:, 1:-1])
+        padded[:, 0] = padded[:, -2]
+        padded[:, -1] = padded[:, 1]
+        Simulator.count_neighbours(padded, out=scratch['counts'])
+        counted = time.perf_counter() if start is not None else None
+        self.apply_rules(front[top:bottom], scratch['counts'], out=back[top:bottom])
+        if start is not None:
+            self.__add_phases__(start, counted)
+
+    def step_tiles(self, padded: np.ndarray) -> np.ndarray:
+        """
+        Calculates the next state of the interiors of a stack of padded tiles, as passed by ``InfiniteWorld``. The
+        borders are not wrapped around: they hold the cells of the neighbouring tiles.
+
+        :param padded: array of shape ``(n, size + 2, size + 2)`` with cell states.
+        :return: array of shape ``(n, size, size)`` with the states of the next generation.
+        """
+        start = time.perf_counter() if self.phases is not None else None
+        counts = Simulator.count_neighbours(self.alive(padded).view(np.uint8))
+        counted = time.perf_counter() if start is not None else None
+        out = self.apply_rules(padded[:, 1:-1, 1:-1], counts, np.empty(counts.shape, dtype=padded.dtype))
+        if start is not None:
+            self.__add_phases__(start, counted)
+        return out
+
+    def __count_ages__(self, cells: np.ndarray, population: int) -> np.ndarray:
+        """Counts the cells of every age, comparing the cells with every age when there are few, which is faster than
+        ``np.bincount`` converting all cells to indices"""
+        if self.max_age > 16 or isinstance(self.world, (PackedWorld, InfiniteWorld)):
+            return np.bincount(cells.ravel(), minlength=self.max_age + 1)
+        flags = self.__scratch__(cells.shape)['marks'][2]
+        ages = np.zeros(self.max_age + 1, dtype=np.intp)
+        for age in range(1, self.max_age + 1):
+            ages[age] = np.count_nonzero(np.equal(cells, age, out=flags))
+        ages[0] = cells.size - population
+        return ages
+
+    def __add_phases__(self, start: float, counted: float) -> None:
+        """Adds the time from ``start`` to ``counted`` to neighbour counting, and from then on to applying the rules"""
+        self.phases[0] += counted - start
+        self.phases[1] += time.perf_counter() - counted
+
+    def alive(self, cells: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+        """
+        Marks the cells that count as living neighbours under the current rules, see ``Rule.alive``.
+
+        :param cells: array of cell states.
+        :param out: (optional) array receiving the marks.
+        :return: array of marks, ``1`` for living cells.
+        """
+        return self.rule.alive(cells, out=out)
+
+    def apply_rules(self, cells: np.ndarray, counts: np.ndarray, out: np.ndarray) -> np.ndarray:
+        """
+        Applies the rules to an array of cells, given the number of living neighbours of every cell, by looking up
+        every (neighbours, state) pair in the compiled rule table. States beyond the table are read as its last state and
+        negative states as dead, like ``Rule.next_state`` does.
+
+        :param cells: array of cell states.
+        :param counts: array of the same shape with neighbour counts, of type ``np.intp``; overwritten by the lookup indices.
+        :param out: array receiving the next states.
+        :return: ``out``.
+        """
+        rows = len(self.rule.table)
+        if cells.size and (np.iinfo(cells.dtype).min < 0 or np.iinfo(cells.dtype).max >= rows):
+            # a state outside of the table would index the table of another neighbour count
+            if cells.min() < 0 or cells.max() >= rows:
+                cells = np.clip(cells, 0, rows - 1)
+        np.multiply(counts, rows, out=counts)
+        np.add(counts, cells, out=counts)
+        np.take(self.rule.flat_table(out.dtype), counts, out=out, mode='clip')
+        return out
+
+    def __scratch__(self, shape) -> dict:
+        """Returns the scratch buffers used by the vectorized engines for arrays of ``shape``, allocating them once"""
+        if shape not in self.scratch:
+            self.scratch[shape] = {
+                'padded': np.zeros((shape[0]+2, shape[1]+2), dtype=np.uint8),
+                'counts': np.empty(shape, dtype=np.intp),
+            }
+        return self.scratch[shape]
+
+    @staticmethod
+    def wrap_edges(padded: np.ndarray) -> None:
+        """
+        Fills the one-cell border of ``padded`` with the opposite edges of its interior, so that neighbours wrap
+        around in the same way as ``World.get_neighbours``.
+
+        :param padded: array whose interior ``[1:-1, 1:-1]`` holds the cells.
+        """
+        padded[0, 1:-1] = padded[-2, 1:-1]
+        padded[-1, 1:-1] = padded[1, 1:-1]
+        padded[:, 0] = padded[:, -2]
+        padded[:, -1] = padded[:, 1]
+
+    @staticmethod
+    def count_neighbours(padded: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+        """
+        Counts the living neighbours of every interior cell of ``padded`` by summing its 8 shifted interior windows.
+        Leading axes, such as the tiles of an ``InfiniteWorld``, are counted independently.
+
+        :param padded: array of living-cell marks with a one-cell border around the cells of interest in its last two axes.
+        :param out: (optional) array receiving the counts, shaped like the interior of ``padded``.
+        :return: array holding neighbour counts (0-8).
+        """
+        height, width = padded.shape[-2]-2, padded.shape[-1]-2
+        if out is None:
+            out = np.empty(padded.shape[:-2] + (height, width), dtype=np.intp)
+        np.add(padded[..., :-2, :-2], padded[..., :-2, 1:-1], out=out)
+        for dy, dx in ((0, 2), (1, 0), (1, 2), (2, 0), (2, 1), (2, 2)):
+            np.add(out, padded[..., dy:dy+height, dx:dx+width], out=out)
+        return out
+
     def get_generation(self):
         """
         Returns the value of the current generation of the simulated Game of Life.
@@ -62,6 +794,10 @@ class Simulator:
 
         :return: current state of the world.
         """
+        if self.hashlife_stale:
+            self.hashlife.to_array(0, 0, self.world.width, self.world.height, out=self.world.world)
+            self.hashlife_front = self.world.world
+            self.hashlife_stale = False
         return self.world
 
     def set_world(self, world: World) -> None:
@@ -71,43 +807,23 @@ class Simulator:
         :param world: new version of the world.
 
         """
+        if self.engine == 'parallel' and world.path is not None:
+            raise ValueError("the parallel engine steps worlds in memory, use the banded engine for a file-backed world")
+        self.close()
         self.world = world
+        self.changed_tiles = None
+        self.hashlife_stale = False
+        self.hashes = OrderedDict()
+        self.hashed_front = None
+        self.period = None
+        self.measured = None
 
     def life_rules(self, x, y) -> int:
-        """Calculates state for current cell by checking some if statements and comparing to rules"""
+        """Calculates state for current cell by counting its living neighbours and looking up the compiled rules"""
         current_age = self.world.get(x, y)
-
-        if self.mode == 'decay of age':
-            alive_neighbours = sum([1 for i in self.world.get_neighbours(x, y) if i > 0])
-            fertile_ages = list(range(2, self.max_age-1))
-
-            # birth
-            if current_age in fertile_ages and alive_neighbours in self.birth_neighbours:
-                next_age = current_age+1
-            # survival
-            elif current_age and alive_neighbours in self.survival_neighbours:
-                next_age = current_age
-            # death
-            else:
-                next_age = current_age-1
-        else:
-            alive_neighbours = self.world.get_neighbours(x, y).count(1)
-
-            # birth
-            if not current_age and alive_neighbours in self.birth_neighbours:
-                next_age = 1
-            # survival
-            elif current_age and alive_neighbours in self.survival_neighbours:
-                next_age = 1
-            # death
-            else:
-                next_age = 0
-
-        # age can not be negative
-        if next_age < 0:
-            next_age = 0
-
-        return next_age
+        alive = self.rule.alive_table
+        alive_neighbours = sum(1 for i in self.world.get_neighbours(x, y) if 0 <= i < len(alive) and alive[i])
+        return self.rule.next_state(current_age, alive_neighbours)
 
     @staticmethod
     def get_rules_on_index(rules, index) -> List[int]:
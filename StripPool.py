@@ -0,0 +1,155 @@
+import numpy as np
+import multiprocessing as mp
+import weakref
+from multiprocessing import shared_memory
+from multiprocessing.connection import wait
+from World import World
+
+
+def run_worker(name: str, shape, dtype: str, top: int, bottom: int, rules: str, start_age: int, connection) -> None:
+    """
+    Worker process of a ``StripPool``: steps one strip for every ``(front, rules)`` message received on ``connection``
+    and replies when it is done, until it receives ``None``.
+    """
+    from Simulator import Simulator
+
+    memory = shared_memory.SharedMemory(name=name)
+    buffers = None
+    try:
+        buffers = np.ndarray((2,) + tuple(shape), dtype=dtype, buffer=memory.buf)
+        simulator = Simulator(World(1, 1, 0), rules=rules, start_age=start_age, engine='vectorized')
+        while True:
+            message = connection.recv()
+            if message is None:
+                break
+            front, rules = message
+            if rules != simulator.rules:
+                simulator.set_rules(rules)
+            simulator.step_rows(buffers[front], buffers[1-front], top, bottom)
+            connection.send(True)
+    finally:
+        del buffers
+        memory.close()
+
+
+class StripPool:
+    """
+    Pool of worker processes that step a ``World`` in parallel. The world is split into horizontal strips, one per worker,
+    and both of its buffers are moved into shared memory so the cells are never pickled. Generations are synchronised
+    through a pipe per worker: the pool tells every worker to step its strip into the back buffer and waits for all of
+    them to reply before the buffers are swapped.
+
+    A worker that dies, also through an error in its step, makes ``step`` raise a ``RuntimeError`` and closes the pool;
+    so does a generation that takes longer than ``timeout`` seconds. The shared memory is also released when the pool is
+    garbage collected or the interpreter exits.
+    """
+
+    # seconds the pool waits for the workers to finish a generation
+    timeout = 600
+
+    def __init__(self, world: World, rules: str, start_age: int = 0, workers: int = None):
+        """
+        Constructor of the pool, which starts the worker processes.
+
+        :param world: world to step; its ``world`` and back buffer are replaced by shared memory.
+        :param rules: rule string used by the workers.
+        :param start_age: (optional) start age used by the workers in decay of age mode.
+        :param workers: (optional) number of worker processes, the number of CPUs when left implicit.
+        """
+        self.world = world
+        self.shape = world.world.shape
+        self.dtype = world.world.dtype
+        self.rules = rules
+        workers = min(workers or mp.cpu_count(), self.shape[0])
+
+        self.memory = shared_memory.SharedMemory(create=True, size=max(2 * world.world.nbytes, 1))
+        buffers = np.ndarray((2,) + self.shape, dtype=self.dtype, buffer=self.memory.buf)
+        self.buffers = (buffers[0], buffers[1])
+        self.buffers[0][...] = world.world
+        world.world, world.back = self.buffers
+
+        bounds = np.linspace(0, self.shape[0], workers + 1).astype(int)
+        self.connections, self.processes = [], []
+        for top, bottom in zip(bounds[:-1], bounds[1:]):
+            connection, other = mp.Pipe()
+            process = mp.Process(target=run_worker, daemon=True,
+                                 args=(self.memory.name, self.shape, self.dtype.str, int(top), int(bottom), rules,
+                                       start_age, other))
+            process.start()
+            # the worker's end is closed here, so a dead worker is noticed as the end of its pipe
+            other.close()
+            self.connections.append(connection)
+            self.processes.append(process)
+        # stops the workers and frees the shared memory once, by ``close`` or when the pool is dropped
+        self.finalizer = weakref.finalize(self, StripPool.__shutdown__, self.memory, self.connections, self.processes)
+
+    def step(self) -> None:
+        """
+        Writes the next generation of the world into its back buffer, using all workers.
+        """
+        world = self.world
+        if world.world is self.buffers[0] or world.world is self.buffers[1]:
+            front = 0 if world.world is self.buffers[0] else 1
+        else:
+            # the cells were replaced after the pool was started: copy them into shared memory
+            self.buffers[0][...] = world.world
+            world.world, world.back = self.buffers
+            front = 0
+        try:
+            for connection in self.connections:
+                connection.send((front, self.rules))
+            for connection, process in zip(self.connections, self.processes):
+                if connection not in wait([connection, process.sentinel], StripPool.timeout):
+                    raise TimeoutError
+                connection.recv()
+        except (OSError, EOFError):
+            stopped = [process.exitcode for process in self.processes if process.exitcode is not None]
+            self.close()
+            raise RuntimeError("a worker of the parallel engine stopped, with exit codes {}".format(stopped)) from None
+        except TimeoutError:
+            self.close()
+            raise RuntimeError("the workers of the parallel engine did not finish a generation within {} seconds".format(
+                StripPool.timeout)) from None
+
+    def set_rules(self, rules: str) -> None:
+        """
+        Changes the rules used by the workers from the next generation on, without restarting them.
+
+        :param rules: rule string, see ``Rule``.
+        """
+        self.rules = rules
+
+    def close(self) -> None:
+        """
+        Stops the workers and releases the shared memory; the world keeps a private copy of its cells.
+        """
+        if self.memory is None:
+            return
+        if self.world.world is self.buffers[0] or self.world.world is self.buffers[1]:
+            self.world.world = self.world.world.copy()
+        self.world.back = np.empty_like(self.world.world)
+        del self.buffers
+        self.finalizer()
+        self.memory = None
+
+    @staticmethod
+    def __shutdown__(memory: shared_memory.SharedMemory, connections, processes) -> None:
+        """Stops the workers, ending those that do not stop in time, and frees the shared memory"""
+        for connection in connections:
+            try:
+                connection.send(None)
+            except OSError:
+                pass
+        for process in processes:
+            process.join(StripPool.timeout)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        for connection in connections:
+            connection.close()
+        memory.unlink()
+        try:
+            memory.close()
+        except BufferError:
+            # arrays of a dropped pool's world still use the memory, which is freed along with them
+            pass
@@ -1,6 +1,11 @@
 import pygame
-from math import floor
+import time
+import numpy as np
+from math import ceil, floor, log2
 from Simulator import Simulator
+from PackedWorld import PackedWorld
+from SimulationWorker import SimulationWorker
+from Metrics import FrameRecord
 
 # COLOURS
 white = (255, 255, 255)
@@ -18,9 +23,16 @@ rainbow = [
     (0, 60, 180),
     (0, 0, 240)
 ]
+# rainbow as lookup table from cell values to pixels, higher values use the last colour
+palette = np.array(rainbow, dtype=np.uint8)
+# shades from dead to living, showing the fraction of living cells in a block when zoomed out beyond a pixel per cell
+shades = np.linspace(rainbow[0], rainbow[1], 256).astype(np.uint8)
+# smallest number of pixels per cell at which grid lines are drawn
+gridZoom = 5
 margin = 20
 panelWidth = 200
 buttonHeight = 50
+framesPerSecond = 30
 
 
 class Visualisation:
@@ -28,13 +40,23 @@ class Visualisation:
     Visualiser for Game of Life ``World``s.
     """
 
-    def __init__(self, simulator: Simulator, size: (int, int) = (800, 600), scale: float = 1) -> None:
+    def __init__(self, simulator: Simulator, size: (int, int) = (800, 600), scale: float = 1,
+                 generations_per_second: float = 2, autorun: bool = True) -> None:
         """
         Constructor to initiate the visualistion. Visualisor requires focus, meaning that it connects to ``Simulator`` object to call ``update()``.
+        The simulator is updated by a ``SimulationWorker`` in the background, while the screen shows its latest generation
+        at a fixed frame rate. Use the up and down keys to double or halve the generations per second, and ``s`` to switch
+        skip-frames mode, in which the simulation runs as fast as possible.
+
+        The world is shown in a viewport: scroll or press ``+`` and ``-`` to zoom, drag with the right mouse button to pan
+        and press ``f`` to fit the whole world. Only the visible cells are drawn. Zoomed out beyond one pixel per cell,
+        every pixel shows a block of cells: the fraction of living cells, or the highest age in decay of age mode.
 
         :param simulator: ``Simulator``-object used to evolve the state of the world.
         :param size: tuple to indicate the desired screen size. Typical values are (800, 600), (1024, 768), (1280, 1024), etc.
-        :param scale: float to indicate the draw-scale: 1 = 100%, 0.5 = 50%, etc.
+        :param scale: float to indicate the largest draw-scale: 1 = 100%, 0.5 = 50%, etc.; zoomed out to fit the world.
+        :param generations_per_second: (optional) target speed of the simulation.
+        :param autorun: (optional) whether to start the event loop right away; otherwise call ``run``.
         """
         pygame.init()
         pygame.font.init()
@@ -42,8 +64,16 @@ class Visualisation:
         self.size = size
         self.org_scale = scale
         self.scale = scale
+        # pixels per cell, and the location of the cell at the top left of the viewport
+        self.zoom = margin * scale
+        self.view = [0.0, 0.0]
         self.__determineScale__()
-        self.scaled_margin = margin * self.scale
+        # block reductions of the shown cells by zoomed-out factor, for the cells in ``lod_cells``
+        self.lod = {}
+        self.lod_cells = None
+        # grid lines on a transparent overlay covering the viewport, for the zoom and viewport size in ``grid_key``
+        self.grid = None
+        self.grid_key = None
         self.paused = True
         self.font = pygame.font.SysFont("Arial", 16)
         self.surface = pygame.display.set_mode((self.size[0], self.size[1]))
@@ -53,19 +83,45 @@ class Visualisation:
         self.done = False
         self.editable = True
         self.clock = pygame.time.Clock()
+        self.frame_time = 0.0
+        self.observers = []
+        self.needs_redraw = True
+        self.worker = SimulationWorker(simulator, generations_per_second)
+        # latest snapshot shown; the cells of the world itself until the simulation is started
+        self.generation = simulator.get_generation()
+        self.cells = None
+
+        if autorun:
+            self.run()
 
-        while not self.done:
-            self.__handle_events__()
+    def run(self) -> None:
+        """
+        Runs the event loop until the window is closed, then stops the worker.
+        """
+        try:
+            while not self.done:
+                self.__handle_events__()
 
-            if not self.editable and not self.paused:
-                self.simulator.update()
+                snapshot = self.worker.latest()
+                if snapshot is not None and snapshot[0] != self.generation:
+                    self.generation, self.cells = snapshot
+                    self.needs_redraw = True
 
-            self.__redraw__()
+                if self.needs_redraw:
+                    self.__redraw__()
+                    self.needs_redraw = False
 
-            if self.editable:
-                self.clock.tick(10) # 10 fps when editing (for responsiveness)
-            else:
-                self.clock.tick(2) # 2 fps otherwise (to slow down simulation)
+                self.clock.tick(framesPerSecond)
+        finally:
+            self.worker.stop()
+
+    def add_observer(self, observer) -> None:
+        """
+        Registers a function to be called with a ``FrameRecord`` after every redraw, such as a ``Metrics`` object.
+
+        :param observer: function called with the record of a frame.
+        """
+        self.observers.append(observer)
 
     def __handle_events__(self) -> None:
         """
@@ -74,58 +130,203 @@ class Visualisation:
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 self.done = True
-            if event.type == pygame.MOUSEBUTTONDOWN:
+            if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
                 (mouseX, mouseY) = pygame.mouse.get_pos()
-                if mouseX > self.scaled_margin and mouseX < self.scaled_margin + self.simulator.get_world().width * self.scaled_margin:
-                    if mouseY > self.scaled_margin and mouseY < self.scaled_margin + self.simulator.get_world().height * self.scaled_margin:
-                        x = floor((mouseX - self.scaled_margin) / self.scaled_margin)
-                        y = floor((mouseY - self.scaled_margin) / self.scaled_margin)
-                        oldValue = self.simulator.get_world().get(x, y)
+                if self.__view_rect__().collidepoint(mouseX, mouseY):
+                    x, y = self.cell_at(mouseX, mouseY)
+                    world = self.simulator.get_world()
+                    if self.editable and 0 <= x < world.width and 0 <= y < world.height:
+                        oldValue = world.get(x, y)
                         newValue = (oldValue + 1) % 9
-                        if self.editable:
-                            self.simulator.get_world().set(x, y, newValue)
+                        world.set(x, y, newValue)
+                        self.lod = {}
+                        self.__redraw_cell__(x, y)
                 if mouseX > self.size[0] - panelWidth + margin and mouseX < self.size[0] - margin:
                     if mouseY > margin*3 and mouseY < margin*3+buttonHeight:
                         self.editable = False
                         self.paused = not self.paused
+                        if self.paused:
+                            self.worker.pause()
+                        else:
+                            self.worker.resume()
+                        self.needs_redraw = True
+            if event.type == pygame.MOUSEMOTION and event.buttons[2]:
+                self.pan(-event.rel[0], -event.rel[1])
+            if event.type == pygame.MOUSEWHEEL and event.y:
+                self.zoom_at(2 if event.y > 0 else 0.5, pygame.mouse.get_pos())
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_UP:
+                    self.worker.set_rate(self.worker.generations_per_second * 2)
+                elif event.key == pygame.K_DOWN:
+                    self.worker.set_rate(self.worker.generations_per_second / 2)
+                elif event.key == pygame.K_s:
+                    self.worker.set_skip_frames(not self.worker.skip_frames)
+                elif event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+                    self.zoom_at(2, self.__view_rect__().center)
+                elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                    self.zoom_at(0.5, self.__view_rect__().center)
+                elif event.key == pygame.K_f:
+                    self.__determineScale__()
+                self.needs_redraw = True
 
     def __determineScale__(self) -> None:
         """
-        Determine and adapts the scale factor of the display to fit the requested world.
+        Determines the zoom at which the whole world fits the viewport, at most the requested scale, and shows the
+        world from its top left cell. Below one pixel per cell the zoom is a power of two, so every pixel shows a whole
+        block of cells.
+        """
+        world = self.simulator.get_world()
+        view = self.__view_rect__()
+        fit = min(view.width / max(world.width, 1), view.height / max(world.height, 1))
+        self.zoom = min(margin * self.org_scale, fit)
+        if self.zoom < 1:
+            self.zoom = 2.0 ** floor(log2(self.zoom))
+        self.view = [0.0, 0.0]
+        self.needs_redraw = True
+
+    def __view_rect__(self) -> pygame.Rect:
+        """Returns the part of the window showing the cells, left of the panel"""
+        return pygame.Rect(margin, margin, self.size[0] - panelWidth - margin, self.size[1] - 2 * margin)
+
+    def cell_at(self, x: float, y: float) -> (int, int):
+        """
+        Returns the cell shown at a location in the window.
+
+        :param x: column of the pixel.
+        :param y: row of the pixel.
+        :return: tuple of the column-value and row-value of the cell, which may lie outside the world.
+        """
+        view = self.__view_rect__()
+        return floor(self.view[0] + (x - view.x) / self.zoom), floor(self.view[1] + (y - view.y) / self.zoom)
+
+    def pan(self, dx: float, dy: float) -> None:
         """
-        # scale too big:
-        while self.scale*(self.simulator.get_world().height+2)*margin > self.size[1] and self.scale*(self.simulator.get_world().width+2)*margin > self.size[0] - panelWidth:
-            self.scale = round(self.scale*0.9, 2)
+        Moves the viewport.
 
-        # scale too small:
-        if floor(self.scale * margin) < 5:
-            self.scale = 5/margin
+        :param dx: pixels to move to the right.
+        :param dy: pixels to move down.
+        """
+        self.view[0] += dx / self.zoom
+        self.view[1] += dy / self.zoom
+        self.needs_redraw = True
 
+    def zoom_at(self, factor: float, location: (int, int)) -> None:
+        """
+        Zooms in or out, keeping the cell at a location of the window in place. Below one pixel per cell the zoom is
+        rounded down to a power of two.
+
+        :param factor: factor by which cells grow, below 1 to zoom out.
+        :param location: pixel that stays on the same cell.
+        """
+        view = self.__view_rect__()
+        x, y = (location[0] - view.x) / self.zoom + self.view[0], (location[1] - view.y) / self.zoom + self.view[1]
+        zoom = self.zoom * factor
+        if zoom < 1:
+            zoom = 2.0 ** floor(log2(zoom))
+        # no closer than the viewport holding a single cell, no further than the world fitting a single pixel
+        world = self.simulator.get_world()
+        self.zoom = min(max(zoom, 2.0 ** -ceil(log2(max(world.width, world.height, 1)))), float(min(view.size)))
+        self.view = [x - (location[0] - view.x) / self.zoom, y - (location[1] - view.y) / self.zoom]
+        self.needs_redraw = True
+
+    def level_of_detail(self, cells: np.ndarray, factor: int) -> np.ndarray:
+        """
+        Returns the cells reduced to one value per block of ``factor`` by ``factor`` cells: the highest age in decay of
+        age mode, otherwise the number of living cells. The reductions are cached per factor until other cells are
+        shown, so panning and zooming back and forth only reduce the board once per generation. The cells of a
+        ``PackedWorld`` are unpacked one band of rows at a time.
+
+        :param cells: 2D array of cell states, or a ``PackedWorld``.
+        :param factor: number of cells per block along each side.
+        :return: array of ``ceil(height / factor)`` by ``ceil(width / factor)`` values.
+        """
+        packed = isinstance(cells, PackedWorld)
+        if (cells.bits if packed else cells) is not self.lod_cells:
+            self.lod, self.lod_cells = {}, cells.bits if packed else cells
+        if factor not in self.lod:
+            decay = self.simulator.mode == 'decay of age'
+            height, width = (cells.height, cells.width) if packed else cells.shape
+            reduced = np.empty((-(-height // factor), -(-width // factor)),
+                               dtype=cells.dtype if decay else np.min_scalar_type(factor * factor))
+            # bands of whole blocks of rows keep the marks of living cells small for huge worlds
+            band = max(1, Simulator.band_cells // max(width * factor, 1)) * factor
+            for top in range(0, height, band):
+                rows = cells.region(0, top, width, top + band) if packed else cells[top:top+band]
+                values = rows if decay else self.simulator.alive(rows).view(np.uint8)
+                reduced[top//factor:(top+band)//factor] = Visualisation.block_reduce(values, factor, decay, reduced.dtype)
+            self.lod[factor] = reduced
+        return self.lod[factor]
+
+    @staticmethod
+    def block_reduce(values: np.ndarray, factor: int, maximum: bool, dtype=None) -> np.ndarray:
+        """
+        Reduces every block of ``factor`` by ``factor`` values to their maximum or sum, blocks at the bottom and right
+        edges being cut short. Rows are reduced first, combining whole rows at a time, which is much faster than
+        reducing both axes of the blocks at once.
+
+        :param values: 2D array.
+        :param factor: number of values per block along each side.
+        :param maximum: whether to take the maximum rather than the sum.
+        :param dtype: (optional) type of the sums.
+        :return: array of ``ceil(height / factor)`` by ``ceil(width / factor)`` values.
+        """
+        reduce = np.maximum.reduce if maximum else lambda array, axis: np.add.reduce(array, axis, dtype=dtype)
+        height, width = values.shape
+        full = height - height % factor
+        rows = reduce(values[:full].reshape(full // factor, factor, width), 1)
+        if full < height:
+            rows = np.concatenate([rows, reduce(values[full:], 0)[None]])
+        full = width - width % factor
+        if factor <= 16:
+            # few columns per block: combine every column of a block across all blocks at once
+            columns = [rows[:, offset:full:factor] for offset in range(factor)]
+            blocks = reduce(np.stack(columns), 0)
+        else:
+            blocks = reduce(rows[:, :full].reshape(rows.shape[0], full // factor, factor), 2)
+        if full < width:
+            blocks = np.concatenate([blocks, reduce(rows[:, full:], 1)[:, None]], axis=1)
+        return blocks
 
     def __redraw__(self) -> None:
         """
         Internal method to redraw the elements of the visualisation.
         """
+        start = time.perf_counter()
+
         # Clean the canvas
         self.surface.fill(white)
 
-        # Draw the cells
-        for y in range(self.simulator.get_world().height):
-            for x in range(self.simulator.get_world().width):
-                pygame.draw.rect(self.surface, rainbow[self.simulator.get_world().get(x,y)], ((x+1) * self.scaled_margin, (y + 1) * self.scaled_margin, self.scaled_margin, self.scaled_margin))
-        # Draw vertical lines
-        for y in range(self.simulator.get_world().height+1):
-            pygame.draw.line(self.surface, black, (self.scaled_margin, (y + 1) * self.scaled_margin), ((self.simulator.get_world().width + 1) * self.scaled_margin, (y + 1) * self.scaled_margin))
-        # Draw horizontal lines
-        for x in range(self.simulator.get_world().width+1):
-            pygame.draw.line(self.surface, black, ((x+1) * self.scaled_margin, self.scaled_margin), ((x + 1) * self.scaled_margin, (self.simulator.get_world().height + 1) * self.scaled_margin))
+        # Draw the visible cells only, clipped to the viewport
+        cells = self.cells if self.cells is not None else self.simulator.get_world()
+        if not isinstance(cells, (np.ndarray, PackedWorld)):
+            cells = cells.world
+        view = self.__view_rect__()
+        self.surface.set_clip(view)
+        if self.zoom >= 1:
+            # map the states of the visible cells to pixels through the palette, then scale them to the cell size
+            if isinstance(cells, PackedWorld):
+                # only the visible cells of packed bits are unpacked
+                left, top = max(0, floor(self.view[0])), max(0, floor(self.view[1]))
+                right, bottom = ceil(self.view[0] + view.width / self.zoom), ceil(self.view[1] + view.height / self.zoom)
+                self.__draw_cells__(cells.region(left, top, right, bottom), palette, 1, self.zoom, view, origin=(left, top))
+            else:
+                self.__draw_cells__(cells, palette, 1, self.zoom, view)
+        else:
+            # every pixel shows a block of cells, reduced once per generation and zoom level
+            factor = round(1 / self.zoom)
+            reduced = self.level_of_detail(cells, factor)
+            if self.simulator.mode == 'decay of age':
+                self.__draw_cells__(reduced, palette, factor, 1, view)
+            else:
+                self.__draw_cells__(reduced, shades, factor, 1, view, factor * factor)
+        self.surface.set_clip(None)
 
         panelX = self.size[0] - panelWidth + margin
         panelY = margin
 
         # Generation text
         pygame.draw.rect(self.surface, white, (panelX, panelY, panelWidth-2*margin, buttonHeight))
-        genText = "Generation: "+str(self.simulator.generation)
+        genText = "Generation: "+str(self.generation)
         gt = self.font.render(genText, 0, black)
         self.surface.blit(gt, (panelX, panelY))
 
@@ -139,5 +340,88 @@ class Visualisation:
         (w,h) = self.font.size(ppText)
         self.surface.blit(playPausedText, (panelX+(buttonWidth-w)/2, panelY+(buttonHeight-h)/2))
 
+        # Frame time text, of the previous frame
+        panelY += buttonHeight + margin
+        ftText = "Frame: {:.1f} ms".format(self.frame_time * 1000)
+        self.surface.blit(self.font.render(ftText, 0, black), (panelX, panelY))
+
+        # Speed text
+        panelY += margin
+        speedText = "Speed: max" if self.worker.skip_frames else "Speed: {:g} gen/s".format(self.worker.generations_per_second)
+        self.surface.blit(self.font.render(speedText, 0, black), (panelX, panelY))
+
+        # Zoom text, in pixels per cell or cells per pixel
+        panelY += margin
+        zoomText = "Zoom: {:g} px".format(self.zoom) if self.zoom >= 1 else "Zoom: 1:{}".format(round(1 / self.zoom))
+        self.surface.blit(self.font.render(zoomText, 0, black), (panelX, panelY))
+
         # Write to screen
         pygame.display.update()
+        self.frame_time = time.perf_counter() - start
+        if self.observers:
+            record = FrameRecord(self.generation, self.frame_time)
+            for observer in self.observers:
+                observer(record)
+
+    def __draw_cells__(self, values: np.ndarray, colours: np.ndarray, factor: int, size: float, view: pygame.Rect,
+                       count: int = None, origin: (int, int) = (0, 0)) -> None:
+        """
+        Internal method to draw the part of an array of cells, or of blocks of ``factor`` cells, inside the viewport,
+        ``size`` pixels per value. Values are looked up in ``colours``, after scaling them from ``0..count`` to the
+        colours when given. The array may hold only part of the values, whose first one is at ``origin``. Grid lines
+        separate cells of at least ``gridZoom`` pixels.
+        """
+        left, top = self.view[0] / factor, self.view[1] / factor
+        x0, y0 = max(origin[0], floor(left)), max(origin[1], floor(top))
+        x1 = min(origin[0] + values.shape[1], ceil(left + view.width / size))
+        y1 = min(origin[1] + values.shape[0], ceil(top + view.height / size))
+        if x0 >= x1 or y0 >= y1:
+            return
+        visible = values[y0-origin[1]:y1-origin[1], x0-origin[0]:x1-origin[0]]
+        if count is not None:
+            # widened first, as the counts are stored in the smallest type that holds them
+            visible = visible.astype(np.intp) * (len(colours) - 1) // count
+        pixels = colours[np.clip(visible, 0, len(colours)-1).astype(np.intp, copy=False)]
+        position = (view.x + round((x0 - left) * size), view.y + round((y0 - top) * size))
+        surface = pygame.surfarray.make_surface(pixels.swapaxes(0, 1))
+        if size != 1:
+            surface = pygame.transform.scale(surface, (round((x1 - x0) * size), round((y1 - y0) * size)))
+        self.surface.blit(surface, position)
+        if size >= gridZoom:
+            # the overlay starts on a cell corner, so it is blitted at the first visible cell, cut off at the world's edge
+            grid = self.__prepare_grid__(size, view)
+            self.surface.blit(grid, position, (0, 0, round((x1 - x0) * size) + 1, round((y1 - y0) * size) + 1))
+
+    def __prepare_grid__(self, size: float, view: pygame.Rect) -> pygame.Surface:
+        """
+        Internal method returning the grid lines for cells of ``size`` pixels, drawn once on a transparent overlay a cell
+        larger than the viewport, so it covers the viewport at any sub-cell offset. It is redrawn only when the zoom or
+        the viewport changes.
+        """
+        if self.grid_key != (size, view.size):
+            columns, rows = ceil(view.width / size) + 1, ceil(view.height / size) + 1
+            width, height = round(columns * size) + 1, round(rows * size) + 1
+            self.grid = pygame.Surface((width, height), pygame.SRCALPHA)
+            for y in range(rows + 1):
+                pygame.draw.line(self.grid, black, (0, y * size), (width, y * size))
+            for x in range(columns + 1):
+                pygame.draw.line(self.grid, black, (x * size, 0), (x * size, height))
+            self.grid_key = (size, view.size)
+        return self.grid
+
+    def __redraw_cell__(self, x: int, y: int) -> None:
+        """
+        Internal method to redraw a single cell after it was edited, updating only its part of the screen. Zoomed out
+        beyond a pixel per cell, the whole viewport is redrawn instead.
+        """
+        if self.zoom < 1:
+            self.needs_redraw = True
+            return
+        value = self.simulator.get_world().get(x, y)
+        view = self.__view_rect__()
+        rect = pygame.Rect(view.x + round((x - self.view[0]) * self.zoom), view.y + round((y - self.view[1]) * self.zoom),
+                           ceil(self.zoom) + 1, ceil(self.zoom) + 1).clip(view)
+        pygame.draw.rect(self.surface, rainbow[min(max(value, 0), len(rainbow)-1)], rect)
+        if self.zoom >= gridZoom:
+            pygame.draw.rect(self.surface, black, rect, 1)
+        pygame.display.update(rect)
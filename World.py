@@ -1,25 +1,108 @@
 import numpy as np
-from typing import List
+import struct
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import List, Tuple
+
+# header of file-backed worlds: magic, version, front buffer, width, height, generation, cell type, rule string
+header_format = '<4sHHQQQ16s64s'
+header_size = 128
+magic = b'GOLW'
+# offsets ``(dx, dy)`` of the 8 neighbours, in the order of ``World.get_neighbours``
+neighbour_offsets = ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1))
 
 class World:
     """
     Data structure for representing Game of Life worlds.
+
+    The cells are double-buffered: ``world`` is the front buffer holding the current generation, a step writes the
+    next generation into ``back_buffer()`` and then calls ``swap()``.
+
+    A world can be file-backed, keeping both buffers in an ``np.memmap`` behind a small header with the size, generation
+    and rules. Such a world is created by passing ``path`` and reopened with ``World.open``.
     """
 
-    def __init__(self, width: int, height: int = -1, fill_cells: float = 0.5):
+    # location of file-backed worlds, None for worlds in memory
+    path = None
+    # marks and values with a one-cell border, reused by ``neighbour_counts`` and ``get_neighbourhoods``
+    padded = None
+    padded_values = None
+    generation = 0
+    rules = ''
+
+    def __init__(self, width: int, height: int = -1, fill_cells: float = 0.5, dtype=np.int64, path: str = None,
+                 rules: str = ''):
         """
         Constructor of World datatype.
 
         :param width: integer representing the width of the world.
         :param height: (optional) integer representing the height of the world. If left implicit, the value of ``width`` is used to create a square-shaped world.
         :param alive_cells: percentage alive cells, filled with 1
+        :param dtype: (optional) integer type of the cells, e.g. ``np.uint8`` to store ages in one byte per cell.
+        :param path: (optional) file to create for a file-backed world; an existing file is overwritten.
+        :param rules: (optional) rule string stored in the header of a file-backed world.
         """
         self.width = width
         if not height == -1:
             self.height = height
         else:
             self.height = width
-        self.world = np.random.binomial(1, fill_cells, self.height * self.width).reshape(self.height, self.width)
+        self.edits = []
+
+        if path is None:
+            self.world = np.random.binomial(1, fill_cells, self.height * self.width).reshape(self.height, self.width).astype(dtype, copy=False)
+            self.back = np.empty_like(self.world)
+            return
+
+        self.path = path
+        self.rules = rules
+        with open(path, 'wb') as file:
+            file.truncate(header_size + 2 * self.height * self.width * np.dtype(dtype).itemsize)
+        self.__map__(np.dtype(dtype), 0)
+        self.write_header()
+        # filling in bands of rows keeps the memory needed for random numbers bounded
+        band = max(1, (1 << 22) // self.width)
+        for top in range(0, self.height, band):
+            rows = self.world[top:top+band]
+            rows[...] = np.random.random_sample(rows.shape) < fill_cells
+        self.buffers.flush()
+
+    @classmethod
+    def open(cls, path: str) -> 'World':
+        """
+        Opens a file-backed world. Only the header is read, the cells are loaded by the operating system when used.
+
+        :param path: file created by ``World(..., path=path)``.
+        :return: World with the generation and rules stored in the file.
+        """
+        with open(path, 'rb') as file:
+            fields = struct.unpack(header_format, file.read(struct.calcsize(header_format)))
+        if fields[0] != magic:
+            raise ValueError("'{}' is not a file-backed world".format(path))
+        front, width, height, generation = fields[2:6]
+        world = cls.__new__(cls)
+        world.width, world.height = width, height
+        world.edits = []
+        world.path = path
+        world.generation = generation
+        world.rules = fields[7].rstrip(b'\0').decode()
+        world.__map__(np.dtype(fields[6].rstrip(b'\0').decode()), front)
+        return world
+
+    def __map__(self, dtype: np.dtype, front: int) -> None:
+        """Maps both buffers of the file, making buffer ``front`` the current generation"""
+        self.buffers = np.memmap(self.path, dtype=dtype, mode='r+', offset=header_size, shape=(2, self.height, self.width))
+        self.mapped = (self.buffers[0], self.buffers[1])
+        self.world, self.back = self.mapped[front], self.mapped[1-front]
+
+    def write_header(self) -> None:
+        """
+        Writes the size, front buffer, generation and rules into the header of a file-backed world.
+        """
+        front = 1 if self.world is self.mapped[1] else 0
+        header = struct.pack(header_format, magic, 1, front, self.width, self.height, self.generation,
+                             self.world.dtype.str.encode(), self.rules.encode())
+        with open(self.path, 'r+b') as file:
+            file.write(header)
 
 
     def get(self, x: int, y: int) -> int:
@@ -34,6 +117,18 @@ class World:
             return -1
         return self.world[y][x]
 
+    def region(self, left: int, top: int, right: int, bottom: int) -> np.ndarray:
+        """
+        Returns the cells of a rectangle, clipped to the world like a slice.
+
+        :param left: first column of the rectangle.
+        :param top: first row of the rectangle.
+        :param right: column after the last one.
+        :param bottom: row after the last one.
+        :return: view of the cells, indexed ``[row, column]`` from the clipped top left corner.
+        """
+        return self.world[max(0, top):max(0, bottom), max(0, left):max(0, right)]
+
     def set(self, x: int, y: int, value:int = 1) -> None:
         """
         Sets the state of ``(x, y)`` to the given value.
@@ -45,6 +140,63 @@ class World:
         if x < 0 or y < 0 or x >= self.width or y >= self.height:
             return
         self.world[y][x] = value
+        self.edits.append((x, y, x + 1, y + 1))
+
+    def pop_edits(self) -> List[Tuple[int, int, int, int]]:
+        """
+        Returns the rectangles changed through ``set`` and ``place`` since the previous call, and forgets them. A cell
+        set through ``set`` is a rectangle of one cell, a placed pattern adds a rectangle per part of it that changed.
+
+        :return: ``List`` of ``(left, top, right, bottom)`` rectangles, the latter two exclusive.
+        """
+        edits, self.edits = self.edits, []
+        return edits
+
+    def place(self, pattern, x: int, y: int, wrap: bool = True) -> None:
+        """
+        Copies the cells of a pattern into the world with its top left corner at ``(x, y)``, one slice of rows and
+        columns at a time. The bounding box of the cells that changed in every slice is recorded as an edit, so the
+        bookkeeping does not grow with the size of the pattern.
+
+        :param pattern: ``Pattern`` or 2D array of cell states.
+        :param x: column-value of the top left corner.
+        :param y: row-value of the top left corner.
+        :param wrap: (optional) whether cells beyond an edge continue at the opposite edge, as the world is toroidal;
+            otherwise they are left out.
+        """
+        source = np.asarray(getattr(pattern, 'cells', pattern))
+        # reassigned at the end, for worlds that convert their cells on access
+        cells = self.world
+        for top, bottom, row in World.__spans__(y, source.shape[0], self.height, wrap):
+            for left, right, column in World.__spans__(x, source.shape[1], self.width, wrap):
+                block = source[row:row+bottom-top, column:column+right-left]
+                target = cells[top:bottom, left:right]
+                self.__record_changes__(target != block, left, top)
+                target[...] = block
+        self.world = cells
+
+    def __record_changes__(self, changed: np.ndarray, left: int, top: int) -> None:
+        """Records the bounding box of the marked cells of a block whose top left cell is at ``(left, top)`` as an edit"""
+        rows = np.flatnonzero(changed.any(axis=1))
+        if rows.size:
+            columns = np.flatnonzero(changed.any(axis=0))
+            self.edits.append((left + int(columns[0]), top + int(rows[0]), left + int(columns[-1]) + 1,
+                               top + int(rows[-1]) + 1))
+
+    @staticmethod
+    def __spans__(start: int, length: int, size: int, wrap: bool):
+        """Yields the ranges of the world covered by a pattern along one axis, with the matching start in the pattern"""
+        if not wrap:
+            begin, end = max(start, 0), min(start + length, size)
+            if begin < end:
+                yield begin, end, begin - start
+            return
+        offset = 0
+        while offset < length:
+            target = (start + offset) % size
+            span = min(length - offset, size - target)
+            yield target, target + span, offset
+            offset += span
 
     def get_neighbours(self, x: int, y:int) -> List[int]:
         """
@@ -54,18 +206,124 @@ class World:
         :param y: row-value of the location.
         :return: ``List`` of integers representing the values of the neighbours of ``(x, y)``.
         """
-        neighbour_values = []
-        for nx in range(x-1,x+2):
-            for ny in range(y-1,y+2):
-                if not (nx is x and ny is y):
-                    neighbour_values.append(self.world[ny%self.height][nx%self.width])
-        return neighbour_values
-
-    def __str__(self):
-        print('-'*self.width*4)
-        for row in self.world:
-            print('|', end=" ")
-            for column in row:
-                print(column, end=" | ")
-            print()
-            print('-'*self.width*4)
+        cells, width, height = self.world, self.width, self.height
+        return [cells.item((y+dy) % height, (x+dx) % width) for dx, dy in neighbour_offsets]
+
+    def neighbour_counts(self, threshold: int = 1, wrap: bool = True, out: np.ndarray = None) -> np.ndarray:
+        """
+        Counts for every cell how many of its 8 neighbours hold a value of at least ``threshold``: the living neighbours
+        by default, or those of at least a given age in decay of age mode. The neighbours are read through zero-copy
+        sliding windows over a padded copy of the marks that is kept between calls.
+
+        :param threshold: (optional) smallest value counted, at least 1.
+        :param wrap: (optional) whether neighbours wrap around the edges; otherwise cells beyond the edges, for which
+            ``get`` returns -1, are not counted.
+        :param out: (optional) array of the shape of ``world`` receiving the counts.
+        :return: array holding neighbour counts (0-8), ``uint8`` unless ``out`` is given.
+        """
+        if threshold < 1:
+            raise ValueError("threshold must be at least 1")
+        cells = self.world
+        if out is None:
+            out = np.empty(cells.shape, dtype=np.uint8)
+        padded = self.padded
+        if padded is None or padded.shape != (cells.shape[0]+2, cells.shape[1]+2):
+            padded = self.padded = np.zeros((cells.shape[0]+2, cells.shape[1]+2), dtype=np.uint8)
+        np.greater_equal(cells, threshold, out=padded[1:-1, 1:-1])
+        if wrap:
+            padded[0, 1:-1] = padded[-2, 1:-1]
+            padded[-1, 1:-1] = padded[1, 1:-1]
+            padded[:, 0] = padded[:, -2]
+            padded[:, -1] = padded[:, 1]
+        else:
+            padded[[0, -1], :] = 0
+            padded[:, [0, -1]] = 0
+        # window [y, x] is the 3x3 neighbourhood of cell (x, y), so [:, :, dy, dx] is the whole board shifted
+        windows = sliding_window_view(padded, (3, 3))
+        np.add(windows[:, :, 0, 0], windows[:, :, 0, 1], out=out)
+        for dy, dx in ((0, 2), (1, 0), (1, 2), (2, 0), (2, 1), (2, 2)):
+            np.add(out, windows[:, :, dy, dx], out=out)
+        return out
+
+    def get_neighbourhoods(self, xs, ys, wrap: bool = True, out: np.ndarray = None) -> np.ndarray:
+        """
+        Returns the values of the 8 neighbours of many locations at once, in the order of ``get_neighbours``.
+
+        :param xs: array of column-values.
+        :param ys: array of row-values, of the same length as ``xs``.
+        :param wrap: (optional) whether neighbours wrap around the edges; otherwise neighbours beyond the edges are -1,
+            as returned by ``get``.
+        :param out: (optional) array of shape ``(len(xs), 8)`` receiving the values.
+        :return: array with a row of neighbour values per location.
+        """
+        xs, ys = np.asarray(xs, dtype=np.intp), np.asarray(ys, dtype=np.intp)
+        cells = self.world
+        dtype = cells.dtype if wrap else np.promote_types(cells.dtype, np.int8)
+        if out is None:
+            out = np.empty((len(xs), 8), dtype=dtype)
+        dx, dy = np.array(neighbour_offsets, dtype=np.intp).T
+        if len(xs) * 8 < cells.size:
+            # few locations: index the cells directly rather than copying the board
+            columns, rows = xs[:, None] + dx, ys[:, None] + dy
+            if wrap:
+                return np.take(cells, (rows % self.height) * self.width + columns % self.width, out=out)
+            inside = (columns >= 0) & (columns < self.width) & (rows >= 0) & (rows < self.height)
+            out[...] = -1
+            out[inside] = cells[rows[inside], columns[inside]]
+            return out
+        # many locations: copy the board into a buffer with a one-cell border kept between calls, after which every
+        # neighbour is a fixed offset from the location
+        padded = self.padded_values
+        if padded is None or padded.shape != (cells.shape[0]+2, cells.shape[1]+2) or padded.dtype != dtype:
+            padded = self.padded_values = np.empty((cells.shape[0]+2, cells.shape[1]+2), dtype=dtype)
+        padded[1:-1, 1:-1] = cells
+        if wrap:
+            padded[0, 1:-1] = cells[-1]
+            padded[-1, 1:-1] = cells[0]
+            padded[:, 0] = padded[:, -2]
+            padded[:, -1] = padded[:, 1]
+        else:
+            padded[[0, -1], :] = -1
+            padded[:, [0, -1]] = -1
+        stride = padded.shape[1]
+        return np.take(padded, (ys * stride + xs)[:, None] + ((dy + 1) * stride + dx + 1), out=out)
+
+    def back_buffer(self) -> np.ndarray:
+        """
+        Returns the back buffer, which receives the next generation while ``world`` is being read.
+        The buffer is only reallocated when ``world`` has been replaced by an array of another shape or type.
+
+        :return: array with the same shape and type as ``world``.
+        """
+        if self.back.shape != self.world.shape or self.back.dtype != self.world.dtype or self.back is self.world:
+            self.back = np.empty_like(self.world)
+        self.edits = []
+        return self.back
+
+    def swap(self, generation: int = None) -> None:
+        """
+        Swaps the front and back buffer, making the generation written into ``back_buffer()`` the current one.
+        A file-backed world first writes the new generation to disk, then points its header at it, so the file always
+        holds a complete generation.
+
+        :param generation: (optional) number of the new generation, stored in the header of a file-backed world.
+        """
+        self.world, self.back = self.back_buffer(), self.world
+        if self.path is not None:
+            if generation is not None:
+                self.generation = generation
+            self.buffers.flush()
+            self.write_header()
+
+    def __str__(self) -> str:
+        """
+        Returns the cells as a table of rows, built in one string rather than printed cell by cell.
+
+        :return: string representation of the world.
+        """
+        separator = '-'*self.width*4
+        lines = [separator]
+        for row in self.world.tolist():
+            lines.append('| ' + ''.join('{} | '.format(column) for column in row))
+            lines.append(separator)
+        return '\n'.join(lines)
@@ -0,0 +1,288 @@
+"""
+Benchmarks for the Game of Life engines. Run ``python benchmark.py --help`` for the available benchmarks.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict
+from Simulator import *
+from PackedWorld import PackedWorld
+from Pattern import Pattern
+
+# number of cells stepped per suite measurement, spread over as many generations as fit
+suite_cells = 1 << 26
+
+
+def time_updates(simulator: Simulator, generations: int) -> float:
+    """
+    Returns the average wall time of one ``Simulator.update``, after a single warm-up generation.
+
+    :param simulator: simulator to update.
+    :param generations: number of timed generations.
+    :return: seconds per generation.
+    """
+    simulator.update()
+    start = time.perf_counter()
+    for _ in range(generations):
+        simulator.update()
+    return (time.perf_counter() - start) / generations
+
+
+def bench_parallel(size: int, workers: List[int], generations: int = 10, rules: str = 'B3/S23') -> None:
+    """
+    Prints how the parallel engine scales with the number of worker processes, relative to the vectorized engine.
+
+    :param size: width and height of the world.
+    :param workers: worker counts to measure.
+    :param generations: (optional) number of timed generations per measurement.
+    :param rules: (optional) rule string.
+    """
+    world = World(size, fill_cells=0.5)
+    baseline = time_updates(Simulator(world, rules=rules, engine='vectorized'), generations)
+    print('{:>8} {:>12} {:>8}'.format('workers', 'ms/gen', 'speedup'))
+    print('{:>8} {:>12.2f} {:>8.2f}'.format('-', baseline * 1000, 1.0))
+    for count in workers:
+        simulator = Simulator(world, rules=rules, engine='parallel', workers=count)
+        try:
+            seconds = time_updates(simulator, generations)
+        finally:
+            simulator.close()
+        print('{:>8} {:>12.2f} {:>8.2f}'.format(count, seconds * 1000, baseline / seconds))
+
+
+def bench_packed(size: int, generations: int = 10) -> None:
+    """
+    Prints memory use and step time of dense ``int64``, dense ``uint8`` and bit-packed worlds in standard mode.
+
+    :param size: width and height of the world.
+    :param generations: (optional) number of timed generations per measurement.
+    """
+    worlds = [
+        ('int64', World(size, fill_cells=0.5)),
+        ('uint8', World(size, fill_cells=0.5, dtype=np.uint8)),
+        ('packed', PackedWorld(size, fill_cells=0.5)),
+    ]
+    print('{:>8} {:>12} {:>12} {:>14}'.format('storage', 'MB/buffer', 'ms/gen', 'Mcells/s'))
+    for name, world in worlds:
+        nbytes = world.bits.nbytes if isinstance(world, PackedWorld) else world.world.nbytes
+        seconds = time_updates(Simulator(world), generations)
+        print('{:>8} {:>12.2f} {:>12.2f} {:>14.1f}'.format(name, nbytes / 2**20, seconds * 1000, size * size / seconds / 1e6))
+
+
+def median_time(function: Callable[[], float], repeats: int) -> float:
+    """
+    Returns the median of repeated measurements.
+
+    :param function: function returning the seconds of one measurement.
+    :param repeats: number of measurements.
+    :return: median in seconds.
+    """
+    return float(np.median([function() for _ in range(repeats)]))
+
+
+def timed(function: Callable[[], None], calls: int = 1) -> float:
+    """
+    Returns the average wall time of calling a function.
+
+    :param function: function to call.
+    :param calls: (optional) number of calls.
+    :return: seconds per call.
+    """
+    start = time.perf_counter()
+    for _ in range(calls):
+        function()
+    return (time.perf_counter() - start) / calls
+
+
+def suite_updates(sizes: List[int], densities: List[float], repeats: int) -> Dict[str, float]:
+    """
+    Measures ``Simulator.update`` in standard and decay of age mode, for every board size and fill density.
+
+    :return: seconds per generation by benchmark name.
+    """
+    results = {}
+    for mode, rules in (('standard', 'B3/S23'), ('decay', 'B3/S23/A5')):
+        for size in sizes:
+            generations = max(1, min(20, suite_cells // (size * size)))
+            for density in densities:
+                simulator = Simulator(World(size, fill_cells=density, dtype=np.uint8), rules=rules, start_age=2)
+                results['update/{}/{}/{:g}'.format(mode, size, density)] = \
+                    median_time(lambda: time_updates(simulator, generations), repeats)
+                del simulator
+    return results
+
+
+def suite_neighbours(repeats: int, size: int = 64, board: int = 1024) -> Dict[str, float]:
+    """
+    Measures ``World.get_neighbours`` over every cell of a board, and the bulk ``World.neighbour_counts`` and
+    ``World.get_neighbourhoods`` over every cell of a larger board.
+
+    :return: seconds per call by benchmark name.
+    """
+    world = World(size)
+    locations = [(x, y) for y in range(size) for x in range(size)]
+    measure = lambda: timed(lambda: [world.get_neighbours(x, y) for x, y in locations]) / len(locations)
+    results = {'get_neighbours/{}'.format(size): median_time(measure, repeats)}
+
+    world = World(board, fill_cells=0.5, dtype=np.uint8)
+    counts = np.empty((board, board), dtype=np.uint8)
+    ys, xs = np.divmod(np.arange(board * board), board)
+    results['neighbour_counts/{}'.format(board)] = median_time(lambda: timed(lambda: world.neighbour_counts(out=counts)), repeats)
+    results['get_neighbourhoods/{}'.format(board)] = median_time(lambda: timed(lambda: world.get_neighbourhoods(xs, ys)), repeats)
+    return results
+
+
+def suite_redraw(sizes: List[int], repeats: int, frames: int = 10) -> Dict[str, float]:
+    """
+    Measures ``Visualisation.__redraw__`` with the SDL dummy video driver, so no display is needed.
+
+    :return: seconds per frame by benchmark name, empty when pygame is not installed.
+    """
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    try:
+        import pygame
+        from Visualisation import Visualisation
+    except ImportError:
+        print('pygame is not installed, skipping the redraw benchmarks', file=sys.stderr)
+        return {}
+    results = {}
+    for size in sizes:
+        visualisation = Visualisation(Simulator(World(size)), autorun=False)
+        try:
+            results['redraw/{}'.format(size)] = median_time(lambda: timed(visualisation.__redraw__, frames), repeats)
+        finally:
+            visualisation.worker.stop()
+    pygame.quit()
+    return results
+
+
+def suite_patterns(sizes: List[int], repeats: int, density: float = 0.3) -> Dict[str, float]:
+    """
+    Measures writing and reading a whole board as RLE and Life 1.06 patterns.
+
+    :return: seconds per operation by benchmark name.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            pattern = Pattern.from_world(World(size, fill_cells=density, dtype=np.uint8))
+            for name, write, read in (('rle', Pattern.write_rle, Pattern.read_rle),
+                                      ('life106', Pattern.write_life106, Pattern.read_life106)):
+                path = os.path.join(directory, 'pattern.' + name)
+                results['pattern/write_{}/{}'.format(name, size)] = median_time(lambda: timed(lambda: write(pattern, path)), repeats)
+                results['pattern/read_{}/{}'.format(name, size)] = median_time(lambda: timed(lambda: read(path)), repeats)
+    return results
+
+
+def suite_startup(repeats: int) -> Dict[str, float]:
+    """
+    Measures the cold start of a new interpreter: importing ``Simulator``, and a short headless run of ``main.py``
+    without output, as launched for every run of a batch.
+
+    :return: seconds per start by benchmark name.
+    """
+    directory = os.path.dirname(os.path.abspath(__file__))
+    commands = {
+        'startup/import': [sys.executable, '-c', 'import Simulator'],
+        'startup/main': [sys.executable, os.path.join(directory, 'main.py'), '--size', '64', '--generations', '1',
+                         '--format', 'none'],
+    }
+    run = lambda command: timed(lambda: subprocess.run(command, cwd=directory, check=True, stdout=subprocess.DEVNULL))
+    return {name: median_time(lambda: run(command), repeats) for name, command in commands.items()}
+
+
+def compare(results: Dict[str, float], baseline: Dict[str, float], threshold: float) -> Dict[str, float]:
+    """
+    Compares results with a baseline.
+
+    :param results: seconds by benchmark name.
+    :param baseline: seconds by benchmark name of an earlier run.
+    :param threshold: ratio of current to baseline time above which a benchmark counts as a regression.
+    :return: ratio of current to baseline time of every regressed benchmark, by name.
+    """
+    ratios = {name: seconds / baseline[name] for name, seconds in results.items() if baseline.get(name)}
+    return {name: ratio for name, ratio in ratios.items() if ratio > threshold}
+
+
+def bench_suite(sizes: List[int], densities: List[float], repeats: int = 3, output: str = None, baseline: str = None,
+                threshold: float = 1.25, parts: List[str] = ('update', 'neighbours', 'redraw', 'patterns', 'startup')) -> bool:
+    """
+    Runs the benchmark suite, prints its results and optionally stores them and compares them with a baseline.
+
+    :param sizes: board widths and heights of the update benchmarks.
+    :param densities: fill densities of the update benchmarks.
+    :param repeats: (optional) number of measurements of which the median is kept.
+    :param output: (optional) JSON file to store the results in, to be used as a later baseline.
+    :param baseline: (optional) JSON file with the results of an earlier run.
+    :param threshold: (optional) slowdown relative to the baseline that fails the run.
+    :param parts: (optional) parts of the suite to run.
+    :return: True when no benchmark is slower than the baseline by more than ``threshold``.
+    """
+    results = {}
+    if 'update' in parts:
+        results.update(suite_updates(sizes, densities, repeats))
+    if 'neighbours' in parts:
+        results.update(suite_neighbours(repeats))
+    if 'redraw' in parts:
+        results.update(suite_redraw(sizes, repeats))
+    if 'patterns' in parts:
+        results.update(suite_patterns([s for s in sizes if s <= 4096], repeats))
+    if 'startup' in parts:
+        results.update(suite_startup(repeats))
+
+    previous = {}
+    if baseline is not None:
+        with open(baseline) as file:
+            previous = json.load(file)['results']
+    regressions = compare(results, previous, threshold)
+    print('{:<36} {:>12} {:>10}'.format('benchmark', 'ms', 'baseline'))
+    for name, seconds in results.items():
+        ratio = '{:.2f}x'.format(seconds / previous[name]) if previous.get(name) else '-'
+        print('{:<36} {:>12.3f} {:>10}{}'.format(name, seconds * 1000, ratio, '  REGRESSION' if name in regressions else ''))
+
+    if output is not None:
+        with open(output, 'w') as file:
+            json.dump({'python': platform.python_version(), 'numpy': np.__version__, 'machine': platform.machine(),
+                       'results': results}, file, indent=2)
+    if regressions:
+        print('{} benchmarks slower than {:g}x the baseline'.format(len(regressions), threshold))
+    return not regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    benchmarks = parser.add_subparsers(dest='benchmark', required=True)
+
+    parallel = benchmarks.add_parser('parallel', help='scaling of the parallel engine across worker counts')
+    parallel.add_argument('--size', type=int, default=4096)
+    parallel.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8, 16, 32])
+    parallel.add_argument('--generations', type=int, default=10)
+    parallel.add_argument('--rules', default='B3/S23')
+
+    packed = benchmarks.add_parser('packed', help='memory and throughput of bit-packed worlds')
+    packed.add_argument('--size', type=int, default=4096)
+    packed.add_argument('--generations', type=int, default=10)
+
+    suite = benchmarks.add_parser('suite', help='step, render, pattern I/O and start-up benchmarks, compared with a baseline')
+    suite.add_argument('--sizes', type=int, nargs='+', default=[64, 256, 1024, 4096, 8192])
+    suite.add_argument('--densities', type=float, nargs='+', default=[0.1, 0.3, 0.5, 0.7, 0.9])
+    suite.add_argument('--parts', nargs='+', default=['update', 'neighbours', 'redraw', 'patterns', 'startup'],
+                       choices=['update', 'neighbours', 'redraw', 'patterns', 'startup'])
+    suite.add_argument('--repeats', type=int, default=3)
+    suite.add_argument('--output', help='JSON file to store the results in')
+    suite.add_argument('--baseline', help='JSON file with the results of an earlier run')
+    suite.add_argument('--threshold', type=float, default=1.25, help='slowdown relative to the baseline that fails the run')
+
+    args = parser.parse_args()
+    if args.benchmark == 'parallel':
+        bench_parallel(args.size, args.workers, args.generations, args.rules)
+    elif args.benchmark == 'packed':
+        bench_packed(args.size, args.generations)
+    elif args.benchmark == 'suite':
+        if not bench_suite(args.sizes, args.densities, args.repeats, args.output, args.baseline, args.threshold, args.parts):
+            sys.exit(1)
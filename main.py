@@ -1,19 +1,122 @@
-from Visualisation import *
+"""
+Runs the Game of Life, headless by default. Run ``python main.py --help`` for the options.
+
+Headless runs only import NumPy and the simulation modules; pygame is imported when ``--visual`` is given.
+"""
+import argparse
+import sys
+from typing import List
 from Simulator import *
-import time
 
-# Configuratie
-VISUALISATION=True
 
-if __name__ == "__main__":
-    w = World(110, fill_cells=0.5)
-    sim = Simulator(w, rules='B3/S23/A2', start_age=2)
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    """
+    Parses the command line.
+
+    :param argv: (optional) arguments, those of the process by default.
+    :return: parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, nargs='+', default=[110], metavar='N',
+                        help='width and optionally height of the world (default: 110)')
+    parser.add_argument('--rules', default='B3/S23/A2', help='rule string, see Rule (default: B3/S23/A2)')
+    parser.add_argument('--start-age', type=int, default=2, help='age of living cells in decay of age mode (default: 2)')
+    parser.add_argument('--density', type=float, default=0.5, help='fraction of living cells at the start (default: 0.5)')
+    parser.add_argument('--generations', type=int,
+                        help='number of generations, until the world is static or periodic by default')
+    parser.add_argument('--engine', choices=Simulator.engines, default='auto', help='engine stepping the world')
+    parser.add_argument('--history', type=int, default=64,
+                        help='generations remembered to detect static or periodic worlds, 0 to disable (default: 64)')
+    parser.add_argument('--seed', type=int, help='seed of the random start, for reproducible runs')
+    parser.add_argument('--format', choices=['delta', 'rle', 'life106', 'checkpoint', 'none'], default='delta',
+                        help='output of a headless run: a delta log of every generation, the last generation as a '
+                             'pattern or checkpoint, or nothing (default: delta)')
+    parser.add_argument('--output', help='file to write, run.<format> by default')
+    parser.add_argument('--visual', action='store_true', help='show the world in a window instead of running headless')
+    args = parser.parse_args(argv)
+
+    if len(args.size) > 2:
+        parser.error('--size takes a width and optionally a height')
+    if args.generations is None and not args.history and not args.visual:
+        parser.error('a run without --generations needs a --history to stop on a static or periodic world')
+    try:
+        rule = Rule.compile(args.rules)
+    except ValueError as error:
+        parser.error(str(error))
+    if args.engine in ('packed', 'hashlife') and rule.mode != 'standard':
+        parser.error('the {} engine only supports standard rules, such as --rules B3/S23'.format(args.engine))
+    if args.engine == 'infinite':
+        if rule.table[0, 0] != 0:
+            parser.error('the infinite engine needs rules under which empty cells without neighbours stay empty')
+        if args.history:
+            parser.error('the infinite engine does not detect static or periodic worlds, use --history 0')
+        if args.format == 'delta' and not args.visual:
+            parser.error('the world of the infinite engine changes in size, which a delta log cannot hold')
+    if args.output is None:
+        args.output = {'delta': 'run.gol', 'checkpoint': 'run.ckpt'}.get(args.format, 'run.' + args.format)
+    return args
+
+
+def main(argv: List[str] = None) -> Simulator:
+    """
+    Runs the Game of Life as configured on the command line.
+
+    :param argv: (optional) arguments, those of the process by default.
+    :return: simulator after the run.
+    """
+    args = parse_args(argv)
+    if args.seed is not None:
+        np.random.seed(args.seed)
+    rule = Rule.compile(args.rules)
+    # one byte per cell unless the rules have more states or ages
+    dtype = np.uint8 if max(rule.states, rule.max_age + 1, args.start_age + 1) <= 256 else np.int64
+    # the packed and infinite engines step worlds of their own type
+    if args.engine == 'packed':
+        w = PackedWorld(args.size[0], args.size[-1], fill_cells=args.density)
+    elif args.engine == 'infinite':
+        w = InfiniteWorld(args.size[0], args.size[-1], fill_cells=args.density, dtype=dtype)
+    else:
+        w = World(args.size[0], args.size[-1], fill_cells=args.density, dtype=dtype)
+        if args.engine == 'hashlife':
+            # the unbounded plane of the hashlife engine refuses living cells on the edges of the world
+            w.world[[0, -1]] = 0
+            w.world[:, [0, -1]] = 0
+    sim = Simulator(w, rules=args.rules, start_age=args.start_age, engine=args.engine, history=args.history)
+
+    if args.visual:
+        from Visualisation import Visualisation
+        Visualisation(sim)
+        return sim
+
+    if args.format == 'delta':
+        # log the changes of every generation instead of printing the world
+        from DeltaLog import DeltaLog
+        with DeltaLog.for_world(args.output, w, sim.rules) as log:
+            # the first keyframe holds the initial board, which the run starts from
+            log.write(sim.get_generation(), sim.get_world().world)
+            for generation, cells in sim.iter_generations(args.generations, stop_on_cycle=bool(args.history)):
+                log.write(generation, cells)
+    else:
+        sim.run(args.generations, stop_on_cycle=bool(args.history))
+        if args.format in ('rle', 'life106'):
+            from Pattern import Pattern
+            pattern = Pattern.from_world(sim.get_world(), sim.rules)
+            if args.format == 'rle':
+                pattern.write_rle(args.output)
+            else:
+                pattern.write_life106(args.output)
+        elif args.format == 'checkpoint':
+            sim.save_checkpoint(args.output)
+    sim.close()
 
-    if VISUALISATION:
-        vis = Visualisation(sim)
+    if sim.get_period() is not None:
+        print("Period {} detected at generation {}".format(sim.get_period(), sim.get_generation()))
     else:
-        while True:
-            # Create new world and print to screen
-            print(sim.update())
-            # slow down simulation
-            time.sleep(0.5)
\ No newline at end of file
+        print("Stopped at generation {}".format(sim.get_generation()))
+    if args.format != 'none':
+        print("Output written to {}".format(args.output))
+    return sim
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,29 @@
+from unittest import TestCase
+from benchmark import *
+
+
+class TestBenchmark(TestCase):
+    """
+    Tests for the benchmark suite.
+    """
+    def test_compare(self):
+        """
+        Tests finding the benchmarks that regressed beyond the threshold, ignoring those without a baseline.
+        """
+        results = {'update/a': 1.0, 'update/b': 3.0, 'update/c': 5.0}
+        baseline = {'update/a': 1.0, 'update/b': 2.0, 'update/d': 1.0}
+        self.assertEqual(compare(results, baseline, 1.25), {'update/b': 1.5})
+        self.assertEqual(compare(results, baseline, 1.5), {})
+
+    def test_suite(self):
+        """
+        Tests running a small suite, storing it and comparing a second run with it.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'baseline.json')
+            self.assertTrue(bench_suite([16], [0.5], repeats=1, output=path, parts=['update', 'patterns']))
+            with open(path) as file:
+                results = json.load(file)['results']
+            self.assertEqual(set(results), {'update/standard/16/0.5', 'update/decay/16/0.5', 'pattern/write_rle/16',
+                                            'pattern/read_rle/16', 'pattern/write_life106/16', 'pattern/read_life106/16'})
+            self.assertTrue(bench_suite([16], [0.5], repeats=1, baseline=path, threshold=1e6, parts=['update']))
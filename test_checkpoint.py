@@ -0,0 +1,157 @@
+from unittest import TestCase
+from Checkpoint import *
+from Simulator import Simulator
+from InfiniteWorld import InfiniteWorld
+from PackedWorld import PackedWorld
+from World import World
+import tempfile
+
+
+class TestCheckpoint(TestCase):
+    """
+    Tests for ``Checkpoint``, ``Checkpointer`` and resuming a ``Simulator`` from a checkpoint.
+    """
+    def setUp(self):
+        """
+        Common setup: a temporary directory for the checkpoints.
+        """
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'run.ckpt')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_write_read(self):
+        """
+        Tests that compressed and raw checkpoints restore the cells and state, and that raw cells are memory-mapped.
+        """
+        cells = np.random.randint(0, 6, (31, 45)).astype(np.uint8)
+        checkpoint = Checkpoint(12, 'B3/S23/A5', 'decay of age', 2, 5, cells)
+        for compress in (True, False):
+            checkpoint.write(self.path, compress)
+            self.assertFalse(os.path.exists(self.path + '.tmp'))
+            for mmap in (True, False):
+                loaded = Checkpoint.read(self.path, mmap)
+                self.assertEqual(loaded[:5], checkpoint[:5])
+                np.testing.assert_array_equal(loaded.cells, cells)
+                self.assertEqual(loaded.cells.dtype, np.uint8)
+                self.assertEqual(isinstance(loaded.cells, np.memmap), mmap and not compress)
+                del loaded
+
+        # copy-on-write: changing mapped cells leaves the file as it was
+        loaded = Checkpoint.read(self.path)
+        loaded.cells[...] = 0
+        np.testing.assert_array_equal(Checkpoint.read(self.path, mmap=False).cells, cells)
+
+    def test_invalid(self):
+        """
+        Tests that files which are not complete checkpoints are rejected.
+        """
+        Checkpoint(1, 'B3/S23', 'standard', 0, 0, np.ones((64, 64), dtype=np.int64)).write(self.path)
+        with open(self.path, 'rb') as file:
+            data = file.read()
+        with open(self.path, 'wb') as file:
+            file.write(data[:-8])
+        self.assertRaises(ValueError, Checkpoint.read, self.path)
+        with open(self.path, 'wb') as file:
+            file.write(b'GOLW' + data[4:])
+        self.assertRaises(ValueError, Checkpoint.read, self.path)
+
+    def test_resume(self):
+        """
+        Tests that a run resumed from a checkpoint continues exactly as the uninterrupted run, for several engines.
+        """
+        cases = [(lambda: World(40, 30, 0.4, dtype=np.uint8), 'B3/S23/A6', 'vectorized'),
+                 (lambda: World(40, 30, 0.4), 'B2/S/C4', 'sparse'),
+                 (lambda: PackedWorld(70, 20, 0.4), 'B3/S23', 'packed')]
+        for create, rules, engine in cases:
+            for compress in (True, False):
+                sim = Simulator(create(), rules=rules, start_age=3, engine=engine)
+                sim.run(5, stop_on_cycle=False)
+                sim.save_checkpoint(self.path, compress)
+                sim.run(7, stop_on_cycle=False)
+
+                resumed = Simulator(create(), rules='B36/S23', engine=engine)
+                resumed.load_checkpoint(self.path)
+                self.assertEqual((resumed.generation, resumed.rules, resumed.start_age), (5, rules, 3))
+                resumed.run(7, stop_on_cycle=False)
+                np.testing.assert_array_equal(resumed.get_world().world, sim.get_world().world)
+                self.assertEqual(resumed.get_generation(), 12)
+
+    def test_packed(self):
+        """
+        Tests that a PackedWorld is checkpointed as its packed bits, which a World resumes unpacked.
+        """
+        sim = Simulator(PackedWorld(256, 100, 0.5))
+        sim.run(3, stop_on_cycle=False)
+        sim.save_checkpoint(self.path, compress=False)
+        self.assertEqual(os.path.getsize(self.path), checkpoint_header_size + 100 * 4 * 8)
+        checkpoint = Checkpoint.read(self.path)
+        self.assertEqual((checkpoint.cells.shape, checkpoint.cells.dtype, checkpoint.width), ((100, 4), np.uint64, 256))
+        np.testing.assert_array_equal(checkpoint.cells, sim.world.bits)
+
+        resumed = Simulator(World(8, dtype=np.uint8))
+        resumed.load_checkpoint(self.path)
+        np.testing.assert_array_equal(resumed.world.world, sim.world.world)
+        self.assertEqual((resumed.world.width, resumed.world.height), (256, 100))
+        sim.run(4, stop_on_cycle=False)
+        resumed.run(4, stop_on_cycle=False)
+        np.testing.assert_array_equal(resumed.world.world, sim.world.world)
+
+    def test_infinite_world(self):
+        """
+        Tests that an InfiniteWorld resumes with its cells where they were saved, after its pattern has moved on.
+        """
+        world = InfiniteWorld(0, tile_size=8)
+        for x, y in ((21, 20), (22, 21), (20, 22), (21, 22), (22, 22)):
+            world.set(x, y)
+        sim = Simulator(world)
+        sim.save_checkpoint(self.path)
+        self.assertEqual(Checkpoint.read(self.path).origin, (16, 16))
+        # the glider moves one cell diagonally every 4 generations
+        sim.run(80, stop_on_cycle=False)
+        self.assertEqual(world.origin, (32, 32))
+        sim.load_checkpoint(self.path)
+        self.assertEqual((sim.generation, world.origin), (0, (16, 16)))
+        self.assertEqual([world.get(21, 20), world.get(41, 40)], [1, 0])
+        sim.run(80, stop_on_cycle=False)
+        self.assertEqual((world.get(41, 40), int(world.world.sum())), (1, 5))
+
+    def test_file_backed(self):
+        """
+        Tests resuming into a file-backed world, which copies the cells and stores the generation in its header.
+        """
+        sim = Simulator(World(20, 10, 0.5, dtype=np.uint8), rules='B3/S23/A4', start_age=2)
+        sim.run(3, stop_on_cycle=False)
+        sim.save_checkpoint(self.path, compress=False)
+        backed = os.path.join(self.directory.name, 'world.golw')
+        resumed = Simulator(World(20, 10, 0, dtype=np.uint8, path=backed))
+        resumed.load_checkpoint(self.path)
+        np.testing.assert_array_equal(resumed.world.world, sim.world.world)
+        del resumed
+        reopened = World.open(backed)
+        self.assertEqual((reopened.generation, reopened.rules), (3, 'B3/S23/A4'))
+
+        other = Simulator(World(8, path=os.path.join(self.directory.name, 'small.golw')))
+        self.assertRaises(ValueError, other.load_checkpoint, self.path)
+
+    def test_background_checkpoints(self):
+        """
+        Tests that checkpoints written on the background thread hold the generation they were taken at.
+        """
+        sim = Simulator(World(30, fill_cells=0.5, dtype=np.uint8), rules='B3/S23/A5', start_age=1)
+        sim.start_checkpoints(self.path, 4)
+        expected = {}
+        for _ in range(12):
+            sim.update()
+            expected[sim.generation] = sim.world.world.copy()
+            # waiting for every write makes sure no checkpoint is skipped
+            sim.checkpointer.wait()
+            if sim.generation % 4 == 0:
+                checkpoint = Checkpoint.read(self.path)
+                self.assertEqual(checkpoint.generation, sim.generation)
+                np.testing.assert_array_equal(checkpoint.cells, expected[sim.generation])
+        self.assertEqual(sim.checkpointer.written, 12)
+        sim.stop_checkpoints()
+        self.assertIsNone(sim.checkpointer)
+        self.assertRaises(ValueError, Checkpointer, self.path, 0)
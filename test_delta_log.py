@@ -0,0 +1,77 @@
+from unittest import TestCase
+from DeltaLog import *
+from Simulator import Simulator
+from World import World
+import os
+import tempfile
+
+
+class TestDeltaLog(TestCase):
+    """
+    Tests for ``DeltaLog`` and ``DeltaLogReader``.
+    """
+    def setUp(self):
+        """
+        Common setup: a temporary directory and the generations of a run in decay of age mode.
+        """
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'run.gol')
+        world = World(23, 17, 0.4, dtype=np.uint8)
+        sim = Simulator(world, rules='B3/S23/A5', start_age=2)
+        self.generations = [(generation, cells.copy()) for generation, cells in sim.iter_generations(40, every=2)]
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, keyframe_every=5, close=True):
+        """Writes the generations to the log"""
+        log = DeltaLog(self.path, 23, 17, np.uint8, 'B3/S23/A5', keyframe_every)
+        for generation, cells in self.generations:
+            log.write(generation, cells)
+        if close:
+            log.close()
+        return log
+
+    def test_encode(self):
+        """
+        Tests that decoding an encoded delta restores the changed cells.
+        """
+        previous = np.random.randint(0, 5, (9, 11)).astype(np.int64)
+        cells = previous.copy()
+        cells[2, 3:9] = 7
+        cells[-1, -1] = 9
+        cells[4, 0] = 6
+        for new in (cells, previous):
+            restored = previous.copy()
+            DeltaLog.decode(DeltaLog.encode(new != previous, new, np.dtype(np.int64)), restored)
+            np.testing.assert_array_equal(restored, new)
+
+    def test_read(self):
+        """
+        Tests reading all records back, and the header.
+        """
+        self.write()
+        with DeltaLogReader(self.path) as reader:
+            self.assertEqual((reader.width, reader.height, reader.dtype, reader.rules), (23, 17, np.uint8, 'B3/S23/A5'))
+            self.assertEqual(reader.keyframe_generations, [2, 12, 22, 32])
+            self.assertEqual(reader.get_generations(), [generation for generation, _ in self.generations])
+            for (generation, cells), (logged, expected) in zip(reader, self.generations):
+                self.assertEqual(generation, logged)
+                np.testing.assert_array_equal(cells, expected)
+
+    def test_seek(self):
+        """
+        Tests seeking to generations, with and without the index of a closed log.
+        """
+        for close in (True, False):
+            log = self.write(close=close)
+            if not close:
+                log.file.flush()
+            with DeltaLogReader(self.path) as reader:
+                self.assertEqual(len(reader.keyframes), 4)
+                for generation, expected in self.generations[::-1]:
+                    np.testing.assert_array_equal(reader.seek(generation), expected)
+                for generation in (0, 3, 41):
+                    with self.assertRaises(KeyError):
+                        reader.seek(generation)
+            log.close()
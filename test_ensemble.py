@@ -0,0 +1,45 @@
+from unittest import TestCase
+from Ensemble import *
+from World import World
+from Simulator import Simulator
+
+
+class TestEnsemble(TestCase):
+    """
+    Tests for ``Ensemble`` of worlds.
+    """
+    def setUp(self):
+        """
+        Common setup: worlds with different densities and a mix of standard, decay of age and Generations rules.
+        """
+        self.rules = ['B3/S23', 'B36/S23', 'B3/S23/A5', 'B2/S', 'B35/S234/A8', 'B2/S/C4']
+        self.fill_cells = [0.1, 0.3, 0.5, 0.7, 0.9, 0.4]
+        self.ensemble = Ensemble(6, 17, 13, fill_cells=self.fill_cells, rules=self.rules, start_age=2)
+
+    def test_construction(self):
+        """
+        Tests the shape of the stacked cells and the start age of decay of age worlds.
+        """
+        self.assertEqual(self.ensemble.cells.shape, (6, 13, 17))
+        self.assertTrue(np.isin(self.ensemble.cells[0], (0, 1)).all())
+        self.assertTrue(np.isin(self.ensemble.cells[2], (0, 2)).all())
+        with self.assertRaises(ValueError):
+            Ensemble(3, 10, rules=['B3/S23'])
+
+    def test_update(self):
+        """
+        Tests that every world evolves exactly like a separate Simulator.
+        """
+        simulators = []
+        for member, rules in enumerate(self.rules):
+            sim = Simulator(World(17, 13, 0), rules=rules, start_age=2, engine='vectorized')
+            sim.world.world = self.ensemble.cells[member].astype(np.int64)
+            simulators.append(sim)
+        populations = self.ensemble.run(6)
+        self.assertEqual(populations.shape, (6, 6))
+        for sim in simulators:
+            sim.advance(6)
+        for member, sim in enumerate(simulators):
+            np.testing.assert_array_equal(self.ensemble.cells[member], sim.world.world)
+            # dying cells of Generations rules are not counted
+            self.assertEqual(populations[-1, member], np.count_nonzero(sim.alive(sim.world.world)))
@@ -0,0 +1,68 @@
+from unittest import TestCase
+from HashLife import *
+from Simulator import *
+
+
+class TestHashLife(TestCase):
+    """
+    Tests for ``HashLife`` universe.
+    """
+    def setUp(self):
+        """
+        Common setup: a random pattern in the middle of a world, far enough from the edges to never wrap around.
+        """
+        self.world = World(96, fill_cells=0)
+        self.world.world[40:56, 40:56] = np.random.binomial(1, 0.5, (16, 16))
+        self.hashlife = HashLife([3], [2, 3])
+        self.hashlife.from_array(self.world.world)
+
+    def test_conversion(self):
+        """
+        Tests converting an array into the universe and back.
+        """
+        np.testing.assert_array_equal(self.hashlife.to_array(0, 0, 96, 96), self.world.world)
+        np.testing.assert_array_equal(self.hashlife.to_array(40, 44, 3, 5), self.world.world[44:49, 40:43])
+        self.assertEqual(self.hashlife.get_population(), self.world.world.sum())
+        for x, y, width, height in ((0, 0, 96, 96), (43, 41, 9, 13), (50, 30, 100, 20), (-10, 45, 52, 3), (0, 0, 40, 40)):
+            self.assertEqual(self.hashlife.get_population_in(x, y, width, height),
+                             self.world.world[max(y, 0):y+height, max(x, 0):x+width].sum())
+
+    def test_advance(self):
+        """
+        Tests that jumps match stepping the world one generation at a time.
+        """
+        sim = Simulator(self.world, engine='vectorized')
+        for generations in (1, 2, 3, 8, 13):
+            self.hashlife.advance(generations)
+            sim.advance(generations)
+            np.testing.assert_array_equal(self.hashlife.to_array(0, 0, 96, 96), sim.world.world)
+        self.assertEqual(self.hashlife.generation, 27)
+        self.assertGreater(self.hashlife.get_hit_rate(), 0)
+
+    def test_collect(self):
+        """
+        Tests that collecting nodes keeps the pattern and forgets memoized results.
+        """
+        self.hashlife.advance(16)
+        cells = self.hashlife.to_array(0, 0, 96, 96)
+        self.hashlife.collect()
+        self.assertEqual(len(self.hashlife.results), 0)
+        np.testing.assert_array_equal(self.hashlife.to_array(0, 0, 96, 96), cells)
+        self.hashlife.advance(4)
+
+    def test_glider(self):
+        """
+        Tests that a glider moves one cell diagonally every 4 generations over a long jump.
+        """
+        glider = np.array([[0, 1, 0], [0, 0, 1], [1, 1, 1]])
+        self.hashlife.from_array(glider)
+        self.hashlife.advance(4 * 1000)
+        np.testing.assert_array_equal(self.hashlife.to_array(1000, 1000, 3, 3), glider)
+        self.assertEqual(self.hashlife.get_population(), 5)
+
+    def test_birth_on_zero(self):
+        """
+        Tests that rules giving birth on 0 neighbours are refused.
+        """
+        with self.assertRaises(ValueError):
+            HashLife([0, 3], [2, 3])
@@ -0,0 +1,115 @@
+from unittest import TestCase
+from InfiniteWorld import *
+from Metrics import Metrics
+from Simulator import Simulator
+
+
+class TestInfiniteWorld(TestCase):
+    """
+    Test cases for ``InfiniteWorld`` data type and the infinite engine.
+    """
+    def setUp(self):
+        """
+        Common setup: an empty plane with small tiles.
+        """
+        self.world = InfiniteWorld(0, tile_size=8)
+        self.assertEqual(self.world.tiles, {})
+
+    def test_get_set(self):
+        """
+        Tests setting and getting cells anywhere, which allocates the tile and those its neighbours are in.
+        """
+        self.world.set(-3, 20, 4)
+        self.assertEqual(self.world.get(-3, 20), 4)
+        self.assertEqual(self.world.get(-4, 20), 0)
+        self.assertEqual(self.world.get(1000, -1000), 0)
+        self.assertEqual(sorted(self.world.tiles), [(-1, 2)])
+        # a cell on the corner of its tile may cause births in the three tiles around that corner
+        self.world.set(0, 0)
+        self.assertEqual(sorted(self.world.tiles), [(-1, -1), (-1, 0), (-1, 2), (0, -1), (0, 0)])
+        self.assertEqual(self.world.get_neighbours(-1, -1), [0, 0, 0, 0, 0, 0, 0, 1])
+        # clearing a cell of a tile that is not allocated allocates nothing
+        self.world.set(50, 50, 0)
+        self.assertEqual(len(self.world.tiles), 5)
+        self.assertEqual(self.world.pop_edits(), [(-3, 20, -2, 21), (0, 0, 1, 1)])
+
+    def test_world(self):
+        """
+        Tests copying the cells of the allocated tiles to and from an array.
+        """
+        self.world.set(-5, 3, 2)
+        self.assertEqual(self.world.origin, (-8, 0))
+        self.assertEqual((self.world.width, self.world.height), (8, 8))
+        cells = self.world.world
+        self.assertEqual(cells[3, 3], 2)
+        cells[0, 0] = 1
+        self.world.world = cells
+        self.assertEqual((self.world.get(-8, 0), self.world.get(-5, 3)), (1, 2))
+
+        self.world.place(np.ones((2, 3), dtype=np.uint8), 14, -1)
+        self.assertEqual(self.world.get(16, 0), 1)
+        self.assertEqual(self.world.get(17, 0), 0)
+        self.assertIn((2, -1), self.world.tiles)
+
+    def test_glider(self):
+        """
+        Tests that a glider travels without wrapping around, keeping only the tiles around it allocated.
+        """
+        for x, y in ((1, 0), (2, 1), (0, 2), (1, 2), (2, 2)):
+            self.world.set(x, y)
+        sim = Simulator(self.world)
+        self.assertEqual(sim.engine, 'infinite')
+        for generation in range(400):
+            sim.update()
+            self.assertLessEqual(len(self.world.tiles), 20)
+        # the glider moves one cell diagonally every 4 generations
+        for x, y in ((1, 0), (2, 1), (0, 2), (1, 2), (2, 2)):
+            self.assertEqual(self.world.get(x + 100, y + 100), 1)
+        self.assertEqual(int(self.world.world.sum()), 5)
+
+    def test_free_tiles(self):
+        """
+        Tests that tiles are freed once they have been empty for a while.
+        """
+        # the cell is on the bottom edge of its tile, and decays in 3 generations
+        self.world.set(-20, 7)
+        sim = Simulator(self.world, rules='B3/S23/A3', start_age=3)
+        self.assertEqual(sorted(self.world.tiles), [(-3, 0), (-3, 1)])
+        sim.run(2 + InfiniteWorld.free_after, stop_on_cycle=False)
+        self.assertEqual(len(self.world.tiles), 2)
+        sim.run(1, stop_on_cycle=False)
+        self.assertEqual(self.world.tiles, {})
+        sim.update()
+        self.assertEqual(self.world.world.shape, (0, 0))
+
+    def test_toroidal_equivalence(self):
+        """
+        Tests that a pattern far from the edges of a toroidal world evolves the same on the plane, for all rule kinds.
+        """
+        for rules in ('B3/S23', 'B3/S23/A5', 'B2/S/C4'):
+            cells = (np.random.random_sample((40, 40)) < 0.4).astype(np.uint8)
+            world = World(120, fill_cells=0, dtype=np.uint8)
+            world.place(cells, 40, 40)
+            self.world = InfiniteWorld(0, tile_size=8)
+            self.world.place(cells, 40, 40)
+            torus, plane = Simulator(world, rules=rules, start_age=2), Simulator(self.world, rules=rules, start_age=2)
+            metrics = Metrics()
+            plane.add_observer(metrics, count_every=1)
+            for _ in range(30):
+                torus.update()
+                plane.update()
+                left, top = self.world.origin
+                expected = world.world[top:top+self.world.height, left:left+self.world.width]
+                np.testing.assert_array_equal(self.world.world, expected)
+                self.assertEqual(metrics.get_generations()[-1].population, np.count_nonzero(torus.alive(world.world)))
+
+    def test_engine(self):
+        """
+        Tests that the infinite engine only steps an ``InfiniteWorld``, with rules that keep empty space empty.
+        """
+        self.assertRaises(ValueError, Simulator, self.world, engine='vectorized')
+        self.assertRaises(ValueError, Simulator, World(8), engine='infinite')
+        self.assertRaises(ValueError, Simulator, self.world, rules='B0/S8')
+        self.assertRaises(ValueError, Simulator, self.world, history=16)
+        sim = Simulator(self.world)
+        self.assertRaises(ValueError, sim.set_rules, 'B01/S23')
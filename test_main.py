@@ -0,0 +1,99 @@
+from unittest import TestCase
+from contextlib import redirect_stderr, redirect_stdout
+from main import *
+from Checkpoint import Checkpoint
+from DeltaLog import DeltaLogReader
+from Pattern import Pattern
+import io
+import os
+import subprocess
+import tempfile
+
+
+class TestMain(TestCase):
+    """
+    Tests for the command line of ``main.py``.
+    """
+    def run_main(self, *argv):
+        """Runs main with the arguments, returning the simulator and the printed output"""
+        output = io.StringIO()
+        with redirect_stdout(output):
+            sim = main(list(argv))
+        return sim, output.getvalue()
+
+    def test_formats(self):
+        """
+        Tests that every output format writes the last generation of the run.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            for format in ('delta', 'rle', 'life106', 'checkpoint'):
+                path = os.path.join(directory, 'run.' + format)
+                sim, output = self.run_main('--size', '40', '30', '--rules', 'B3/S23', '--seed', '3', '--generations', '6',
+                                            '--history', '0', '--format', format, '--output', path)
+                self.assertIn('Stopped at generation 6', output)
+                cells = sim.get_world().world
+                self.assertEqual(cells.shape, (30, 40))
+                self.assertEqual(cells.dtype, np.uint8)
+                if format == 'delta':
+                    with DeltaLogReader(path) as reader:
+                        np.testing.assert_array_equal(reader.seek(6), cells)
+                        self.assertEqual(reader.get_generations(), list(range(7)))
+                        # the initial board is logged too, and replaying it gives the last generation
+                        replay = Simulator(World(40, 30, 0, dtype=np.uint8), rules='B3/S23')
+                        replay.world.world = reader.seek(0).copy()
+                        replay.advance(6)
+                        np.testing.assert_array_equal(replay.world.world, cells)
+                elif format == 'checkpoint':
+                    np.testing.assert_array_equal(Checkpoint.read(path).cells, cells)
+                else:
+                    pattern = Pattern.read(path)
+                    ys, xs = np.nonzero(cells)
+                    self.assertEqual(np.count_nonzero(pattern.cells), len(ys))
+                    self.assertEqual(pattern.origin, (xs.min(), ys.min()))
+
+    def test_arguments(self):
+        """
+        Tests rejecting runs that would never end or worlds of more than two dimensions, and the default rules.
+        """
+        with redirect_stdout(io.StringIO()), open(os.devnull, 'w') as devnull:
+            with self.assertRaises(SystemExit), redirect_stderr(devnull):
+                parse_args(['--history', '0'])
+            with self.assertRaises(SystemExit), redirect_stderr(devnull):
+                parse_args(['--size', '1', '2', '3'])
+            # engines that cannot run the default decay of age rules, or detect cycles
+            for argv in (['--engine', 'hashlife'], ['--engine', 'packed'], ['--engine', 'infinite'],
+                         ['--engine', 'infinite', '--history', '0', '--generations', '5'], ['--rules', 'B3/X23']):
+                with self.assertRaises(SystemExit), redirect_stderr(devnull):
+                    parse_args(argv)
+        args = parse_args([])
+        self.assertEqual((args.rules, args.start_age, args.output, args.visual), ('B3/S23/A2', 2, 'run.gol', False))
+        self.assertEqual(parse_args(['--format', 'checkpoint']).output, 'run.ckpt')
+
+    def test_engines(self):
+        """
+        Tests that every engine runs from the command line, on a world of the type it steps.
+        """
+        arguments = ['--size', '48', '--rules', 'B3/S23', '--seed', '5', '--generations', '4', '--history', '0',
+                     '--format', 'none']
+        reference, _ = self.run_main(*arguments, '--engine', 'vectorized')
+        for engine in ('cell', 'sparse', 'hashlife', 'parallel', 'packed', 'banded', 'infinite'):
+            sim, output = self.run_main(*arguments, '--engine', engine)
+            self.assertEqual(sim.engine, engine)
+            self.assertIn('Stopped at generation 4', output)
+            if engine == 'packed':
+                self.assertIsInstance(sim.get_world(), PackedWorld)
+            elif engine == 'infinite':
+                self.assertIsInstance(sim.get_world(), InfiniteWorld)
+            elif engine != 'hashlife':
+                # the other engines step the same random toroidal world
+                np.testing.assert_array_equal(sim.get_world().world, reference.get_world().world)
+
+    def test_headless_imports(self):
+        """
+        Tests that a headless run does not import pygame or multiprocessing.
+        """
+        directory = os.path.dirname(os.path.abspath(__file__))
+        code = ("import sys, main; main.main(['--size', '16', '--generations', '2', '--format', 'none']); "
+                "print(sorted(name for name in ('pygame', 'multiprocessing') if name in sys.modules))")
+        output = subprocess.run([sys.executable, '-c', code], cwd=directory, capture_output=True, text=True, check=True)
+        self.assertEqual(output.stdout.splitlines()[-1], '[]')
@@ -0,0 +1,78 @@
+from unittest import TestCase
+from Metrics import *
+from Simulator import Simulator
+from PackedWorld import PackedWorld
+from World import World
+
+
+class TestMetrics(TestCase):
+    """
+    Tests for ``Metrics`` and the observers of ``Simulator``.
+    """
+    def expected(self, before: np.ndarray, after: np.ndarray, alive) -> tuple:
+        """Returns population, births, deaths, survivals and changed cells counted directly"""
+        was, now = alive(before), alive(after)
+        return (np.count_nonzero(now), np.count_nonzero(now & ~was), np.count_nonzero(was & ~now),
+                np.count_nonzero(was & now), np.count_nonzero(before != after))
+
+    def test_ring_buffer(self):
+        """
+        Tests keeping the most recent records and passing them on to callbacks.
+        """
+        seen = []
+        metrics = Metrics(capacity=3, callbacks=[seen.append])
+        for generation in range(5):
+            metrics(GenerationRecord(generation, 0.1, 0.0, 0.0, generation * 2, 0, 0, 0, 0, 0, None))
+        metrics(FrameRecord(4, 0.01))
+        self.assertEqual([record.generation for record in metrics.get_generations()], [2, 3, 4])
+        self.assertEqual(metrics.get_frames(), [FrameRecord(4, 0.01)])
+        self.assertEqual(len(seen), 6)
+        np.testing.assert_array_equal(metrics.column('population'), [4, 6, 8])
+        metrics.clear()
+        self.assertEqual(metrics.get_generations(), [])
+
+    def test_simulator_observer(self):
+        """
+        Tests the counts of every generation against counting directly, in every mode and for the packed engine.
+        """
+        cases = [(World(30, 20, 0.4, dtype=np.uint8), 'B3/S23', lambda cells: cells == 1),
+                 (World(30, 20, 0.4, dtype=np.uint8), 'B3/S23/A5', lambda cells: cells > 0),
+                 (World(30, 20, 0.4, dtype=np.uint8), 'B2/S/C4', lambda cells: cells == 1),
+                 (PackedWorld(70, 20, 0.4), 'B3/S23', lambda cells: cells == 1)]
+        for world, rules, alive in cases:
+            sim = Simulator(world, rules=rules, start_age=3)
+            metrics = Metrics()
+            sim.add_observer(metrics, count_every=1)
+            for generation in range(6):
+                before = world.world.copy()
+                if generation == 3:
+                    world.set(1, 1, 0 if world.get(1, 1) else 1)
+                    before = world.world.copy()
+                sim.update()
+                record = metrics.get_generations()[-1]
+                self.assertEqual(record.generation, generation + 1)
+                counts = (record.population, record.births, record.deaths, record.survivals, record.changed)
+                self.assertEqual(counts, self.expected(before, world.world, alive))
+                self.assertEqual(record.active, 600 if world.width == 30 else 1400)
+            if rules == 'B3/S23/A5':
+                np.testing.assert_array_equal(record.ages, np.bincount(world.world.ravel(), minlength=6))
+            else:
+                self.assertIsNone(record.ages)
+
+    def test_count_every(self):
+        """
+        Tests that times are recorded every generation and cells are counted every few generations.
+        """
+        sim = Simulator(World(16, fill_cells=0.5), engine='vectorized')
+        metrics = Metrics()
+        sim.add_observer(metrics, count_every=3)
+        sim.run(7, stop_on_cycle=False)
+        records = metrics.get_generations()
+        self.assertEqual([record.generation for record in records], list(range(1, 8)))
+        self.assertEqual([record.population is not None for record in records], [False, False, True] * 2 + [False])
+        self.assertTrue(all(record.seconds >= record.counting + record.rules > 0 for record in records))
+
+        sim.remove_observer(metrics)
+        sim.update()
+        self.assertEqual(len(metrics.get_generations()), 7)
+        self.assertIsNone(sim.phases)
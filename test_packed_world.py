@@ -0,0 +1,91 @@
+from unittest import TestCase
+from PackedWorld import *
+from Simulator import *
+
+
+class TestPackedWorld(TestCase):
+    """
+    Test cases for ``PackedWorld`` data type.
+    """
+    def setUp(self):
+        """
+        Common setup: a world whose width does not fill its last word.
+        """
+        self.width, self.height = 70, 12
+        self.world = PackedWorld(self.width, self.height, 0)
+        self.assertEqual(self.world.bits.shape, (self.height, 2))
+        self.assertEqual(np.sum(self.world.world), 0)
+
+    def test_region(self):
+        """
+        Tests unpacking rectangles across and within words, clipped to the world.
+        """
+        world = PackedWorld(150, 9, 0.5)
+        cells = world.world
+        self.assertEqual(cells.dtype, np.uint8)
+        for left, top, right, bottom in ((0, 0, 150, 9), (60, 2, 70, 5), (64, 0, 128, 9), (130, 3, 200, 20),
+                                         (-5, -5, 3, 2), (140, 0, 140, 9)):
+            region = world.region(left, top, right, bottom)
+            self.assertEqual(region.dtype, np.uint8)
+            np.testing.assert_array_equal(region, cells[max(0, top):bottom, max(0, left):right])
+        copy = world.copy()
+        world.set(0, 0, 1 - world.get(0, 0))
+        np.testing.assert_array_equal(copy.world, cells)
+
+    def test_set_get(self):
+        """
+        Tests setting and getting values in both words of a row.
+        """
+        for x in (0, 63, 64, 69):
+            self.world.set(x, 5)
+            self.assertEqual(self.world.get(x, 5), 1)
+            self.assertEqual(self.world.world[5][x], 1)
+        self.world.set(63, 5, 0)
+        self.assertEqual(self.world.get(63, 5), 0)
+        self.assertEqual(self.world.get(70, 5), -1)
+        self.assertEqual(np.sum(self.world.world), 3)
+
+    def test_get_neighbours(self):
+        """
+        Tests getting neighbours wrapping around the last column.
+        """
+        self.world.set(self.width-1, self.height-1)
+        neighbours = self.world.get_neighbours(0, 0)
+        self.assertEqual(8, len(neighbours))
+        self.assertEqual(sum(neighbours), 1)
+
+    def test_pack(self):
+        """
+        Tests that packing and unpacking keeps the cells.
+        """
+        cells = np.random.binomial(1, 0.5, (self.height, self.width))
+        self.world.world = cells
+        np.testing.assert_array_equal(self.world.world, cells)
+        self.assertEqual(self.world.world.dtype, np.uint8)
+
+    def test_next_generation(self):
+        """
+        Tests that the packed engine matches the vectorized engine, including the wrap-around at both edges.
+        """
+        for width in (70, 64, 5):
+            for rules in ('B3/S23', 'B36/S125'):
+                world = PackedWorld(width, self.height, 0.4)
+                sim = Simulator(world, rules=rules)
+                self.assertEqual(sim.engine, 'packed')
+                reference = Simulator(World(width, self.height, 0), rules=rules)
+                reference.world.world = world.world
+                for _ in range(6):
+                    sim.update()
+                    reference.update()
+                    np.testing.assert_array_equal(sim.world.world, reference.world.world)
+
+    def test_engine(self):
+        """
+        Tests that a PackedWorld requires the packed engine and standard rules.
+        """
+        with self.assertRaises(ValueError):
+            Simulator(self.world, engine='vectorized')
+        with self.assertRaises(ValueError):
+            Simulator(self.world, rules='B3/S23/A5')
+        with self.assertRaises(ValueError):
+            Simulator(World(10), engine='packed')
@@ -0,0 +1,71 @@
+from unittest import TestCase
+from Pattern import *
+import io
+
+
+class TestPattern(TestCase):
+    """
+    Tests for reading and writing ``Pattern``s.
+    """
+    def setUp(self):
+        """
+        Common setup: a glider in RLE format.
+        """
+        self.glider = "#N Glider\nx = 3, y = 3, rule = B3/S23\nbob$2bo$3o!\n"
+
+    def test_read_rle(self):
+        """
+        Tests reading the header, comments and cells of an RLE pattern.
+        """
+        pattern = Pattern.read_rle(io.StringIO(self.glider))
+        np.testing.assert_array_equal(pattern.cells, [[0, 1, 0], [0, 0, 1], [1, 1, 1]])
+        self.assertEqual(pattern.rules, 'B3/S23')
+        self.assertEqual(pattern.comments, ['N Glider'])
+
+        pattern = Pattern.read_rle(io.StringIO("x = 4, y = 5\n2.A$\n3$pA2B!"))
+        np.testing.assert_array_equal(pattern.cells, [[0, 0, 1, 0], [0] * 4, [0] * 4, [0] * 4, [25, 2, 2, 0]])
+        for invalid in ("#C no header\n", "x = 2, y = 1\n3o!", "x = 2, y = 1\no?o!"):
+            with self.assertRaises(ValueError):
+                Pattern.read_rle(io.StringIO(invalid))
+
+    def test_rle_round_trip(self):
+        """
+        Tests writing and reading back two-state and multi-state patterns, also when read in tiny chunks.
+        """
+        two_state = np.random.randint(0, 2, (40, 97)).astype(np.uint8)
+        two_state[:, -5:] = 0
+        two_state[10:20] = 0
+        multi_state = np.random.randint(0, 256, (30, 41)).astype(np.uint8)
+        chunk_bytes = Pattern.chunk_bytes
+        try:
+            for chunk in (chunk_bytes, 3):
+                Pattern.chunk_bytes = chunk
+                for cells in (two_state, multi_state):
+                    file = io.StringIO()
+                    Pattern(cells, 'B3/S23').write_rle(file)
+                    self.assertTrue(all(len(line) <= Pattern.line_length + 8 for line in file.getvalue().splitlines()))
+                    pattern = Pattern.read_rle(io.StringIO(file.getvalue()))
+                    np.testing.assert_array_equal(pattern.cells, cells)
+                    self.assertEqual(pattern.rules, 'B3/S23')
+        finally:
+            Pattern.chunk_bytes = chunk_bytes
+
+    def test_life106_round_trip(self):
+        """
+        Tests writing and reading back a pattern in Life 1.06 format, with negative coordinates, also when read in tiny
+        chunks that cut numbers in several parts.
+        """
+        cells = np.zeros((20, 30), dtype=np.uint8)
+        cells[[0, 5, 19], [3, 0, 29]] = 1
+        file = io.StringIO()
+        Pattern(cells, origin=(-10, -2)).write_life106(file)
+        self.assertEqual(file.getvalue(), "#Life 1.06\n-7 -2\n-10 3\n19 17\n")
+        chunk_bytes = Pattern.chunk_bytes
+        try:
+            for chunk in (chunk_bytes, 3, 2, 1):
+                Pattern.chunk_bytes = chunk
+                pattern = Pattern.read_life106(io.StringIO(file.getvalue()))
+                self.assertEqual(pattern.origin, (-10, -2))
+                np.testing.assert_array_equal(pattern.cells, cells)
+        finally:
+            Pattern.chunk_bytes = chunk_bytes
@@ -0,0 +1,66 @@
+from unittest import TestCase
+from Rule import *
+
+
+class TestRule(TestCase):
+    """
+    Tests for compiled ``Rule``s.
+    """
+    def test_parse(self):
+        """
+        Tests reading the supported notations.
+        """
+        rule = Rule('B36/S23')
+        self.assertEqual((rule.birth, rule.survival, rule.mode), ([3, 6], [2, 3], 'standard'))
+        rule = Rule('B3/S23/A12')
+        self.assertEqual((rule.mode, rule.max_age), ('decay of age', 12))
+        self.assertEqual(Rule('B3/S23/12').max_age, 12)
+        rule = Rule('B2/S/C24')
+        self.assertEqual((rule.birth, rule.survival, rule.mode, rule.states), ([2], [], 'generations', 24))
+        self.assertEqual(Rule('b2/s/g24').states, 24)
+        # rule strings without letters keep the positional birth/survival/age meaning of the first versions
+        rule = Rule('3/23')
+        self.assertEqual((rule.birth, rule.survival, rule.mode), ([3], [2, 3], 'standard'))
+        rule = Rule('3/23/5')
+        self.assertEqual((rule.birth, rule.survival, rule.mode, rule.max_age), ([3], [2, 3], 'decay of age', 5))
+        self.assertEqual(Rule('/2').birth, [])
+        for rules in ('', 'B3', 'B3/S23/A5/C3', 'B9/S23', 'B3/S2x', 'B3/B2', 'X3/S23'):
+            with self.assertRaises(ValueError):
+                Rule(rules)
+
+    def test_table(self):
+        """
+        Tests the next states in the tables of the three modes.
+        """
+        rule = Rule('B3/S23')
+        self.assertEqual([rule.next_state(0, n) for n in range(9)], [0, 0, 0, 1, 0, 0, 0, 0, 0])
+        self.assertEqual([rule.next_state(1, n) for n in range(9)], [0, 0, 1, 1, 0, 0, 0, 0, 0])
+        rule = Rule('B3/S23/A5')
+        self.assertEqual(rule.next_state(2, 3), 3)  # fertile cell gives birth and ages
+        self.assertEqual(rule.next_state(4, 3), 4)  # too old to give birth, survives
+        self.assertEqual(rule.next_state(4, 1), 3)  # decays
+        self.assertEqual(rule.next_state(0, 3), 0)
+        rule = Rule('B2/S/C4')
+        self.assertEqual([rule.next_state(s, 2) for s in range(4)], [1, 2, 3, 0])
+        self.assertEqual([rule.next_state(s, 1) for s in range(4)], [0, 2, 3, 0])
+        self.assertEqual(rule.alive_table[:4].tolist(), [False, True, False, False])
+
+    def test_flat_table(self):
+        """
+        Tests that the flat table matches the table and is cached per type.
+        """
+        rule = Rule('B2/S/C4')
+        table = rule.flat_table(np.uint8)
+        self.assertEqual(table.dtype, np.uint8)
+        rows = len(rule.table)
+        for state in range(6):
+            for neighbours in range(9):
+                self.assertEqual(table[neighbours * rows + state], rule.table[state, neighbours])
+        self.assertIs(rule.flat_table(np.uint8), table)
+
+    def test_compile(self):
+        """
+        Tests that every rule string is compiled only once.
+        """
+        self.assertIs(Rule.compile('B3/S23/A7'), Rule.compile('B3/S23/A7'))
+        self.assertIsNot(Rule.compile('B3/S23'), Rule.compile('B36/S23'))
@@ -0,0 +1,84 @@
+from unittest import TestCase
+from SimulationWorker import *
+from World import World
+import time
+
+
+class TestSimulationWorker(TestCase):
+    """
+    Tests for ``SimulationWorker`` background thread.
+    """
+    def setUp(self):
+        self.sim = Simulator(World(20))
+        self.worker = SimulationWorker(self.sim, generations_per_second=1000, buffer_size=3)
+
+    def tearDown(self):
+        self.worker.stop()
+
+    def test_paused(self):
+        """
+        Tests that the worker starts paused, without snapshots.
+        """
+        time.sleep(0.05)
+        self.assertTrue(self.worker.is_paused())
+        self.assertIsNone(self.worker.latest())
+        self.assertEqual(self.sim.get_generation(), 0)
+
+    def test_snapshots(self):
+        """
+        Tests that snapshots are copies of the produced generations, bounded by the buffer size.
+        """
+        self.worker.set_skip_frames(True)
+        self.worker.resume()
+        time.sleep(0.1)
+        self.worker.pause()
+        time.sleep(0.05)
+        generation, cells = self.worker.latest()
+        self.assertEqual(generation, self.sim.get_generation())
+        np.testing.assert_array_equal(cells, self.sim.world.world)
+        self.assertIsNot(cells, self.sim.world.world)
+        self.assertLessEqual(len(self.worker.snapshots), 3)
+        self.assertGreater(generation, 3)
+
+    def test_skip_frames_copies(self):
+        """
+        Tests that in skip-frames mode generations are only copied once the previous snapshot was taken, and that the
+        last generation is copied when the worker is paused.
+        """
+        self.worker.set_skip_frames(True)
+        self.worker.resume()
+        time.sleep(0.1)
+        self.assertEqual(len(self.worker.snapshots), 1)
+        self.worker.latest()
+        time.sleep(0.05)
+        self.assertEqual(len(self.worker.snapshots), 2)
+        self.worker.pause()
+        time.sleep(0.05)
+        generation, cells = self.worker.latest()
+        self.assertEqual(generation, self.sim.get_generation())
+        np.testing.assert_array_equal(cells, self.sim.world.world)
+        self.assertGreater(generation, 3)
+
+    def test_error(self):
+        """
+        Tests that an error of the simulator stops the worker and is raised to the consumer once.
+        """
+        def fail():
+            raise ZeroDivisionError
+        self.sim.update = fail
+        self.worker.resume()
+        self.worker.thread.join(1)
+        self.assertFalse(self.worker.thread.is_alive())
+        self.assertTrue(self.worker.is_paused())
+        self.assertRaises(ZeroDivisionError, self.worker.latest)
+        self.assertIsNone(self.worker.latest())
+
+    def test_rate(self):
+        """
+        Tests that the worker is paced to the target number of generations per second.
+        """
+        self.worker.set_rate(50)
+        self.worker.resume()
+        time.sleep(0.2)
+        self.worker.pause()
+        self.assertLess(self.sim.get_generation(), 20)
@@ -1,5 +1,7 @@
 from unittest import TestCase
 from Simulator import *
+import os
+import tempfile
 
 
 class TestSimulator(TestCase):
@@ -141,6 +143,412 @@ class TestSimulator(TestCase):
         state = self.sim.life_rules(2, 1)  # check state
         self.assertEqual(state, 0)  # age must be same
 
+    def reference_generation(self, sim):
+        """
+        Double-buffered per-cell reference: every cell is evaluated with ``life_rules`` against an unchanged world.
+        """
+        next_cells = np.empty_like(sim.world.world)
+        for y in range(sim.world.height):
+            for x in range(sim.world.width):
+                next_cells[y][x] = sim.life_rules(x, y)
+        return next_cells
+
+    def test_vectorized_standard(self):
+        """
+        Tests that the vectorized engine matches the per-cell reference in standard mode.
+        """
+        for rules in ('B3/S23', 'B36/S23', 'B2/S'):
+            sim = Simulator(World(23, 17, 0.4), rules=rules, engine='vectorized')
+            for _ in range(5):
+                expected = self.reference_generation(sim)
+                sim.update()
+                np.testing.assert_array_equal(sim.world.world, expected)
+
+    def test_vectorized_decay_of_age(self):
+        """
+        Tests that the vectorized engine matches the per-cell reference in decay of age mode.
+        """
+        for rules, start_age in (('B3/S23/A5', 3), ('B36/S235/A8', 2), ('B3/S23/A2', 2)):
+            world = World(19, 21, 0.5)
+            sim = Simulator(world, rules=rules, start_age=start_age, engine='vectorized')
+            world.world = np.random.randint(0, sim.max_age+1, world.world.shape)
+            for _ in range(5):
+                expected = self.reference_generation(sim)
+                sim.update()
+                np.testing.assert_array_equal(sim.world.world, expected)
+
+    def test_engine(self):
+        """
+        Tests engine selection: ``'auto'`` picks the vectorized engine unless ``life_rules`` is overridden.
+        """
+        self.assertEqual(self.sim.engine, 'vectorized')
+        self.assertEqual(Simulator(engine='cell').engine, 'cell')
+
+        class CustomSimulator(Simulator):
+            def life_rules(self, x, y):
+                return 0
+
+        self.assertEqual(CustomSimulator().engine, 'cell')
+        with self.assertRaises(ValueError):
+            Simulator(engine='gpu')
+
+
+    def test_double_buffering(self):
+        """
+        Tests that both engines read the front and write the back buffer, without allocating new arrays.
+        """
+        for engine in ('cell', 'vectorized'):
+            sim = Simulator(World(12, 9, 0.5), engine=engine)
+            front, back = sim.world.world, sim.world.back_buffer()
+            expected = self.reference_generation(sim)
+            sim.update()
+            np.testing.assert_array_equal(sim.world.world, expected)
+            self.assertIs(sim.world.world, back)
+            sim.update()
+            self.assertIs(sim.world.world, front)
+
+
+    def test_sparse(self):
+        """
+        Tests that the sparse engine matches the vectorized engine, also after editing cells, in both modes.
+        """
+        for rules in ('B3/S23', 'B3/S23/A6'):
+            world = World(70, 45, 0.3)
+            sim = Simulator(world, rules=rules, start_age=3, engine='sparse', tile_size=16)
+            reference = Simulator(World(70, 45, 0), rules=rules, start_age=3, engine='vectorized')
+            reference.world.world = world.world.copy()
+            for generation in range(30):
+                if generation == 10:
+                    # a pattern across the edges, placed in one bulk edit per wrapped part
+                    pattern = np.eye(20, dtype=np.int64)
+                    sim.world.place(pattern, 60, 35)
+                    reference.world.place(pattern, 60, 35)
+                if generation == 20:
+                    sim.world.set(0, 0, 1)
+                    reference.world.set(0, 0, 1)
+                sim.update()
+                reference.update()
+                np.testing.assert_array_equal(sim.world.world, reference.world.world)
+
+    def test_sparse_active_tiles(self):
+        """
+        Tests that the sparse engine only evaluates the tiles around a blinker on an otherwise empty world.
+        """
+        sim = Simulator(World(128, 128, 0), engine='sparse', tile_size=16)
+        for x in (40, 41, 42):
+            sim.world.set(x, 40)
+        sim.update()
+        self.assertEqual(sim.get_active_tiles(), 64)
+        self.assertEqual(sim.world.get(41, 39), 1)
+        sim.update()
+        self.assertEqual(sim.get_active_tiles(), 9)
+        self.assertEqual(sim.world.world.sum(), 3)
+        self.assertEqual(sim.world.get(40, 40), 1)
+
+
+    def test_hashlife(self):
+        """
+        Tests that the hashlife engine matches the vectorized engine away from the edges, and refuses decay of age.
+        """
+        world = World(64, fill_cells=0)
+        world.world[24:40, 24:40] = np.random.binomial(1, 0.5, (16, 16))
+        sim = Simulator(world, engine='hashlife')
+        reference = Simulator(World(64, fill_cells=0), engine='vectorized')
+        reference.world.world = world.world.copy()
+
+        sim.update()
+        reference.update()
+        np.testing.assert_array_equal(sim.world.world, reference.world.world)
+        sim.world.set(5, 5, 1)
+        reference.world.set(5, 5, 1)
+        sim.advance(11)
+        reference.advance(11)
+        np.testing.assert_array_equal(sim.get_world().world, reference.world.world)
+        self.assertEqual(sim.get_generation(), 12)
+
+        with self.assertRaises(ValueError):
+            Simulator(World(10), rules='B3/S23/A5', engine='hashlife')
+
+        # the plane and the torus part ways at the edges: living cells there are refused, and reaching them warns
+        sim = Simulator(World(16, fill_cells=0), engine='hashlife')
+        sim.world.set(0, 7)
+        self.assertRaises(ValueError, sim.update)
+        sim.world.set(0, 7, 0)
+        for x, y in ((1, 0), (2, 1), (0, 2), (1, 2), (2, 2)):
+            sim.world.set(x + 6, y + 6)  # glider, heading for the bottom right corner
+        with self.assertWarns(RuntimeWarning):
+            sim.advance(40)
+
+
+    def test_parallel(self):
+        """
+        Tests that the parallel engine matches the vectorized engine across the wrapped strip edges, in both modes.
+        """
+        for rules in ('B3/S23', 'B3/S23/A5'):
+            world = World(31, 23, 0.5)
+            sim = Simulator(world, rules=rules, start_age=2, engine='parallel', workers=3)
+            reference = Simulator(World(31, 23, 0), rules=rules, start_age=2, engine='vectorized')
+            reference.world.world = world.world.copy()
+            try:
+                for _ in range(8):
+                    sim.update()
+                    reference.update()
+                    np.testing.assert_array_equal(sim.world.world, reference.world.world)
+            finally:
+                sim.close()
+            np.testing.assert_array_equal(sim.world.world, reference.world.world)
+
+
+    def test_parallel_failure(self):
+        """
+        Tests that a dead worker makes the parallel engine raise rather than hang, and that a dropped simulator frees
+        its shared memory.
+        """
+        from multiprocessing import shared_memory
+        from StripPool import StripPool
+        timeout = StripPool.timeout
+        StripPool.timeout = 2
+        try:
+            sim = Simulator(World(30, 20, 0.5), engine='parallel', workers=2)
+            sim.update()
+            name = sim.pool.memory.name
+            sim.pool.processes[0].kill()
+            sim.pool.processes[0].join()
+            with self.assertRaises(RuntimeError):
+                sim.update()
+            self.assertIsNone(sim.pool)
+            self.assertRaises(FileNotFoundError, shared_memory.SharedMemory, name)
+            # the next update starts a new pool
+            sim.update()
+            name = sim.pool.memory.name
+            del sim
+            import gc
+            gc.collect()
+            self.assertRaises(FileNotFoundError, shared_memory.SharedMemory, name)
+        finally:
+            StripPool.timeout = timeout
+
+    def test_banded_resume(self):
+        """
+        Tests that a file-backed world is stepped in bands and resumes with its generation and rules after reopening.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'world.gol')
+            world = World(40, 30, 0.4, dtype=np.uint8, path=path)
+            sim = Simulator(world, rules='B3/S23/A5', start_age=2)
+            self.assertEqual(sim.engine, 'banded')
+            reference = Simulator(World(40, 30, 0), rules='B3/S23/A5', engine='vectorized')
+            reference.world.world = world.world.copy()
+
+            band_cells = Simulator.band_cells
+            Simulator.band_cells = 7 * 40
+            try:
+                for _ in range(5):
+                    sim.update()
+                    reference.update()
+                sim = Simulator(World.open(path), start_age=2)
+                self.assertEqual(sim.get_generation(), 5)
+                self.assertEqual(sim.rules, 'B3/S23/A5')
+                np.testing.assert_array_equal(sim.world.world, reference.world.world)
+                sim.update()
+                reference.update()
+                np.testing.assert_array_equal(sim.world.world, reference.world.world)
+            finally:
+                Simulator.band_cells = band_cells
+
+            # the workers of the parallel engine would step copies of the cells that never reach the file
+            with self.assertRaises(ValueError):
+                Simulator(world, engine='parallel')
+            with self.assertRaises(ValueError):
+                Simulator(World(8), engine='parallel').set_world(world)
+            del world, sim
+
+
+    def test_cycle_detection(self):
+        """
+        Tests detecting still lifes and cycles, stopping on them and fast-forwarding through them.
+        """
+        world = World(8, fill_cells=0)
+        for x, y in ((1, 0), (2, 1), (0, 2), (1, 2), (2, 2)):
+            world.set(x, y)  # glider, back at the same place after 4 * 8 generations
+        start = world.world.copy()
+        sim = Simulator(world, history=64)
+        self.assertIsNone(sim.get_period())
+        sim.run()
+        self.assertEqual(sim.get_period(), 32)
+        self.assertEqual(sim.get_generation(), 32)
+        np.testing.assert_array_equal(sim.world.world, start)
+
+        reference = Simulator(World(8, fill_cells=0), engine='vectorized')
+        reference.world.world = start.copy()
+        sim.advance(1001)
+        reference.advance(1001)
+        self.assertEqual(sim.get_generation(), 1033)
+        np.testing.assert_array_equal(sim.world.world, reference.world.world)
+
+        # editing the world forgets the period; a single block is a still life
+        sim.world.world[...] = 0
+        for x, y in ((3, 3), (3, 4), (4, 3), (4, 4)):
+            sim.world.set(x, y)
+        sim.update()
+        self.assertEqual(sim.get_period(), 1)
+
+        # cells set next to a detected still life are stepped rather than skipped, by advance and by run
+        for x in (0, 1, 2):
+            sim.world.set(x, 6)
+        self.assertIsNone(sim.get_period())
+        reference.world.world = sim.world.world.copy()
+        sim.advance(5)
+        reference.advance(5)
+        np.testing.assert_array_equal(sim.world.world, reference.world.world)
+        self.assertEqual(sim.get_generation(), 1039)
+        sim.world.set(7, 7)
+        sim.run(3)
+        self.assertEqual(sim.get_generation(), 1042)
+
+        # a new world is run from scratch, until it is found to be a still life of its own
+        sim.set_world(World(8, fill_cells=0))
+        self.assertIsNone(sim.get_period())
+        sim.run(5)
+        self.assertEqual(sim.get_generation(), 1043)
+        self.assertEqual(sim.get_period(), 1)
+
+        with self.assertRaises(ValueError):
+            Simulator().run()
+
+    def test_skip_cycles_state(self):
+        """
+        Tests that skipping cycles stores the generation of a file-backed world and writes the checkpoint that fell due.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'world.gol')
+            world = World(8, fill_cells=0, dtype=np.uint8, path=path)
+            for x, y in ((3, 3), (3, 4), (4, 3), (4, 4)):
+                world.set(x, y)
+            sim = Simulator(world, history=4)
+            sim.run()
+            self.assertEqual(sim.get_period(), 1)
+            checkpoint = os.path.join(directory, 'checkpoint')
+            sim.start_checkpoints(checkpoint, 100)
+            sim.advance(250)
+            sim.stop_checkpoints()
+            self.assertEqual(Checkpoint.read(checkpoint).generation, 251)
+            self.assertEqual(World.open(path).generation, 251)
+            del world, sim
+
+    def test_generations(self):
+        """
+        Tests Generations rules in the vectorized engine against the cell engine, and decay of age with ages above 9.
+        """
+        for rules in ('B2/S/C4', 'B2/S345/C4', 'B3/S23/A12'):
+            world = World(20, 15, 0.4)
+            cell = Simulator(World(20, 15, 0), rules=rules, start_age=2, engine='cell')
+            vectorized = Simulator(world, rules=rules, start_age=2, engine='vectorized')
+            cell.world.world = world.world.copy()
+            for _ in range(8):
+                cell.update()
+                vectorized.update()
+                np.testing.assert_array_equal(cell.world.world, vectorized.world.world)
+
+        with self.assertRaises(ValueError):
+            Simulator(World(8), rules='B2/S/C4', engine='hashlife')
+
+        # states beyond the table are read as its last state and negative states as dead, as by the cell engine
+        for rules in ('B3/S23', 'B2/S/C4'):
+            world = World(8, fill_cells=0)
+            world.world[2:5, 3] = 1
+            world.world[3, 2], world.world[4, 4], world.world[6, 6] = 1000, -4, 300
+            cell = Simulator(World(8, fill_cells=0), rules=rules, engine='cell')
+            cell.world.world = world.world.copy()
+            vectorized = Simulator(world, rules=rules, engine='vectorized')
+            cell.update()
+            vectorized.update()
+            np.testing.assert_array_equal(cell.world.world, vectorized.world.world)
+
+    def test_set_rules(self):
+        """
+        Tests changing the rules in the middle of a run.
+        """
+        world = World(16, 12, 0.5)
+        sim = Simulator(world, engine='sparse')
+        reference = Simulator(World(16, 12, 0), engine='cell')
+        reference.world.world = world.world.copy()
+        for rules in ('B3/S23', 'B36/S23', 'B2/S/C3', 'B3/S23'):
+            sim.set_rules(rules)
+            reference.set_rules(rules)
+            self.assertEqual(sim.rules, rules)
+            for _ in range(3):
+                sim.update()
+                reference.update()
+                np.testing.assert_array_equal(sim.world.world, reference.world.world)
+
+        # a still life under the previous rules is stepped under the new ones
+        block = World(8, fill_cells=0)
+        for x, y in ((3, 3), (3, 4), (4, 3), (4, 4)):
+            block.set(x, y)
+        sim = Simulator(block, history=16)
+        sim.run(4)
+        self.assertEqual(sim.get_period(), 1)
+        sim.set_rules('B36/S125')
+        self.assertIsNone(sim.get_period())
+        sim.advance(5)
+        self.assertEqual(sim.world.world.sum(), 0)
+
+        # the workers of the parallel engine keep running with the new rules
+        world = World(24, 18, 0.5)
+        sim = Simulator(world, engine='parallel', workers=2)
+        reference = Simulator(World(24, 18, 0), engine='vectorized')
+        reference.world.world = world.world.copy()
+        try:
+            sim.update()
+            reference.update()
+            pool = sim.pool
+            for rules in ('B36/S23', 'B2/S/C3', 'B3/S23/A4'):
+                sim.set_rules(rules)
+                reference.set_rules(rules)
+                for _ in range(2):
+                    sim.update()
+                    reference.update()
+                    np.testing.assert_array_equal(sim.world.world, reference.world.world)
+            self.assertIs(sim.pool, pool)
+        finally:
+            sim.close()
+
+        sim = Simulator(World(16, fill_cells=0.5), engine='hashlife')
+        # the hashlife engine refuses living cells on the edges
+        sim.world.world[[0, -1]] = 0
+        sim.world.world[:, [0, -1]] = 0
+        with self.assertRaises(ValueError):
+            sim.set_rules('B3/S23/A5')
+        sim.advance(5)
+        sim.set_rules('B36/S23')
+        self.assertEqual(sim.get_generation(), 5)
+
+    def test_iter_generations(self):
+        """
+        Tests iterating over generations, yielding read-only views of every k-th generation.
+        """
+        world = World(12, 10, 0.5)
+        reference = Simulator(World(12, 10, 0), engine='vectorized')
+        reference.world.world = world.world.copy()
+        sim = Simulator(world)
+        generations = []
+        for generation, cells in sim.iter_generations(10, every=3):
+            reference.advance(3)
+            np.testing.assert_array_equal(cells, reference.world.world)
+            self.assertFalse(cells.flags.writeable)
+            generations.append(generation)
+        self.assertEqual(generations, [3, 6, 9])
+        self.assertEqual(sim.get_generation(), 10)
+
+        blinker = World(6, fill_cells=0)
+        for x in (1, 2, 3):
+            blinker.set(x, 2)
+        generations = [generation for generation, _ in Simulator(blinker, history=8).iter_generations(stop_on_cycle=True)]
+        self.assertEqual(generations, [1, 2])
+        with self.assertRaises(ValueError):
+            next(Simulator(blinker).iter_generations(stop_on_cycle=True))
+
 
 test = TestSimulator()
 test.test_life_rules_V3()
@@ -0,0 +1,177 @@
+from unittest import TestCase, skipUnless
+import os
+import numpy as np
+from Simulator import Simulator
+from World import World
+from PackedWorld import PackedWorld
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+try:
+    from Visualisation import *
+except ImportError:
+    pygame = None
+
+
+@skipUnless(pygame, 'pygame is not installed')
+class TestVisualisation(TestCase):
+    """
+    Tests for the viewport of ``Visualisation``, with the SDL dummy video driver so no display is needed.
+    """
+    def create(self, size, rules='B3/S23', fill_cells=0.3):
+        """Returns a visualisation of a random world that is not running its event loop"""
+        visualisation = Visualisation(Simulator(World(size, fill_cells=fill_cells, dtype=np.uint8), rules=rules,
+                                                start_age=3), autorun=False)
+        self.addCleanup(visualisation.worker.stop)
+        return visualisation
+
+    def test_block_reduce(self):
+        """
+        Tests reducing blocks of values, including blocks cut short at the edges.
+        """
+        values = np.random.randint(0, 6, (37, 45)).astype(np.uint8)
+        for factor in (1, 2, 3, 8, 32, 64):
+            height, width = -(-37 // factor) * factor, -(-45 // factor) * factor
+            padded = np.zeros((height, width), dtype=np.uint8)
+            padded[:37, :45] = values
+            blocks = padded.reshape(height // factor, factor, width // factor, factor)
+            np.testing.assert_array_equal(Visualisation.block_reduce(values, factor, False, np.uint32), blocks.sum(axis=(1, 3)))
+            np.testing.assert_array_equal(Visualisation.block_reduce(values, factor, True), blocks.max(axis=(1, 3)))
+
+    def test_fit(self):
+        """
+        Tests that the whole world fits the viewport, zoomed out to a power of two below a pixel per cell.
+        """
+        small, large = self.create(20), self.create(2000)
+        self.assertEqual(small.zoom, 20)
+        self.assertEqual(large.zoom, 0.25)
+        self.assertEqual(large.cell_at(margin + 400, margin + 100), (1600, 400))
+
+    def test_zoom_pan(self):
+        """
+        Tests that zooming keeps the cell under the cursor in place, and that panning moves by whole pixels.
+        """
+        visualisation = self.create(300)
+        location = (margin + 123, margin + 77)
+        cell = visualisation.cell_at(*location)
+        for factor in (2, 2, 0.5, 0.5, 0.5, 0.5):
+            visualisation.zoom_at(factor, location)
+            self.assertEqual(visualisation.cell_at(*location), cell)
+        # below a pixel per cell the zoom is a power of two
+        self.assertEqual(visualisation.zoom, 0.25)
+        visualisation.zoom_at(8, location)
+        visualisation.pan(-40, 8)
+        self.assertEqual(visualisation.cell_at(*location), (cell[0] - 20, cell[1] + 4))
+
+    def test_level_of_detail(self):
+        """
+        Tests that reductions count living cells, or take the highest age in decay of age mode, and are cached.
+        """
+        visualisation = self.create(100)
+        cells = visualisation.simulator.get_world().world
+        reduced = visualisation.level_of_detail(cells, 4)
+        self.assertEqual(reduced[3, 5], np.count_nonzero(cells[12:16, 20:24] == 1))
+        self.assertIs(visualisation.level_of_detail(cells, 4), reduced)
+        self.assertIsNot(visualisation.level_of_detail(cells.copy(), 4), reduced)
+
+        visualisation = self.create(100, 'B3/S23/A5')
+        cells = visualisation.simulator.get_world().world
+        self.assertEqual(visualisation.level_of_detail(cells, 8)[12, 1], cells[96:, 8:16].max())
+
+    def test_redraw(self):
+        """
+        Tests drawing the viewport at every zoom, also when it shows nothing but space beyond the world.
+        """
+        visualisation = self.create(200)
+        for factor in (8, 4, 0.5, 0.5, 0.5, 0.5, 0.5):
+            visualisation.zoom_at(factor, (margin, margin))
+            visualisation.__redraw__()
+        visualisation.pan(-10000, 0)
+        visualisation.__redraw__()
+        self.assertGreater(visualisation.frame_time, 0)
+
+    def test_redraw_shades(self):
+        """
+        Tests that blocks of living cells are drawn in the colour of living cells at every zoomed-out factor.
+        """
+        visualisation = self.create(256, fill_cells=1)
+        visualisation.zoom_at(1 / visualisation.zoom, (margin, margin))
+        for factor in (2, 4, 8, 16, 32):
+            visualisation.zoom_at(0.5, (margin, margin))
+            visualisation.__redraw__()
+            self.assertEqual(round(1 / visualisation.zoom), factor)
+            self.assertEqual(tuple(visualisation.surface.get_at((margin + 1, margin + 1)))[:3], rainbow[1])
+
+    def test_grid(self):
+        """
+        Tests that the grid lines follow the cells at a sub-cell offset, and are drawn once per zoom.
+        """
+        visualisation = self.create(50, fill_cells=0)
+        visualisation.zoom = 20
+        visualisation.pan(7, 0)
+        visualisation.__redraw__()
+        grid = visualisation.grid
+        # the first visible cell starts 7 pixels left of the viewport, so the next grid line is 13 pixels into it
+        self.assertEqual(tuple(visualisation.surface.get_at((margin + 13, margin + 5)))[:3], black)
+        self.assertEqual(tuple(visualisation.surface.get_at((margin + 14, margin + 5)))[:3], white)
+        self.assertEqual(tuple(visualisation.surface.get_at((margin + 14, margin + 20)))[:3], black)
+        visualisation.pan(3, 0)
+        visualisation.__redraw__()
+        self.assertIs(visualisation.grid, grid)
+        self.assertEqual(tuple(visualisation.surface.get_at((margin + 10, margin + 5)))[:3], black)
+        visualisation.zoom_at(0.5, (margin, margin))
+        visualisation.__redraw__()
+        self.assertIsNot(visualisation.grid, grid)
+
+    def test_redraw_packed(self):
+        """
+        Tests that a packed world, whose visible cells only are unpacked, is drawn as the same world unpacked.
+        """
+        packed = PackedWorld(300, 200, 0.3)
+        dense = World(300, 200, 0)
+        dense.world = packed.world
+        surfaces = []
+        for world in (packed, dense):
+            visualisation = Visualisation(Simulator(world), autorun=False)
+            self.addCleanup(visualisation.worker.stop)
+            visualisation.zoom = 4
+            visualisation.pan(450, 130)
+            visualisation.__redraw__()
+            view = visualisation.__view_rect__()
+            surfaces.append(pygame.surfarray.array3d(visualisation.surface)[view.left:view.right, view.top:view.bottom])
+            visualisation.zoom_at(1 / 16, (margin, margin))
+            visualisation.__redraw__()
+            surfaces.append(pygame.surfarray.array3d(visualisation.surface)[view.left:view.right, view.top:view.bottom])
+        np.testing.assert_array_equal(surfaces[0], surfaces[2])
+        np.testing.assert_array_equal(surfaces[1], surfaces[3])
+
+    def test_redraw_palette(self):
+        """
+        Tests that cell states are drawn in their colour of the palette, the highest colour for higher states.
+        """
+        visualisation = self.create(10, fill_cells=0)
+        self.assertEqual(visualisation.zoom, 20)
+        cells = visualisation.simulator.get_world().world
+        cells[2, 3], cells[7, 1], cells[9, 9] = 5, 1, 40
+        visualisation.__redraw__()
+        for y in range(10):
+            for x in range(10):
+                expected = rainbow[min(cells[y, x], len(rainbow) - 1)]
+                self.assertEqual(tuple(visualisation.surface.get_at((margin + x*20 + 10, margin + y*20 + 10)))[:3], expected)
+
+    def test_redraw_cell(self):
+        """
+        Tests that redrawing an edited cell changes its own rectangle only, keeping its grid lines.
+        """
+        visualisation = self.create(10, fill_cells=0)
+        visualisation.__redraw__()
+        before = pygame.surfarray.array3d(visualisation.surface)
+        visualisation.simulator.get_world().set(4, 6, 3)
+        visualisation.__redraw_cell__(4, 6)
+        after = pygame.surfarray.array3d(visualisation.surface)
+        left, top = margin + 4*20, margin + 6*20
+        self.assertEqual(tuple(after[left + 10, top + 10]), rainbow[3])
+        self.assertEqual(tuple(after[left, top + 10]), black)
+        self.assertEqual(tuple(after[left + 10, top]), black)
+        # pixels outside the cell and its border are untouched
+        changed = np.argwhere((after != before).any(axis=2))
+        self.assertTrue(((changed >= (left, top)) & (changed <= (left + 20, top + 20))).all())
@@ -1,5 +1,7 @@
 from unittest import TestCase
 from World import *
+import os
+import tempfile
 
 
 class TestWorld(TestCase):
@@ -48,3 +50,126 @@ class TestWorld(TestCase):
         neighbours = self.world.get_neighbours(x, y)
         self.assertEqual(8, len(neighbours))
         self.assertIn(value, neighbours)
+
+    def test_neighbour_counts(self):
+        """
+        Tests counting neighbours of the whole board against ``get_neighbours`` and ``get``, with and without wrapping.
+        """
+        world = World(9, 7, 0.5)
+        world.world *= np.random.randint(1, 4, world.world.shape)
+        for threshold in (1, 2):
+            counts = world.neighbour_counts(threshold)
+            bounded = world.neighbour_counts(threshold, wrap=False, out=np.empty((7, 9), dtype=np.intp))
+            for y in range(world.height):
+                for x in range(world.width):
+                    self.assertEqual(counts[y, x], sum(1 for i in world.get_neighbours(x, y) if i >= threshold))
+                    values = [world.get(x+dx, y+dy) for dx, dy in neighbour_offsets]
+                    self.assertEqual(bounded[y, x], sum(1 for i in values if i >= threshold))
+        self.assertEqual(bounded.dtype, np.intp)
+        self.assertRaises(ValueError, world.neighbour_counts, 0)
+
+    def test_get_neighbourhoods(self):
+        """
+        Tests looking up the neighbours of many locations at once.
+        """
+        world = World(6, 5, 0.5, dtype=np.uint8)
+        xs, ys = np.array([0, 5, 2, 5]), np.array([0, 4, 3, 0])
+        neighbourhoods = world.get_neighbourhoods(xs, ys)
+        bounded = world.get_neighbourhoods(xs, ys, wrap=False)
+        for i, (x, y) in enumerate(zip(xs, ys)):
+            self.assertEqual(neighbourhoods[i].tolist(), world.get_neighbours(x, y))
+            self.assertEqual(bounded[i].tolist(), [world.get(x+dx, y+dy) for dx, dy in neighbour_offsets])
+        self.assertIn(-1, bounded[0])
+        # a single location is looked up without copying the board
+        np.testing.assert_array_equal(world.get_neighbourhoods(xs[:1], ys[:1], wrap=False), bounded[:1])
+        np.testing.assert_array_equal(world.get_neighbourhoods(xs[1:2], ys[1:2]), neighbourhoods[1:2])
+
+    def test_swap(self):
+        """
+        Tests swapping the front and back buffer.
+        """
+        front, back = self.world.world, self.world.back_buffer()
+        self.assertIsNot(front, back)
+        self.assertEqual(back.shape, (self.height, self.width))
+        self.world.swap()
+        self.assertIs(self.world.world, back)
+        self.assertIs(self.world.back_buffer(), front)
+
+        self.world.world = np.zeros((3, 4), dtype=np.uint8)
+        self.assertEqual(self.world.back_buffer().shape, (3, 4))
+        self.assertEqual(self.world.back_buffer().dtype, np.uint8)
+
+    def test_pop_edits(self):
+        """
+        Tests that locations changed through set are remembered until popped.
+        """
+        self.world.set(1, 2)
+        self.world.set(-1, 2)
+        self.world.set(3, 4, 0)
+        self.assertEqual(self.world.pop_edits(), [(1, 2, 2, 3), (3, 4, 4, 5)])
+        self.assertEqual(self.world.pop_edits(), [])
+
+    def test_dtype(self):
+        """
+        Tests creating a world storing one byte per cell.
+        """
+        world = World(self.width, self.height, 1, dtype=np.uint8)
+        self.assertEqual(world.world.dtype, np.uint8)
+        self.assertEqual(np.sum(world.world), self.height * self.width)
+
+    def test_file_backed(self):
+        """
+        Tests creating, swapping and reopening a file-backed world.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'world.gol')
+            world = World(self.width, self.height, 0.5, dtype=np.uint8, path=path, rules='B36/S23')
+            self.assertIsInstance(world.world, np.memmap)
+            world.back_buffer()[...] = 1
+            world.swap(4)
+            world.set(2, 3, 0)
+
+            opened = World.open(path)
+            self.assertEqual((opened.width, opened.height), (self.width, self.height))
+            self.assertEqual(opened.generation, 4)
+            self.assertEqual(opened.rules, 'B36/S23')
+            self.assertEqual(opened.world.dtype, np.uint8)
+            self.assertEqual(np.sum(opened.world), self.width * self.height - 1)
+            del world, opened
+
+    def test_str(self):
+        """
+        Tests that the string representation is returned rather than printed.
+        """
+        world = World(3, 2, 0)
+        world.set(1, 0)
+        self.assertEqual(str(world), '-'*12 + '\n| 0 | 1 | 0 | \n' + '-'*12 + '\n| 0 | 0 | 0 | \n' + '-'*12)
+
+    def test_place_edits(self):
+        """
+        Tests that placing a large pattern records the changed cells as a few rectangles rather than cell by cell.
+        """
+        world = World(600, 500, 0, dtype=np.uint8)
+        pattern = np.random.binomial(1, 0.5, (400, 300)).astype(np.uint8)
+        pattern[0, 0] = pattern[-1, -1] = 1
+        world.place(pattern, 100, 50)
+        self.assertEqual(world.pop_edits(), [(100, 50, 400, 450)])
+        world.place(pattern, 100, 50)
+        self.assertEqual(world.pop_edits(), [])
+        # a pattern wrapping around both edges is placed in four parts, each recorded once
+        world.place(pattern, 450, 300)
+        self.assertEqual(len(world.pop_edits()), 4)
+
+    def test_place(self):
+        """
+        Tests placing a pattern, with and without wrapping around the edges.
+        """
+        pattern = np.arange(1, 7).reshape(2, 3)
+        world = World(4, 3, 0)
+        world.place(pattern, 2, 2)
+        np.testing.assert_array_equal(world.world, [[6, 0, 4, 5], [0, 0, 0, 0], [3, 0, 1, 2]])
+        self.assertEqual(sorted(world.pop_edits()), [(0, 0, 1, 1), (0, 2, 1, 3), (2, 0, 4, 1), (2, 2, 4, 3)])
+
+        world = World(4, 3, 0)
+        world.place(pattern, -1, 2, wrap=False)
+        np.testing.assert_array_equal(world.world, [[0, 0, 0, 0], [0, 0, 0, 0], [2, 3, 0, 0]])